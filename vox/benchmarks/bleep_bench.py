@@ -0,0 +1,308 @@
+"""Latency and accuracy of the bleep output (--bleep) on the labeled corpus.
+
+Each clip is replayed through bleep.DelayLine on a simulated clock, the way
+a live `vox --bleep` would run it:
+- Blocks are written when their last sample would have been captured.
+- Windows are cut like the segment stage and decoded with word timestamps,
+  one at a time. A window is cleared (and its swears bleeped) when its
+  decode would have finished.
+- The output is read block by block, `delay` seconds after capture.
+Every window is decoded; the noise gate is not simulated.
+
+Scores per model size and delay:
+- coverage: share of labeled swear audio (manifest 'start' to 'time') that
+  was replaced
+- missed: labeled swears with less than half of their audio replaced
+- start_error / end_error: where each hit swear's replaced run starts and
+  ends relative to the labeled word, in ms (negative: early)
+- false_mute_ratio: share of the other audio that was replaced, by bleeps
+  or by late muting
+- late_seconds: audio muted because its window was not cleared in time
+- slack: delay minus (window cleared - window's first sample captured);
+  negative slack is audio muted unchecked
+- latency: end of the spoken swear -> its window cleared
+
+Output is JSON tagged with the git commit so runs can be diffed.
+
+Usage:
+	python benchmarks/make_fixtures.py
+	python benchmarks/bleep_bench.py [--fixtures benchmarks/fixtures]
+		[--models tiny base] [--delays 4 5 6] [--out results.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from common import add_src_to_path, summarize_ms
+from make_fixtures import DEFAULT_OUT
+from replay import git_revision, load_corpus
+
+add_src_to_path()
+
+import numpy as np  # noqa: E402
+
+from audio import BLOCKSIZE, SAMPLE_RATE  # noqa: E402
+from bleep import DelayLine  # noqa: E402
+from cli import get_default_word_list  # noqa: E402
+from config import DEFAULT_BLEEP_DELAY_SECONDS  # noqa: E402
+from pipeline import MIN_FLUSH_SECONDS  # noqa: E402
+from processing import (  # noqa: E402
+	SAMPLES_PER_BUFFER,
+	process_audio_buffer,
+	process_audio_buffer_words,
+)
+from swear_detection import SwearDetector  # noqa: E402
+from transcription import TranscriptionEngine, load_transcription_engine  # noqa: E402
+
+# Word length assumed for manifests made before swears had a 'start'
+FALLBACK_WORD_SECONDS = 0.4
+# A labeled swear with less of its audio replaced than this counts as missed
+HIT_COVERAGE = 0.5
+
+
+@dataclass
+class DecodedWindow:
+	"""One window: where it sits in the clip and when it was cleared."""
+
+	first_ns: int
+	start: int
+	samples: int
+	cleared_ns: int
+	swears: list[tuple[float, float]]
+
+
+@dataclass
+class BleepScore:
+	"""Accumulated results for one (model, delay) configuration."""
+
+	swear_samples: int = 0
+	swear_replaced: int = 0
+	other_samples: int = 0
+	other_replaced: int = 0
+	swears: int = 0
+	missed: int = 0
+	late_samples: int = 0
+	start_errors: list[float] = field(default_factory=list)
+	end_errors: list[float] = field(default_factory=list)
+	slack: list[float] = field(default_factory=list)
+	latencies: list[float] = field(default_factory=list)
+
+	def to_dict(self) -> dict:
+		def ms(values: list[float]) -> dict[str, float]:
+			return {
+				'count': len(values),
+				'mean_ms': round(float(np.mean(values)) * 1000, 1) if values else 0.0,
+				'mean_abs_ms': (
+					round(float(np.mean(np.abs(values))) * 1000, 1) if values else 0.0
+				),
+				'max_abs_ms': (
+					round(float(np.max(np.abs(values))) * 1000, 1) if values else 0.0
+				),
+			}
+
+		return {
+			'coverage': (
+				round(self.swear_replaced / self.swear_samples, 4)
+				if self.swear_samples
+				else None
+			),
+			'swears': self.swears,
+			'missed': self.missed,
+			'start_error': ms(self.start_errors),
+			'end_error': ms(self.end_errors),
+			'false_mute_ratio': (
+				round(self.other_replaced / self.other_samples, 4)
+				if self.other_samples
+				else None
+			),
+			'late_seconds': round(self.late_samples / SAMPLE_RATE, 3),
+			'slack_min_seconds': round(min(self.slack, default=0.0), 3),
+			'late_windows': sum(1 for slack in self.slack if slack < 0),
+			'latency': summarize_ms(self.latencies),
+		}
+
+
+def _ns(samples: int) -> int:
+	return samples * 1_000_000_000 // SAMPLE_RATE
+
+
+def decode_clip(
+	audio: np.ndarray, engine: TranscriptionEngine, detector: SwearDetector
+) -> list[DecodedWindow]:
+	"""Window a clip like the segment stage and decode it on a simulated clock."""
+	# The segment stage cuts at the first block boundary past a full window
+	window_samples = -(-SAMPLES_PER_BUFFER // BLOCKSIZE) * BLOCKSIZE
+	windows: list[DecodedWindow] = []
+	busy_until = 0
+	for start in range(0, len(audio), window_samples):
+		end = min(start + window_samples, len(audio))
+		# A short trailing window is dropped, as at the end of a live stream
+		if end - start <= MIN_FLUSH_SECONDS * SAMPLE_RATE:
+			break
+		chunks = [
+			audio[offset : min(offset + BLOCKSIZE, end)]
+			for offset in range(start, end, BLOCKSIZE)
+		]
+		started = time.perf_counter_ns()
+		words = process_audio_buffer_words(chunks, engine, detector.hotwords)
+		elapsed = time.perf_counter_ns() - started
+		matches = detector.locate_words([word.word for word in words])
+		busy_until = max(_ns(end), busy_until) + elapsed
+		windows.append(
+			DecodedWindow(
+				_ns(start + len(chunks[0])),
+				start,
+				end - start,
+				busy_until,
+				[(words[first].start, words[last].end) for _, first, last in matches],
+			)
+		)
+	return windows
+
+
+def play_clip(
+	audio: np.ndarray, windows: list[DecodedWindow], delay: float
+) -> tuple[np.ndarray, DelayLine]:
+	"""Run capture, clears and playback through a DelayLine in time order."""
+	line = DelayLine(delay, 'silence')
+	delay_ns = _ns(line.delay)
+	# (time, order, item): at equal times write, then clear, then read
+	events: list[tuple[int, int, Any]] = []
+	for offset in range(0, len(audio), BLOCKSIZE):
+		block = audio[offset : offset + BLOCKSIZE]
+		events.append((_ns(offset + len(block)), 0, block))
+	events.extend((window.cleared_ns, 1, window) for window in windows)
+	events.extend(
+		(_ns(offset) + delay_ns, 2, None)
+		for offset in range(0, len(audio) + BLOCKSIZE, BLOCKSIZE)
+	)
+	events.sort(key=lambda event: (event[0], event[1]))
+
+	output: list[np.ndarray] = []
+	for now_ns, order, item in events:
+		if order == 0:
+			line.write(now_ns, item)
+		elif order == 1:
+			line.clear(item.first_ns, item.samples, item.swears)
+		else:
+			output.append(line.read(BLOCKSIZE, now_ns))
+	return np.concatenate(output)[: len(audio)], line
+
+
+def score_clip(
+	audio: np.ndarray,
+	played: np.ndarray,
+	windows: list[DecodedWindow],
+	expected: list[dict],
+	delay: float,
+	score: BleepScore,
+	line: DelayLine,
+) -> None:
+	replaced = played != audio
+	labeled = np.zeros(len(audio), dtype=bool)
+	for swear in expected:
+		end = swear['time']
+		start = swear.get('start', end - FALLBACK_WORD_SECONDS)
+		first, last = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+		labeled[first:last] = True
+		hit = replaced[first:last]
+		score.swears += 1
+		score.swear_samples += len(hit)
+		score.swear_replaced += int(np.count_nonzero(hit))
+		if not len(hit) or np.count_nonzero(hit) < HIT_COVERAGE * len(hit):
+			score.missed += 1
+			continue
+		# Edges of the replaced run around the word
+		run_start = first
+		while run_start > 0 and replaced[run_start - 1]:
+			run_start -= 1
+		run_end = last
+		while run_end < len(audio) and replaced[run_end]:
+			run_end += 1
+		score.start_errors.append((run_start - first) / SAMPLE_RATE)
+		score.end_errors.append((run_end - last) / SAMPLE_RATE)
+		window = next(
+			(w for w in windows if w.start <= last - 1 < w.start + w.samples), None
+		)
+		if window is not None:
+			score.latencies.append(window.cleared_ns / 1e9 - end)
+	score.other_samples += int(np.count_nonzero(~labeled))
+	score.other_replaced += int(np.count_nonzero(replaced & ~labeled))
+	score.late_samples += line.late_samples
+	for window in windows:
+		waited = (window.cleared_ns - _ns(window.start)) / 1e9
+		score.slack.append(delay - waited)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--fixtures', type=Path, default=DEFAULT_OUT)
+	parser.add_argument('--models', nargs='+', default=['tiny'])
+	parser.add_argument(
+		'--delays',
+		nargs='+',
+		type=float,
+		default=[DEFAULT_BLEEP_DELAY_SECONDS],
+		help='Bleep delays in seconds',
+	)
+	parser.add_argument('--word-list', type=Path, default=get_default_word_list())
+	parser.add_argument('--out', type=Path, help='Write JSON here instead of stdout')
+	args = parser.parse_args()
+
+	manifest, clips = load_corpus(args.fixtures)
+	detector = SwearDetector(args.word_list)
+
+	runs = []
+	for model in args.models:
+		engine = load_transcription_engine(model)
+		# Warm-up so the first window does not pay one-off initialization
+		process_audio_buffer([clips[0][1][:SAMPLE_RATE]], engine)
+		# Decoding does not depend on the delay, so each clip is decoded once
+		decoded = [decode_clip(audio, engine, detector) for _, audio in clips]
+		for delay in args.delays:
+			score = BleepScore()
+			for (clip, audio), windows in zip(clips, decoded):
+				played, line = play_clip(audio, windows, delay)
+				score_clip(audio, played, windows, clip['swears'], delay, score, line)
+			run = {'model': model, 'delay_seconds': delay, **score.to_dict()}
+			runs.append(run)
+			print(
+				f'{model} delay={delay:g}s: coverage={run["coverage"]} '
+				f'missed={run["missed"]}/{run["swears"]} '
+				f'false_mute={run["false_mute_ratio"]} '
+				f'late={run["late_seconds"]}s '
+				f'slack_min={run["slack_min_seconds"]}s',
+				file=sys.stderr,
+			)
+		engine.unload()
+
+	result = {
+		**git_revision(),
+		'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+		'platform': platform.platform(),
+		'python': platform.python_version(),
+		'corpus': {
+			'path': str(args.fixtures),
+			'clips': len(clips),
+			'swears': sum(len(clip['swears']) for clip, _ in clips),
+			'tts': manifest.get('tts'),
+			'seed': manifest.get('seed'),
+		},
+		'runs': runs,
+	}
+	output = json.dumps(result, indent=2) + '\n'
+	if args.out:
+		args.out.write_text(output)
+	else:
+		sys.stdout.write(output)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,33 @@
+"""Shared helpers for the Vox benchmark scripts."""
+
+import sys
+from pathlib import Path
+
+VOX_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = VOX_DIR / 'src'
+
+
+def add_src_to_path() -> None:
+	"""Make the flat modules under vox/src importable from a benchmark script."""
+	if str(SRC_DIR) not in sys.path:
+		sys.path.insert(0, str(SRC_DIR))
+
+
+def percentile(values: list[float], pct: float) -> float:
+	"""Nearest-rank percentile of a list of values (0.0 if empty)."""
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+	return ordered[index]
+
+
+def summarize_ms(values: list[float]) -> dict[str, float]:
+	"""Summarize durations in seconds as p50/p95/p99/max in milliseconds."""
+	return {
+		'count': len(values),
+		'p50_ms': percentile(values, 50) * 1000,
+		'p95_ms': percentile(values, 95) * 1000,
+		'p99_ms': percentile(values, 99) * 1000,
+		'max_ms': max(values, default=0.0) * 1000,
+	}
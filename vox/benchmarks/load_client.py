@@ -0,0 +1,214 @@
+"""Load generator for SwearAPIClient against the stand-in (or a real) service.
+
+Drives the client from a single detection thread, like the app does, with
+Poisson-distributed detections at a configurable rate, then waits for the
+outbox to drain. Reports generated, delivered, still-pending and lost counts
+plus latency percentiles for the report_swears call itself and, against the
+in-process stand-in, for detection-to-delivery.
+
+Usage:
+	python benchmarks/load_client.py --rate 2 --duration 60 \\
+		--latency-ms 20 --error-rate 0.05 --reset-rate 0.02
+	python benchmarks/load_client.py --url http://localhost:3000 --api-key dev
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from common import add_src_to_path, summarize_ms
+from standin_service import (
+	MAX_REQUESTS_PER_MINUTE,
+	RATE_LIMIT_WINDOW_SECONDS,
+	FaultConfig,
+	StandinService,
+)
+
+add_src_to_path()
+
+from api_client import SwearAPIClient  # noqa: E402
+from outbox import ReportOutbox  # noqa: E402
+
+
+class DeliveryTracker:
+	"""Matches counts accepted by the stand-in to the detections that produced them."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._queued: deque[float] = deque()
+		self.latencies: list[float] = []
+
+	def detected(self, count: int) -> None:
+		now = time.perf_counter()
+		with self._lock:
+			self._queued.extend([now] * count)
+
+	def delivered(self, by: int) -> None:
+		now = time.perf_counter()
+		with self._lock:
+			for _ in range(min(by, len(self._queued))):
+				self.latencies.append(now - self._queued.popleft())
+
+
+def _get_count(client: SwearAPIClient) -> int:
+	"""Read the current count from a remote service."""
+	count = client.fetch_swears()
+	if count is None:
+		raise RuntimeError('GET /api/swears failed')
+	return count
+
+
+def run_load(args: argparse.Namespace) -> dict:
+	tracker = DeliveryTracker()
+	service = None
+	if args.url:
+		base_url, api_key = args.url, args.api_key
+	else:
+		service = StandinService(
+			'load-test',
+			max_requests=args.rate_limit,
+			window_seconds=args.window,
+			faults=FaultConfig(
+				latency_ms=args.latency_ms,
+				jitter_ms=args.jitter_ms,
+				error_rate=args.error_rate,
+				reset_rate=args.reset_rate,
+			),
+			on_update=tracker.delivered,
+		).start()
+		base_url, api_key = service.url, 'load-test'
+
+	outbox_dir = tempfile.TemporaryDirectory()
+	outbox = ReportOutbox(
+		None if args.memory_outbox else Path(outbox_dir.name) / 'outbox.log'
+	)
+	client = SwearAPIClient(
+		base_url,
+		api_key,
+		max_requests=args.rate_limit,
+		window_seconds=args.window,
+		outbox=outbox,
+	)
+
+	start_count = _get_count(client) if service is None else 0
+	call_latencies: list[float] = []
+	generated = 0
+	failed_calls = 0
+	rng = random.Random(args.seed)
+
+	started = time.perf_counter()
+	deadline = started + args.duration
+	next_detection = started
+	while True:
+		next_detection += rng.expovariate(args.rate)
+		if next_detection >= deadline:
+			break
+		time.sleep(max(0.0, next_detection - time.perf_counter()))
+
+		count = args.swears_per_detection
+		tracker.detected(count)
+		t0 = time.perf_counter()
+		if not client.report_swears(count):
+			failed_calls += 1
+		call_latencies.append(time.perf_counter() - t0)
+		generated += count
+
+	drain_deadline = time.perf_counter() + args.drain
+	while client.pending and time.perf_counter() < drain_deadline:
+		time.sleep(0.1)
+	elapsed = time.perf_counter() - started
+
+	pending = client.pending
+	if service is not None:
+		delivered = service.count
+	else:
+		delivered = _get_count(client) - start_count
+	client.close()
+	outbox.close()
+	outbox_dir.cleanup()
+
+	result = {
+		'config': {
+			'rate': args.rate,
+			'duration_s': args.duration,
+			'swears_per_detection': args.swears_per_detection,
+			'rate_limit': args.rate_limit,
+			'window_s': args.window,
+			'latency_ms': args.latency_ms,
+			'jitter_ms': args.jitter_ms,
+			'error_rate': args.error_rate,
+			'reset_rate': args.reset_rate,
+			'durable_outbox': not args.memory_outbox,
+		},
+		'elapsed_s': elapsed,
+		'generated': generated,
+		'delivered': delivered,
+		'pending': pending,
+		'lost': max(0, generated - delivered - pending),
+		'duplicated': max(0, delivered - generated),
+		'failed_calls': failed_calls,
+		'requests': client.stats.requests,
+		'connections_opened': client.stats.connections_opened,
+		'reconnects': client.stats.reconnects,
+		'report_call': summarize_ms(call_latencies),
+	}
+	if service is not None:
+		result['responses'] = {str(k): v for k, v in sorted(service.statuses.items())}
+		result['injected_resets'] = service.resets
+		result['detection_to_delivery'] = summarize_ms(tracker.latencies)
+		service.stop()
+	return result
+
+
+def _print_summary(result: dict) -> None:
+	print(
+		f'generated={result["generated"]} delivered={result["delivered"]} '
+		f'pending={result["pending"]} lost={result["lost"]} '
+		f'duplicated={result["duplicated"]}'
+	)
+	print(
+		f'requests={result["requests"]} connections={result["connections_opened"]} '
+		f'reconnects={result["reconnects"]} failed_calls={result["failed_calls"]}'
+	)
+	for key in ('report_call', 'detection_to_delivery'):
+		if key in result:
+			stats = result[key]
+			print(
+				f'{key}: p50={stats["p50_ms"]:.2f}ms p95={stats["p95_ms"]:.2f}ms '
+				f'p99={stats["p99_ms"]:.2f}ms max={stats["max_ms"]:.2f}ms'
+			)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--url', help='Use a running service instead of the stand-in')
+	parser.add_argument('--api-key', default='', help='API key for --url')
+	parser.add_argument('--rate', type=float, default=2.0, help='Detections per second')
+	parser.add_argument('--duration', type=float, default=30.0, help='Seconds of load')
+	parser.add_argument('--swears-per-detection', type=int, default=1)
+	parser.add_argument('--drain', type=float, default=120.0, help='Max seconds to drain')
+	parser.add_argument('--rate-limit', type=int, default=MAX_REQUESTS_PER_MINUTE)
+	parser.add_argument('--window', type=float, default=RATE_LIMIT_WINDOW_SECONDS)
+	parser.add_argument('--latency-ms', type=float, default=0.0)
+	parser.add_argument('--jitter-ms', type=float, default=0.0)
+	parser.add_argument('--error-rate', type=float, default=0.0)
+	parser.add_argument('--reset-rate', type=float, default=0.0)
+	parser.add_argument('--memory-outbox', action='store_true')
+	parser.add_argument('--seed', type=int, default=None)
+	parser.add_argument('--json', action='store_true', help='Print JSON result')
+	args = parser.parse_args()
+
+	result = run_load(args)
+	if args.json:
+		print(json.dumps(result, indent=2))
+	else:
+		_print_summary(result)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,224 @@
+"""Generate a labeled speech corpus for the replay benchmark.
+
+Each clip is a sequence of scripted phrases rendered with a local
+text-to-speech engine (espeak-ng, espeak or macOS `say`), separated by
+seeded random pauses and mixed with low-level noise. The manifest records
+where each swear word ends ('time'), found by rendering the phrase up to and
+including that word, and where it starts ('start'): the end of the phrase
+rendered up to the word before it.
+
+Nothing is downloaded; generation is deterministic for a given TTS engine
+and seed.
+
+Usage:
+	python benchmarks/make_fixtures.py [--out benchmarks/fixtures] [--clips 6]
+		[--seed 1] [--tts "espeak-ng -v en-us -s 165 -w {out} {text}"]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+import numpy as np
+from common import VOX_DIR
+
+SAMPLE_RATE = 16000
+DEFAULT_OUT = VOX_DIR / 'benchmarks' / 'fixtures'
+MANIFEST_NAME = 'manifest.json'
+
+# TTS command templates, tried in order; {out} is a WAV path, {text} the phrase
+TTS_COMMANDS = (
+	('espeak-ng', 'espeak-ng -v en-us -s 165 -w {out} {text}'),
+	('espeak', 'espeak -v en-us -s 165 -w {out} {text}'),
+	('say', 'say -o {out} --file-format=WAVE --data-format=LEI16@16000 {text}'),
+)
+
+# (phrase, swear words it contains). Clean phrases keep precision honest
+PHRASES = (
+	('well damn it that was close', ['damn']),
+	('I left my keys in the car again', []),
+	('oh shit the build is broken', ['shit']),
+	('can you pass me the salt please', []),
+	('what the fuck is going on here', ['fuck']),
+	('the meeting moved to three thirty', []),
+	('this damn printer never works', ['damn']),
+	('stop being such a bastard about it', ['bastard']),
+	('we should get lunch tomorrow', []),
+	('holy shit that is a lot of snow', ['shit']),
+	('he is a complete asshole', ['asshole']),
+	('the weather is nice today', []),
+	('fuck this fucking traffic', ['fuck', 'fucking']),
+	('I think the dog wants to go out', []),
+	('damn damn damn I missed the bus', ['damn', 'damn', 'damn']),
+	('she sent the report this morning', []),
+)
+
+
+def find_tts() -> str | None:
+	"""The first available TTS command template, if any."""
+	for binary, template in TTS_COMMANDS:
+		if shutil.which(binary):
+			return template
+	return None
+
+
+def read_wav(path: Path) -> np.ndarray:
+	"""Read a PCM WAV as mono float32 at SAMPLE_RATE."""
+	with wave.open(str(path), 'rb') as wav:
+		rate = wav.getframerate()
+		channels = wav.getnchannels()
+		width = wav.getsampwidth()
+		frames = wav.readframes(wav.getnframes())
+	if width != 2:
+		raise ValueError(f'{path}: expected 16-bit PCM, got {width * 8}-bit')
+	audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+	if channels > 1:
+		audio = audio.reshape(-1, channels).mean(axis=1)
+	if rate != SAMPLE_RATE:
+		# Linear interpolation is plenty for TTS speech going to Whisper
+		duration = len(audio) / rate
+		target = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+		audio = np.interp(target, np.arange(len(audio)) / rate, audio).astype(np.float32)
+	return audio
+
+
+def write_wav(path: Path, audio: np.ndarray) -> None:
+	"""Write mono float32 audio as 16-bit PCM WAV at SAMPLE_RATE."""
+	pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+	with wave.open(str(path), 'wb') as wav:
+		wav.setnchannels(1)
+		wav.setsampwidth(2)
+		wav.setframerate(SAMPLE_RATE)
+		wav.writeframes(pcm.tobytes())
+
+
+def _trim_silence(audio: np.ndarray, threshold: float = 0.01) -> np.ndarray:
+	"""Drop leading and trailing near-silence that TTS engines pad with."""
+	loud = np.flatnonzero(np.abs(audio) > threshold)
+	if len(loud) == 0:
+		return audio[:0]
+	return audio[loud[0] : loud[-1] + 1]
+
+
+class Synthesizer:
+	"""Renders text with a TTS command template, caching by text."""
+
+	def __init__(self, template: str, workdir: Path):
+		self.template = template
+		self.workdir = workdir
+		self._cache: dict[str, np.ndarray] = {}
+
+	def render(self, text: str) -> np.ndarray:
+		if text not in self._cache:
+			out = self.workdir / f'{hashlib.sha1(text.encode()).hexdigest()}.wav'
+			command = [
+				part.format(out=out, text=text) for part in shlex.split(self.template)
+			]
+			# {text} may be one argument holding the whole phrase
+			subprocess.run(command, check=True, capture_output=True)
+			self._cache[text] = _trim_silence(read_wav(out))
+		return self._cache[text]
+
+	def swear_times(
+		self, phrase: str, swears: list[str]
+	) -> list[tuple[str, float, float]]:
+		"""Seconds from phrase start to the start and end of each swear in it."""
+		words = phrase.split()
+		remaining = list(swears)
+		times = []
+		for i, word in enumerate(words):
+			if word in remaining:
+				remaining.remove(word)
+				before = ' '.join(words[:i])
+				start = len(self.render(before)) / SAMPLE_RATE if before else 0.0
+				end = len(self.render(' '.join(words[: i + 1]))) / SAMPLE_RATE
+				times.append((word, start, end))
+		return times
+
+
+def build_clip(
+	synth: Synthesizer, phrases: list[tuple[str, list[str]]], rng: random.Random
+) -> tuple[np.ndarray, list[dict], list[str]]:
+	"""Concatenate phrases with pauses. Returns (audio, swears, transcript)."""
+	parts: list[np.ndarray] = []
+	swears: list[dict] = []
+	position = 0
+	for phrase, phrase_swears in phrases:
+		pause = np.zeros(int(rng.uniform(0.4, 1.6) * SAMPLE_RATE), dtype=np.float32)
+		parts.append(pause)
+		position += len(pause)
+		start = position / SAMPLE_RATE
+		for word, word_start, word_end in synth.swear_times(phrase, phrase_swears):
+			swears.append({
+				'word': word,
+				'start': round(start + word_start, 3),
+				'time': round(start + word_end, 3),
+			})
+		speech = synth.render(phrase)
+		parts.append(speech)
+		position += len(speech)
+	parts.append(np.zeros(SAMPLE_RATE, dtype=np.float32))
+	audio = np.concatenate(parts)
+	# Low-level noise so silence is not digitally zero
+	noise = np.random.default_rng(rng.randrange(2**32)).normal(0, 0.002, len(audio))
+	return (audio + noise).astype(np.float32), swears, [p for p, _ in phrases]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--out', type=Path, default=DEFAULT_OUT)
+	parser.add_argument('--clips', type=int, default=6, help='Clips to generate')
+	parser.add_argument('--phrases', type=int, default=6, help='Phrases per clip')
+	parser.add_argument('--seed', type=int, default=1)
+	parser.add_argument(
+		'--tts',
+		default=None,
+		help='TTS command template with {out} and {text} (default: auto-detect)',
+	)
+	args = parser.parse_args()
+
+	template = args.tts or find_tts()
+	if template is None:
+		sys.exit(
+			'No TTS engine found. Install espeak-ng (or espeak), or pass --tts with '
+			'a command template that writes a WAV to {out}.'
+		)
+
+	rng = random.Random(args.seed)
+	args.out.mkdir(parents=True, exist_ok=True)
+	clips = []
+	with tempfile.TemporaryDirectory() as workdir:
+		synth = Synthesizer(template, Path(workdir))
+		for i in range(args.clips):
+			phrases = rng.sample(PHRASES, min(args.phrases, len(PHRASES)))
+			audio, swears, transcript = build_clip(synth, phrases, rng)
+			name = f'clip_{i:02d}.wav'
+			write_wav(args.out / name, audio)
+			clips.append({
+				'file': name,
+				'duration': round(len(audio) / SAMPLE_RATE, 3),
+				'swears': swears,
+				'transcript': transcript,
+			})
+			print(f'{name}: {len(audio) / SAMPLE_RATE:.1f}s, {len(swears)} swear(s)')
+
+	manifest = {
+		'sample_rate': SAMPLE_RATE,
+		'tts': template,
+		'seed': args.seed,
+		'clips': clips,
+	}
+	(args.out / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + '\n')
+	print(f'Wrote {len(clips)} clips to {args.out}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,284 @@
+"""Micro-benchmarks for the per-window hot paths, with stored baselines.
+
+Cases:
+- detect/<words>w/<tokens>t: SwearDetector.detect for word-list sizes and
+  transcript lengths
+- load_word_list/<words>w: building the detector (read + regex compile)
+- normalize/<secs>s: normalize_audio on a 3/10/30 s buffer
+- prep/<secs>s: process_audio_buffer with a no-op engine (concatenate +
+  normalize) on capture-sized chunks
+- gate/<secs>s: NoiseFloorTracker.is_silent on the same chunks (the cost a
+  silent window pays instead of prep + decode)
+- callback/<ch>ch: AudioCapture._audio_callback for one block
+- .../int16: the normalize, prep, gate and callback cases with int16 capture
+  (--sample-format int16), where prep includes the one float32 conversion
+
+Each case is timed with timeit (autoranged loop count, best of --repeat)
+and reported as microseconds per call. The best-of figure is the least
+noisy estimate of the code's cost.
+
+Usage:
+	python benchmarks/micro.py              # run and print
+	python benchmarks/micro.py --save       # update the stored baseline
+	python benchmarks/micro.py --compare    # diff against it, exit 1 on regression
+	python benchmarks/micro.py --filter detect --compare baselines/other.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import re
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from queue import Queue
+
+from common import VOX_DIR, add_src_to_path
+
+add_src_to_path()
+
+import numpy as np  # noqa: E402
+
+from audio import BLOCKSIZE, SAMPLE_RATE, AudioCapture  # noqa: E402
+from cli import get_default_word_list  # noqa: E402
+from processing import (  # noqa: E402
+	NoiseFloorTracker,
+	normalize_audio,
+	process_audio_buffer,
+)
+from swear_detection import SwearDetector  # noqa: E402
+
+DEFAULT_BASELINE = VOX_DIR / 'benchmarks' / 'baselines' / 'micro.json'
+# A case is flagged when it is this much slower than its baseline
+DEFAULT_THRESHOLD_PCT = 15.0
+
+WORD_LIST_SIZES = (17, 200, 2000)
+TRANSCRIPT_TOKENS = (10, 100, 1000)
+BUFFER_SECONDS = (3, 10, 30)
+CALLBACK_CHANNELS = (1, 2)
+
+FILLER = (
+	'the a and to of in is it that was for on with as at this be have but not '
+	'they you we what so if about all just like can there out up one time'
+).split()
+
+
+class _NullEngine:
+	"""Stands in for TranscriptionEngine so prep is measured on its own."""
+
+	def transcribe(self, audio: np.ndarray, hotwords: str | None = None) -> str:
+		return ''
+
+
+def _word_list(path: Path, size: int) -> Path:
+	"""Write a word list of `size` entries: the defaults plus made-up words."""
+	base = SwearDetector(get_default_word_list()).words
+	words = sorted(base) + [f'zorbl{i:05d}' for i in range(max(0, size - len(base)))]
+	path.write_text('\n'.join(words[:size]) + '\n')
+	return path
+
+
+def _transcript(tokens: int, swears: list[str], rng: random.Random) -> str:
+	"""Mostly filler with ~2% swears, like real speech."""
+	return ' '.join(
+		rng.choice(swears) if rng.random() < 0.02 else rng.choice(FILLER)
+		for _ in range(tokens)
+	)
+
+
+def _chunks(seconds: int, rng: np.random.Generator) -> list[np.ndarray]:
+	count = -(-seconds * SAMPLE_RATE // BLOCKSIZE)
+	return [
+		(rng.standard_normal((BLOCKSIZE, 1)) * 0.1).astype(np.float32)
+		for _ in range(count)
+	]
+
+
+def _int16(audio: np.ndarray) -> np.ndarray:
+	"""The same samples as an int16 capture would deliver them."""
+	return (audio * 32767).astype(np.int16)
+
+
+# (function to time, setup run before each repeat)
+Case = tuple[Callable[[], object], Callable[[], None]]
+
+
+def _load_uncached(path: Path) -> SwearDetector:
+	# re caches compiled patterns; purge so every call pays the compile
+	re.purge()
+	return SwearDetector(path)
+
+
+def build_cases(workdir: Path) -> dict[str, Case]:
+	"""Map case name -> Case."""
+	rng = random.Random(0)
+	np_rng = np.random.default_rng(0)
+	noop = lambda: None  # noqa: E731
+	cases: dict[str, Case] = {}
+
+	swears = sorted(SwearDetector(get_default_word_list()).words)
+	for size in WORD_LIST_SIZES:
+		path = _word_list(workdir / f'words_{size}.txt', size)
+		detector = SwearDetector(path)
+		for tokens in TRANSCRIPT_TOKENS:
+			text = _transcript(tokens, swears, rng)
+			cases[f'detect/{size}w/{tokens}t'] = (
+				lambda d=detector, t=text: d.detect(t),
+				noop,
+			)
+		cases[f'load_word_list/{size}w'] = (lambda p=path: _load_uncached(p), noop)
+
+	engine = _NullEngine()
+	for seconds in BUFFER_SECONDS:
+		float_chunks = _chunks(seconds, np_rng)
+		for suffix, chunks in (
+			('', float_chunks),
+			('/int16', [_int16(chunk) for chunk in float_chunks]),
+		):
+			audio = np.concatenate(chunks)
+			cases[f'normalize/{seconds}s{suffix}'] = (
+				lambda a=audio: normalize_audio(a),
+				noop,
+			)
+			cases[f'prep/{seconds}s{suffix}'] = (
+				lambda c=chunks: process_audio_buffer(c, engine),  # type: ignore[arg-type]
+				noop,
+			)
+			cases[f'gate/{seconds}s{suffix}'] = (
+				lambda c=chunks, g=NoiseFloorTracker(): g.is_silent(c),
+				noop,
+			)
+
+	for channels in CALLBACK_CHANNELS:
+		block = (np_rng.standard_normal((BLOCKSIZE, channels)) * 0.1).astype(np.float32)
+		for suffix, dtype, data in (
+			('', 'float32', block),
+			('/int16', 'int16', _int16(block)),
+		):
+			queue: Queue = Queue()
+			capture = AudioCapture(queue, on_level=lambda level: None, dtype=dtype)
+			capture._num_channels = channels
+			capture._channel = channels - 1
+			cases[f'callback/{channels}ch{suffix}'] = (
+				lambda c=capture, b=data: c._audio_callback(b, BLOCKSIZE, {}, 0),  # type: ignore[arg-type]
+				lambda q=queue: q.queue.clear(),
+			)
+
+	return cases
+
+
+def time_case(
+	func: Callable[[], object], setup: Callable[[], None], repeat: int
+) -> dict[str, float]:
+	"""Best and median microseconds per call over `repeat` timed loops."""
+	timer = timeit.Timer(func)
+	setup()
+	number, _ = timer.autorange()
+	per_call = []
+	for _ in range(repeat):
+		setup()
+		per_call.append(timer.timeit(number) / number * 1e6)
+	per_call.sort()
+	return {
+		'best_us': round(per_call[0], 3),
+		'median_us': round(per_call[len(per_call) // 2], 3),
+		'loops': number,
+	}
+
+
+def compare(
+	results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+	"""Print a comparison table; returns the names of regressed cases."""
+	regressed = []
+	print(f'{"case":<28} {"baseline":>12} {"now":>12} {"change":>9}')
+	for name, now in results.items():
+		before = baseline.get(name)
+		if before is None:
+			print(f'{name:<28} {"-":>12} {now["best_us"]:>10.2f}us {"new":>9}')
+			continue
+		change = (now['best_us'] / before['best_us'] - 1) * 100
+		flag = ''
+		if change > threshold:
+			flag = '  REGRESSION'
+			regressed.append(name)
+		print(
+			f'{name:<28} {before["best_us"]:>10.2f}us {now["best_us"]:>10.2f}us '
+			f'{change:>+8.1f}%{flag}'
+		)
+	return regressed
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--filter', default='', help='Only cases containing this')
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument(
+		'--save',
+		nargs='?',
+		const=DEFAULT_BASELINE,
+		type=Path,
+		help='Write results as the baseline (default: baselines/micro.json)',
+	)
+	parser.add_argument(
+		'--compare',
+		nargs='?',
+		const=DEFAULT_BASELINE,
+		type=Path,
+		help='Compare against a baseline and exit 1 on regression',
+	)
+	parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD_PCT)
+	parser.add_argument('--json', action='store_true', help='Print JSON result')
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as workdir:
+		cases = build_cases(Path(workdir))
+		results = {}
+		for name, (func, setup) in cases.items():
+			if args.filter in name:
+				results[name] = time_case(func, setup, args.repeat)
+				if not args.json and not args.compare:
+					best = results[name]['best_us']
+					print(f'{name:<28} {best:>10.2f}us', file=sys.stderr)
+
+	document = {
+		'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+		'platform': platform.platform(),
+		'machine': platform.machine(),
+		'python': platform.python_version(),
+		'numpy': np.__version__,
+		'results': results,
+	}
+	if args.json:
+		print(json.dumps(document, indent=2))
+
+	regressed: list[str] = []
+	if args.compare:
+		baseline = json.loads(args.compare.read_text())
+		print(
+			f'Baseline: {args.compare} '
+			f'({baseline["platform"]}, {baseline["timestamp"]})'
+		)
+		regressed = compare(results, baseline['results'], args.threshold)
+
+	if args.save:
+		saved = {}
+		if args.save.exists():
+			# Keep cases outside --filter from the previous baseline
+			saved = json.loads(args.save.read_text())['results']
+		document['results'] = {**saved, **results}
+		args.save.parent.mkdir(parents=True, exist_ok=True)
+		args.save.write_text(json.dumps(document, indent=2) + '\n')
+		print(f'Saved baseline to {args.save}', file=sys.stderr)
+
+	if regressed:
+		print(f'{len(regressed)} case(s) regressed more than {args.threshold:.0f}%')
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
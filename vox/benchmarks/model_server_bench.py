@@ -0,0 +1,221 @@
+"""Aggregate throughput and memory of N vox clients: shared model server vs
+one model per process.
+
+For each client count, two setups transcribe the same windows:
+- shared: one src/model_server.py process; each client is a process using
+  RemoteTranscriptionEngine
+- local: each client process loads its own TranscriptionEngine, as N
+  separate vox instances do today
+
+All clients load first, then start together and send --windows windows
+back to back. Reported per setup:
+- throughput: audio seconds transcribed per wall-clock second, all clients
+- latency: per-window request time (queueing included for the server)
+- spread: slowest client's wall time / fastest's (1.0 = perfectly fair)
+- rss: resident memory of every process involved (server + clients)
+
+Audio comes from the replay corpus when it exists, else seeded noise (which
+Whisper's VAD mostly skips, so use the corpus for decode-bound numbers).
+
+Usage:
+	python benchmarks/model_server_bench.py [--model tiny] [--clients 1 2 4]
+		[--windows 20] [--workers 1] [--out results.json]
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from common import SRC_DIR, add_src_to_path, summarize_ms
+from make_fixtures import DEFAULT_OUT, MANIFEST_NAME, read_wav
+
+add_src_to_path()
+
+import numpy as np  # noqa: E402
+import psutil  # noqa: E402
+
+from processing import BUFFER_DURATION_SECONDS  # noqa: E402
+from transcription import load_transcription_engine  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+def load_windows(fixtures: Path, count: int, seconds: float) -> list[np.ndarray]:
+	"""`count` windows of `seconds`, cut from the corpus or seeded noise."""
+	size = int(seconds * SAMPLE_RATE)
+	manifest = fixtures / MANIFEST_NAME
+	if manifest.exists():
+		clips = json.loads(manifest.read_text())['clips']
+		audio = np.concatenate([read_wav(fixtures / clip['file']) for clip in clips])
+	else:
+		rng = np.random.default_rng(0)
+		audio = (rng.standard_normal(size * count) * 0.05).astype(np.float32)
+	# Wrap around a short corpus
+	repeats = -(-size * count // len(audio))
+	audio = np.tile(audio, repeats)
+	return [audio[i * size : (i + 1) * size] for i in range(count)]
+
+
+def run_client(
+	model: str,
+	socket_path: str | None,
+	windows: list[np.ndarray],
+	barrier: 'mp.synchronize.Barrier',
+	results: 'mp.Queue',
+) -> None:
+	"""One client process: load, wait for the others, transcribe all windows."""
+	engine = load_transcription_engine(
+		model, Path(socket_path) if socket_path else None
+	)
+	# One-off initialization should not count against the first window
+	engine.transcribe(windows[0][:SAMPLE_RATE])
+	barrier.wait()
+	started = time.monotonic()
+	latencies = []
+	for window in windows:
+		begin = time.perf_counter()
+		engine.transcribe(window)
+		latencies.append(time.perf_counter() - begin)
+	finished = time.monotonic()
+	results.put({
+		'started': started,
+		'finished': finished,
+		'latencies': latencies,
+		'rss_bytes': psutil.Process().memory_info().rss,
+	})
+	engine.unload()
+
+
+def start_server(model: str, socket_path: Path, workers: int) -> subprocess.Popen:
+	server = subprocess.Popen(
+		[
+			sys.executable,
+			str(SRC_DIR / 'model_server.py'),
+			'--socket',
+			str(socket_path),
+			'--preload',
+			model,
+			'--workers',
+			str(workers),
+		],
+		stdout=subprocess.PIPE,
+		text=True,
+	)
+	# The server prints its listening line once the preloaded model is ready
+	assert server.stdout is not None
+	for line in server.stdout:
+		if 'listening' in line:
+			return server
+	raise RuntimeError(f'Model server exited with {server.wait()}')
+
+
+def run_setup(
+	model: str,
+	clients: int,
+	windows: list[np.ndarray],
+	socket_path: Path | None,
+) -> dict:
+	"""Run `clients` client processes to completion and summarize them."""
+	ctx = mp.get_context('spawn')
+	barrier = ctx.Barrier(clients)
+	results = ctx.Queue()
+	procs = [
+		ctx.Process(
+			target=run_client,
+			args=(
+				model,
+				str(socket_path) if socket_path else None,
+				windows,
+				barrier,
+				results,
+			),
+		)
+		for _ in range(clients)
+	]
+	for proc in procs:
+		proc.start()
+	runs = [results.get() for _ in procs]
+	for proc in procs:
+		proc.join()
+
+	started = min(run['started'] for run in runs)
+	finished = max(run['finished'] for run in runs)
+	walls = [run['finished'] - run['started'] for run in runs]
+	audio_seconds = clients * sum(len(w) for w in windows) / SAMPLE_RATE
+	return {
+		'wall_seconds': round(finished - started, 3),
+		'throughput_x_realtime': round(audio_seconds / (finished - started), 3),
+		'windows_per_second': round(clients * len(windows) / (finished - started), 3),
+		'latency': summarize_ms([t for run in runs for t in run['latencies']]),
+		'spread': round(max(walls) / min(walls), 3),
+		'client_rss_bytes': sum(run['rss_bytes'] for run in runs),
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--model', default='tiny')
+	parser.add_argument('--clients', nargs='+', type=int, default=[1, 2, 4])
+	parser.add_argument('--windows', type=int, default=20, help='Windows per client')
+	parser.add_argument('--window-seconds', type=float, default=BUFFER_DURATION_SECONDS)
+	parser.add_argument('--workers', type=int, default=1, help='Server workers')
+	parser.add_argument('--fixtures', type=Path, default=DEFAULT_OUT)
+	parser.add_argument('--out', type=Path, help='Write JSON here instead of stdout')
+	args = parser.parse_args()
+
+	windows = load_windows(args.fixtures, args.windows, args.window_seconds)
+	runs = []
+	with tempfile.TemporaryDirectory() as workdir:
+		socket_path = Path(workdir) / 'model.sock'
+		for clients in args.clients:
+			server = start_server(args.model, socket_path, args.workers)
+			try:
+				shared = run_setup(args.model, clients, windows, socket_path)
+				server_rss = psutil.Process(server.pid).memory_info().rss
+			finally:
+				server.terminate()
+				server.wait()
+			shared['server_rss_bytes'] = server_rss
+			shared['rss_bytes'] = server_rss + shared['client_rss_bytes']
+
+			local = run_setup(args.model, clients, windows, None)
+			local['rss_bytes'] = local['client_rss_bytes']
+
+			runs.append({'clients': clients, 'shared': shared, 'local': local})
+			for name, run in (('shared', shared), ('local', local)):
+				print(
+					f'{clients} client(s) {name:>6}: '
+					f'{run["throughput_x_realtime"]:.2f}x realtime, '
+					f'p95 {run["latency"]["p95_ms"]:.0f}ms, '
+					f'spread {run["spread"]:.2f}, '
+					f'RSS {run["rss_bytes"] / 2**20:.0f} MiB',
+					file=sys.stderr,
+				)
+
+	result = {
+		'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+		'platform': platform.platform(),
+		'cpus': psutil.cpu_count(),
+		'model': args.model,
+		'workers': args.workers,
+		'windows_per_client': args.windows,
+		'window_seconds': args.window_seconds,
+		'audio': 'corpus' if (args.fixtures / MANIFEST_NAME).exists() else 'noise',
+		'runs': runs,
+	}
+	output = json.dumps(result, indent=2) + '\n'
+	if args.out:
+		args.out.write_text(output)
+	else:
+		sys.stdout.write(output)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,291 @@
+"""Replay a labeled corpus through the transcription pipeline and score it.
+
+Each clip is cut into capture-sized blocks and windowed the way the pipeline's
+segment stage does it. Then process_audio_buffer, TranscriptionEngine
+and SwearDetector run on each window. A simulated clock stands in for
+real-time capture:
+- A window becomes available when its last sample would have been captured.
+- A window starts once it is available and the previous window is done.
+- Detections happen when its processing finishes.
+The replay runs as fast as the model allows while reporting what a live
+microphone would have seen.
+
+Scores per model size and window length:
+- rtf: processing time / audio time
+- latency: end of the spoken swear word -> detection, for matched swears
+- precision / recall: detected words vs the manifest. A detection
+  matches an expected swear with the same word whose end time falls inside
+  the window, with MATCH_TOLERANCE_SECONDS of slack for words that
+  straddle a window boundary.
+
+Output is JSON tagged with the git commit so runs can be diffed.
+
+Usage:
+	python benchmarks/make_fixtures.py
+	python benchmarks/replay.py [--fixtures benchmarks/fixtures]
+		[--models tiny base] [--windows 3.0 2.0] [--out results.json]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from common import VOX_DIR, add_src_to_path, summarize_ms
+from make_fixtures import DEFAULT_OUT, MANIFEST_NAME, read_wav
+
+add_src_to_path()
+
+import numpy as np  # noqa: E402
+
+from audio import BLOCKSIZE, SAMPLE_RATE  # noqa: E402
+from cli import get_default_word_list  # noqa: E402
+from processing import BUFFER_DURATION_SECONDS, process_audio_buffer  # noqa: E402
+from swear_detection import SwearDetector  # noqa: E402
+from transcription import TranscriptionEngine, load_transcription_engine  # noqa: E402
+
+MATCH_TOLERANCE_SECONDS = 0.5
+# Same rule as the segment stage's final flush
+MIN_FINAL_WINDOW_SECONDS = 0.5
+
+
+@dataclass
+class Window:
+	"""One transcribed window on the simulated clock (seconds into the clip)."""
+
+	start: float
+	end: float
+	done: float
+	process_seconds: float
+	detected: list[str]
+
+
+@dataclass
+class RunScore:
+	"""Accumulated results for one (model, window length) configuration."""
+
+	audio_seconds: float = 0.0
+	process_seconds: float = 0.0
+	windows: int = 0
+	true_positives: int = 0
+	false_positives: int = 0
+	false_negatives: int = 0
+	latencies: list[float] = field(default_factory=list)
+	clips: list[dict] = field(default_factory=list)
+
+	def to_dict(self) -> dict:
+		detected = self.true_positives + self.false_positives
+		expected = self.true_positives + self.false_negatives
+		return {
+			'audio_seconds': round(self.audio_seconds, 3),
+			'process_seconds': round(self.process_seconds, 3),
+			'rtf': (
+				round(self.process_seconds / self.audio_seconds, 4)
+				if self.audio_seconds
+				else None
+			),
+			'windows': self.windows,
+			'precision': round(self.true_positives / detected, 4) if detected else None,
+			'recall': round(self.true_positives / expected, 4) if expected else None,
+			'true_positives': self.true_positives,
+			'false_positives': self.false_positives,
+			'false_negatives': self.false_negatives,
+			'latency': summarize_ms(self.latencies),
+			'clips': self.clips,
+		}
+
+
+def replay_clip(
+	audio: np.ndarray,
+	engine: TranscriptionEngine,
+	detector: SwearDetector,
+	window_seconds: float,
+) -> list[Window]:
+	"""Window a clip like the live loop and transcribe it on a simulated clock."""
+	window_samples = int(window_seconds * SAMPLE_RATE)
+	windows: list[Window] = []
+	buffer: list[np.ndarray] = []
+	buffered = 0
+	window_start = 0
+	busy_until = 0.0
+
+	def transcribe(end_sample: int) -> None:
+		nonlocal busy_until
+		started = time.perf_counter()
+		text = process_audio_buffer(buffer, engine, hotwords=detector.hotwords)
+		_, detected = detector.detect(text)
+		elapsed = time.perf_counter() - started
+		end = end_sample / SAMPLE_RATE
+		begin = max(end, busy_until)
+		busy_until = begin + elapsed
+		windows.append(
+			Window(window_start / SAMPLE_RATE, end, busy_until, elapsed, detected)
+		)
+
+	for offset in range(0, len(audio), BLOCKSIZE):
+		block = audio[offset : offset + BLOCKSIZE]
+		buffer.append(block)
+		buffered += len(block)
+		if buffered >= window_samples:
+			transcribe(offset + len(block))
+			window_start = offset + len(block)
+			buffer = []
+			buffered = 0
+
+	if buffered > SAMPLE_RATE * MIN_FINAL_WINDOW_SECONDS:
+		transcribe(len(audio))
+	return windows
+
+
+def score_clip(windows: list[Window], expected: list[dict], score: RunScore) -> dict:
+	"""Match detections to expected swears; returns the clip's counts."""
+	unmatched = sorted(expected, key=lambda s: s['time'])
+	tp = fp = 0
+	for window in windows:
+		for word in window.detected:
+			match = next(
+				(
+					swear
+					for swear in unmatched
+					if swear['word'] == word
+					and window.start - MATCH_TOLERANCE_SECONDS
+					<= swear['time']
+					< window.end + MATCH_TOLERANCE_SECONDS
+				),
+				None,
+			)
+			if match is None:
+				fp += 1
+				continue
+			unmatched.remove(match)
+			tp += 1
+			score.latencies.append(window.done - match['time'])
+	fn = len(unmatched)
+	score.true_positives += tp
+	score.false_positives += fp
+	score.false_negatives += fn
+	return {'true_positives': tp, 'false_positives': fp, 'false_negatives': fn}
+
+
+def run_config(
+	clips: list[tuple[dict, np.ndarray]],
+	engine: TranscriptionEngine,
+	detector: SwearDetector,
+	window_seconds: float,
+) -> RunScore:
+	score = RunScore()
+	for clip, audio in clips:
+		windows = replay_clip(audio, engine, detector, window_seconds)
+		counts = score_clip(windows, clip['swears'], score)
+		processed = sum(w.process_seconds for w in windows)
+		score.audio_seconds += len(audio) / SAMPLE_RATE
+		score.process_seconds += processed
+		score.windows += len(windows)
+		score.clips.append({'file': clip['file'], **counts})
+	return score
+
+
+def git_revision() -> dict:
+	"""Commit hash and dirty flag of the working tree, if available."""
+	try:
+		commit = subprocess.run(
+			['git', 'rev-parse', 'HEAD'],
+			cwd=VOX_DIR,
+			capture_output=True,
+			text=True,
+			check=True,
+		).stdout.strip()
+		status = subprocess.run(
+			['git', 'status', '--porcelain', '--untracked-files=no'],
+			cwd=VOX_DIR,
+			capture_output=True,
+			text=True,
+			check=True,
+		).stdout
+	except (OSError, subprocess.CalledProcessError):
+		return {'commit': None, 'dirty': None}
+	return {'commit': commit, 'dirty': bool(status.strip())}
+
+
+def load_corpus(fixtures: Path) -> tuple[dict, list[tuple[dict, np.ndarray]]]:
+	manifest_path = fixtures / MANIFEST_NAME
+	if not manifest_path.exists():
+		sys.exit(
+			f'No corpus at {fixtures}. Run benchmarks/make_fixtures.py first, '
+			f'or point --fixtures at a directory with {MANIFEST_NAME}.'
+		)
+	manifest = json.loads(manifest_path.read_text())
+	clips = [(clip, read_wav(fixtures / clip['file'])) for clip in manifest['clips']]
+	return manifest, clips
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--fixtures', type=Path, default=DEFAULT_OUT)
+	parser.add_argument('--models', nargs='+', default=['tiny'])
+	parser.add_argument(
+		'--windows',
+		nargs='+',
+		type=float,
+		default=[BUFFER_DURATION_SECONDS],
+		help='Window lengths in seconds',
+	)
+	parser.add_argument('--word-list', type=Path, default=get_default_word_list())
+	parser.add_argument('--out', type=Path, help='Write JSON here instead of stdout')
+	args = parser.parse_args()
+
+	manifest, clips = load_corpus(args.fixtures)
+	detector = SwearDetector(args.word_list)
+
+	runs = []
+	for model in args.models:
+		started = time.perf_counter()
+		engine = load_transcription_engine(model)
+		load_seconds = time.perf_counter() - started
+		# Warm-up so the first window does not pay one-off initialization
+		process_audio_buffer([clips[0][1][:SAMPLE_RATE]], engine)
+		for window_seconds in args.windows:
+			score = run_config(clips, engine, detector, window_seconds)
+			run = {
+				'model': model,
+				'window_seconds': window_seconds,
+				'load_seconds': round(load_seconds, 3),
+				**score.to_dict(),
+			}
+			runs.append(run)
+			print(
+				f'{model} window={window_seconds}s: rtf={run["rtf"]} '
+				f'precision={run["precision"]} recall={run["recall"]} '
+				f'latency p50={run["latency"]["p50_ms"]:.0f}ms',
+				file=sys.stderr,
+			)
+		engine.unload()
+
+	result = {
+		**git_revision(),
+		'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+		'platform': platform.platform(),
+		'python': platform.python_version(),
+		'corpus': {
+			'path': str(args.fixtures),
+			'clips': len(clips),
+			'swears': sum(len(clip['swears']) for clip, _ in clips),
+			'tts': manifest.get('tts'),
+			'seed': manifest.get('seed'),
+		},
+		'runs': runs,
+	}
+	output = json.dumps(result, indent=2) + '\n'
+	if args.out:
+		args.out.write_text(output)
+	else:
+		sys.stdout.write(output)
+
+
+if __name__ == '__main__':
+	main()
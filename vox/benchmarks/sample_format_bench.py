@@ -0,0 +1,142 @@
+"""Memory and conversion cost of float32 vs int16 capture (--sample-format).
+
+For each window length and channel count, one window of blocks is pushed
+through AudioCapture._audio_callback (as sounddevice would deliver them) and
+then process_audio_buffer with a no-op engine. Reported per format:
+- queued_bytes: audio held in the queue/buffer for one window
+- callback_us: callback time per block (channel extract + copy + level)
+- prep_ms: concatenate + normalize (+ the one int16 -> float32 conversion)
+- prep_peak_bytes: peak memory allocated during prep (tracemalloc)
+- model_input: dtype handed to the engine (float32 for both)
+
+Timings are the best of --repeat runs.
+
+Usage:
+	python benchmarks/sample_format_bench.py [--seconds 3 10 30]
+		[--channels 1 2] [--repeat 5] [--out results.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from queue import Queue
+
+from common import add_src_to_path
+
+add_src_to_path()
+
+import numpy as np  # noqa: E402
+
+from audio import BLOCKSIZE, SAMPLE_FORMATS, SAMPLE_RATE, AudioCapture  # noqa: E402
+from processing import process_audio_buffer  # noqa: E402
+
+
+class _CaptureEngine:
+	"""No-op engine that remembers what it was given."""
+
+	model_input: np.ndarray | None = None
+
+	def transcribe(self, audio: np.ndarray, hotwords: str | None = None) -> str:
+		self.model_input = audio
+		return ''
+
+
+def capture_window(
+	blocks: list[np.ndarray], channels: int, dtype: str
+) -> tuple[list[np.ndarray], float]:
+	"""Run blocks through the audio callback; returns (chunks, best us/block)."""
+	queue: Queue = Queue()
+	capture = AudioCapture(queue, on_level=lambda level: None, dtype=dtype)
+	capture._num_channels = channels
+	capture._channel = channels - 1
+	started = time.perf_counter()
+	for block in blocks:
+		capture._audio_callback(block, BLOCKSIZE, {}, 0)  # type: ignore[arg-type]
+	per_block = (time.perf_counter() - started) / len(blocks) * 1e6
+	return [chunk for _, chunk in queue.queue], per_block
+
+
+def measure(seconds: int, channels: int, dtype: str, repeat: int) -> dict:
+	rng = np.random.default_rng(0)
+	count = -(-seconds * SAMPLE_RATE // BLOCKSIZE)
+	blocks = [
+		(rng.standard_normal((BLOCKSIZE, channels)) * 0.1).astype(np.float32)
+		for _ in range(count)
+	]
+	if dtype == 'int16':
+		blocks = [(block * 32767).astype(np.int16) for block in blocks]
+
+	callback_us = []
+	for _ in range(repeat):
+		chunks, per_block = capture_window(blocks, channels, dtype)
+		callback_us.append(per_block)
+
+	engine = _CaptureEngine()
+	prep_seconds = []
+	for _ in range(repeat):
+		started = time.perf_counter()
+		process_audio_buffer(chunks, engine)  # type: ignore[arg-type]
+		prep_seconds.append(time.perf_counter() - started)
+
+	tracemalloc.start()
+	process_audio_buffer(chunks, engine)  # type: ignore[arg-type]
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	assert engine.model_input is not None
+	return {
+		'queued_bytes': sum(chunk.nbytes for chunk in chunks),
+		'callback_us': round(min(callback_us), 3),
+		'prep_ms': round(min(prep_seconds) * 1000, 3),
+		'prep_peak_bytes': peak,
+		'model_input': str(engine.model_input.dtype),
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--seconds', nargs='+', type=int, default=[3, 10, 30])
+	parser.add_argument('--channels', nargs='+', type=int, default=[1, 2])
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument('--out', type=Path, help='Write JSON here instead of stdout')
+	args = parser.parse_args()
+
+	runs = []
+	for seconds in args.seconds:
+		for channels in args.channels:
+			run: dict = {'seconds': seconds, 'channels': channels}
+			for dtype in SAMPLE_FORMATS:
+				run[dtype] = measure(seconds, channels, dtype, args.repeat)
+			runs.append(run)
+			f32, i16 = run['float32'], run['int16']
+			print(
+				f'{seconds:>3}s {channels}ch: '
+				f'queued {f32["queued_bytes"] / 1024:.0f} -> '
+				f'{i16["queued_bytes"] / 1024:.0f} KiB, '
+				f'callback {f32["callback_us"]:.1f} -> {i16["callback_us"]:.1f} us, '
+				f'prep {f32["prep_ms"]:.2f} -> {i16["prep_ms"]:.2f} ms, '
+				f'prep peak {f32["prep_peak_bytes"] / 1024:.0f} -> '
+				f'{i16["prep_peak_bytes"] / 1024:.0f} KiB',
+				file=sys.stderr,
+			)
+
+	result = {
+		'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+		'platform': platform.platform(),
+		'numpy': np.__version__,
+		'runs': runs,
+	}
+	output = json.dumps(result, indent=2) + '\n'
+	if args.out:
+		args.out.write_text(output)
+	else:
+		sys.stdout.write(output)
+
+
+if __name__ == '__main__':
+	main()
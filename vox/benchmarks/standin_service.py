@@ -0,0 +1,267 @@
+"""Pure-Python stand-in for the swear-jar service's /api/swears API.
+
+Mirrors the behavior of service/src/router (API key check, `by` and
+`pricePerSwear` validation, count floor of zero, per-IP sliding-window rate
+limit) so SwearAPIClient can be exercised without running the Bun service.
+Latency, server errors and connection resets can be injected.
+
+Usage:
+	python benchmarks/standin_service.py --port 3000 --api-key dev \\
+		--latency-ms 20 --error-rate 0.05 --reset-rate 0.02
+"""
+
+import argparse
+import json
+import math
+import random
+import socket
+import struct
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+
+# Mirrors MAX_REQUESTS_PER_MINUTE in service/src/utils/rateLimits.ts
+MAX_REQUESTS_PER_MINUTE = 30
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+
+
+@dataclass
+class FaultConfig:
+	"""Faults injected into every API request."""
+
+	latency_ms: float = 0.0
+	jitter_ms: float = 0.0
+	error_rate: float = 0.0
+	reset_rate: float = 0.0
+
+
+class StandinService:
+	"""In-process HTTP server implementing GET/POST /api/swears."""
+
+	def __init__(
+		self,
+		api_key: str,
+		host: str = '127.0.0.1',
+		port: int = 0,
+		max_requests: int = MAX_REQUESTS_PER_MINUTE,
+		window_seconds: float = RATE_LIMIT_WINDOW_SECONDS,
+		faults: FaultConfig | None = None,
+		on_update: Callable[[int], None] | None = None,
+	):
+		"""Create the server (not yet serving).
+
+		Args:
+			api_key: Key required in the API-KEY header or apiKey query param.
+			host: Interface to bind.
+			port: Port to bind (0 picks a free port).
+			max_requests: Requests allowed per IP per rate limit window.
+			window_seconds: Length of the rate limit window in seconds.
+			faults: Latency, errors and resets to inject.
+			on_update: Called with `by` after each accepted POST.
+		"""
+		self.api_key = api_key
+		self.max_requests = max_requests
+		self.window_seconds = window_seconds
+		self.faults = faults or FaultConfig()
+		self.on_update = on_update
+		self.count = 0
+		self.statuses: Counter[int] = Counter()
+		self.resets = 0
+		self._lock = threading.Lock()
+		self._timestamps: dict[str, deque[float]] = {}
+		self._thread: threading.Thread | None = None
+		self._server = ThreadingHTTPServer((host, port), self._make_handler())
+		self._server.daemon_threads = True
+
+	@property
+	def url(self) -> str:
+		"""Base URL clients should use."""
+		host, port = self._server.server_address[:2]
+		return f'http://{host}:{port}'
+
+	def start(self) -> 'StandinService':
+		"""Serve requests on a background thread."""
+		self._thread = threading.Thread(
+			target=self._server.serve_forever, name='standin-service', daemon=True
+		)
+		self._thread.start()
+		return self
+
+	def serve_forever(self) -> None:
+		"""Serve requests on the calling thread until interrupted."""
+		try:
+			self._server.serve_forever()
+		finally:
+			self._server.server_close()
+
+	def stop(self) -> None:
+		"""Stop serving and release the port."""
+		self._server.shutdown()
+		self._server.server_close()
+
+	def check_rate_limit(self, ip: str) -> bool:
+		"""Sliding-window limit, same semantics as checkApiRateLimit."""
+		now = time.monotonic()
+		with self._lock:
+			timestamps = self._timestamps.setdefault(ip, deque())
+			while timestamps and timestamps[0] <= now - self.window_seconds:
+				timestamps.popleft()
+			if len(timestamps) >= self.max_requests:
+				return False
+			timestamps.append(now)
+			return True
+
+	def update(self, by: int) -> bool:
+		"""Apply a count change, refusing to go below zero like updateSwears."""
+		with self._lock:
+			if self.count + by < 0:
+				return False
+			self.count += by
+		if self.on_update is not None:
+			self.on_update(by)
+		return True
+
+	def _make_handler(self) -> type[BaseHTTPRequestHandler]:
+		service = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+			disable_nagle_algorithm = True
+
+			def log_message(self, format: str, *args) -> None:
+				pass
+
+			def _send(self, status: int, body: str, content_type: str = 'text/plain') -> None:
+				data = body.encode('utf-8')
+				self.send_response(status)
+				self.send_header('Content-Type', content_type)
+				self.send_header('Content-Length', str(len(data)))
+				self.end_headers()
+				self.wfile.write(data)
+				with service._lock:
+					service.statuses[status] += 1
+
+			def _reset_connection(self) -> None:
+				# SO_LINGER with a zero timeout makes close() send an RST
+				self.connection.setsockopt(
+					socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0)
+				)
+				self.close_connection = True
+				self.connection.close()
+				with service._lock:
+					service.resets += 1
+
+			def _handle(self) -> None:
+				url = urlsplit(self.path)
+				params = parse_qs(url.query)
+				api_key = params.get('apiKey', [None])[0] or self.headers.get('API-KEY', '')
+				if api_key != service.api_key:
+					self._send(401, 'Unauthorized')
+					return
+
+				if url.path != '/api/swears':
+					self._send(404, 'What da fuk r u doin?? o.O')
+					return
+
+				if not service.check_rate_limit(self.client_address[0]):
+					self._send(429, 'Rate limit exceeded')
+					return
+
+				faults = service.faults
+				if faults.reset_rate and random.random() < faults.reset_rate:
+					self._reset_connection()
+					return
+				if faults.latency_ms or faults.jitter_ms:
+					delay_ms = faults.latency_ms + random.uniform(0, faults.jitter_ms)
+					time.sleep(delay_ms / 1000)
+				if faults.error_rate and random.random() < faults.error_rate:
+					self._send(500, 'Injected error')
+					return
+
+				by = None
+				if self.command == 'POST':
+					by = _parse_number(params.get('by', [''])[0])
+					if by is None or not by.is_integer():
+						self._send(400, 'by must be an integer')
+						return
+
+				price = _parse_number(params.get('pricePerSwear', [''])[0])
+				if price is None or price < 0:
+					self._send(400, 'pricePerSwear is malformed in API request')
+					return
+
+				if by is not None:
+					if not service.update(int(by)):
+						self._send(400, 'Cannot decrement swears below zero')
+						return
+
+				swears = service.count
+				cost = round(swears * price * 100) / 100
+				self._send(
+					200,
+					json.dumps({'swears': swears, 'cost': cost}),
+					'application/json',
+				)
+
+			def do_GET(self) -> None:
+				self._handle()
+
+			def do_POST(self) -> None:
+				length = int(self.headers.get('Content-Length') or 0)
+				if length:
+					self.rfile.read(length)
+				self._handle()
+
+		return Handler
+
+
+def _parse_number(value: str) -> float | None:
+	"""Parse a finite float query parameter (None if malformed)."""
+	try:
+		number = float(value)
+	except ValueError:
+		return None
+	return number if math.isfinite(number) else None
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=3000)
+	parser.add_argument('--api-key', required=True)
+	parser.add_argument('--rate-limit', type=int, default=MAX_REQUESTS_PER_MINUTE)
+	parser.add_argument('--window', type=float, default=RATE_LIMIT_WINDOW_SECONDS)
+	parser.add_argument('--latency-ms', type=float, default=0.0)
+	parser.add_argument('--jitter-ms', type=float, default=0.0)
+	parser.add_argument('--error-rate', type=float, default=0.0)
+	parser.add_argument('--reset-rate', type=float, default=0.0)
+	args = parser.parse_args()
+
+	service = StandinService(
+		args.api_key,
+		host=args.host,
+		port=args.port,
+		max_requests=args.rate_limit,
+		window_seconds=args.window,
+		faults=FaultConfig(
+			latency_ms=args.latency_ms,
+			jitter_ms=args.jitter_ms,
+			error_rate=args.error_rate,
+			reset_rate=args.reset_rate,
+		),
+	)
+	print(f'Stand-in swear-jar service listening on {service.url}')
+	try:
+		service.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		print(f'Final count: {service.count}, responses: {dict(service.statuses)}')
+
+
+if __name__ == '__main__':
+	main()
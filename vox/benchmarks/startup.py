@@ -0,0 +1,204 @@
+"""Startup-time benchmark for the vox entry point, with regression budgets.
+
+Each measurement runs in a fresh interpreter:
+- help:        `main.py --help` wall time; must not import any heavy module
+- app_import:  `-X importtime` total for `import app`; must not import
+               faster_whisper/ctranslate2 (they belong in the model worker)
+- first_frame: process start until the TUI is mounted and composed
+- model_ready: process start until the background model load completes
+
+Exits non-zero if a forbidden module is imported or a budget is exceeded.
+
+Usage:
+	python benchmarks/startup.py [--model tiny] [--runs 5] [--skip-model] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import SRC_DIR
+
+# Modules that make up the model stack; only the model-loading worker may import them
+MODEL_MODULES = ('faster_whisper', 'ctranslate2', 'tokenizers', 'huggingface_hub', 'av')
+# `--help` should need nothing beyond the standard library and our own modules
+HELP_FORBIDDEN = MODEL_MODULES + ('textual', 'numpy', 'sounddevice', 'psutil')
+
+DEFAULT_BUDGETS_MS = {
+	'help': 400.0,
+	'app_import': 1000.0,
+	'first_frame': 2000.0,
+	'model_ready': 30000.0,
+}
+
+_TUI_PROBE = '''
+import time
+t0 = time.perf_counter()
+import asyncio, json, sys
+sys.path.insert(0, sys.argv[1])
+from app import VoxAnalysis
+from cli import get_default_word_list
+from outbox import ReportOutbox
+from swear_detection import SwearDetector
+
+async def main():
+	app = VoxAnalysis(
+		SwearDetector(get_default_word_list()), None, ReportOutbox(),
+		initial_model_size=sys.argv[2],
+	)
+	result = {'model_ready_ms': None}
+	async with app.run_test(headless=True) as pilot:
+		result['first_frame_ms'] = (time.perf_counter() - t0) * 1000
+		deadline = time.perf_counter() + float(sys.argv[3])
+		while sys.argv[3] != '0' and not app.model_ready and time.perf_counter() < deadline:
+			await pilot.pause(0.05)
+		if app.model_ready:
+			result['model_ready_ms'] = (time.perf_counter() - t0) * 1000
+	print(json.dumps(result))
+
+asyncio.run(main())
+'''
+
+
+def _env() -> dict[str, str]:
+	env = dict(os.environ)
+	env['PYTHONPATH'] = os.pathsep.join(
+		p for p in (str(SRC_DIR), env.get('PYTHONPATH')) if p
+	)
+	return env
+
+
+def parse_importtime(stderr: str) -> tuple[float, set[str]]:
+	"""Parse `-X importtime` output.
+
+	Returns:
+		Tuple of (total_ms, imported_module_names). The total sums the
+		cumulative time of top-level imports.
+	"""
+	total_us = 0
+	modules: set[str] = set()
+	for line in stderr.splitlines():
+		if not line.startswith('import time:') or 'cumulative' in line:
+			continue
+		_, cumulative, name = line[len('import time:') :].split('|')
+		modules.add(name.strip())
+		if not name[1:].startswith(' '):
+			total_us += int(cumulative)
+	return total_us / 1000, modules
+
+
+def measure_help() -> tuple[float, float, set[str]]:
+	"""Run `main.py --help`. Returns (wall_ms, import_ms, modules)."""
+	started = time.perf_counter()
+	proc = subprocess.run(
+		[sys.executable, '-X', 'importtime', str(SRC_DIR / 'main.py'), '--help'],
+		capture_output=True,
+		text=True,
+		env=_env(),
+		check=True,
+	)
+	wall_ms = (time.perf_counter() - started) * 1000
+	import_ms, modules = parse_importtime(proc.stderr)
+	return wall_ms, import_ms, modules
+
+
+def measure_app_import() -> tuple[float, set[str]]:
+	"""Import the TUI module. Returns (import_ms, modules)."""
+	proc = subprocess.run(
+		[sys.executable, '-X', 'importtime', '-c', 'import app'],
+		capture_output=True,
+		text=True,
+		env=_env(),
+		check=True,
+	)
+	return parse_importtime(proc.stderr)
+
+
+def measure_tui(model: str, model_timeout: float) -> dict:
+	"""Start the TUI under Textual's headless driver and time it."""
+	proc = subprocess.run(
+		[
+			sys.executable,
+			'-c',
+			_TUI_PROBE,
+			str(SRC_DIR),
+			model,
+			str(model_timeout),
+		],
+		capture_output=True,
+		text=True,
+		env=_env(),
+		check=True,
+	)
+	return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _median(values: list[float]) -> float:
+	ordered = sorted(values)
+	return ordered[len(ordered) // 2]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--model', default='tiny', help='Model size for model_ready')
+	parser.add_argument('--runs', type=int, default=5, help='Runs per measurement')
+	parser.add_argument('--model-timeout', type=float, default=120.0)
+	parser.add_argument('--skip-model', action='store_true', help='Skip model_ready')
+	for name, budget in DEFAULT_BUDGETS_MS.items():
+		parser.add_argument(
+			f'--budget-{name.replace("_", "-")}-ms',
+			type=float,
+			default=budget,
+			dest=f'budget_{name}',
+		)
+	parser.add_argument('--json', action='store_true', help='Print JSON result')
+	args = parser.parse_args()
+
+	failures: list[str] = []
+	results: dict[str, float | None] = {}
+
+	help_runs = [measure_help() for _ in range(args.runs)]
+	results['help'] = _median([wall for wall, _, _ in help_runs])
+	results['help_imports'] = _median([imp for _, imp, _ in help_runs])
+	leaked = sorted(set().union(*(mods for _, _, mods in help_runs)) & set(HELP_FORBIDDEN))
+	if leaked:
+		failures.append(f'--help imported {", ".join(leaked)}')
+
+	app_runs = [measure_app_import() for _ in range(args.runs)]
+	results['app_import'] = _median([imp for imp, _ in app_runs])
+	leaked = sorted(set().union(*(mods for _, mods in app_runs)) & set(MODEL_MODULES))
+	if leaked:
+		failures.append(f'import app pulled in {", ".join(leaked)}')
+
+	tui_runs = [measure_tui(args.model, 0) for _ in range(args.runs)]
+	results['first_frame'] = _median([run['first_frame_ms'] for run in tui_runs])
+
+	if not args.skip_model:
+		ready = measure_tui(args.model, args.model_timeout)['model_ready_ms']
+		results['model_ready'] = ready
+		if ready is None:
+			failures.append(f'model {args.model} did not load within {args.model_timeout}s')
+
+	for name in DEFAULT_BUDGETS_MS:
+		value = results.get(name)
+		budget = getattr(args, f'budget_{name}')
+		if value is not None and value > budget:
+			failures.append(f'{name} took {value:.0f} ms (budget {budget:.0f} ms)')
+
+	if args.json:
+		print(json.dumps({'results_ms': results, 'failures': failures}, indent=2))
+	else:
+		for name, value in results.items():
+			shown = 'n/a' if value is None else f'{value:.0f} ms'
+			print(f'{name:>12}: {shown}')
+		for failure in failures:
+			print(f'FAIL: {failure}')
+
+	sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+	main()
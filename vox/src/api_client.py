@@ -1,74 +1,480 @@
 """API client for swear-jar service."""
 
-import urllib.error
-import urllib.request
+import http.client
+import json
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from urllib.parse import urlsplit
 
+from config import get_rate_limit
 from logging_setup import get_logger
+from metrics import metrics
+from outbox import ReportOutbox
 
 log = get_logger(__name__)
 
+REQUEST_TIMEOUT = 10
+
+# Mirrors MAX_REQUESTS_PER_MINUTE in service/src/utils/rateLimits.ts
+MAX_REQUESTS_PER_MINUTE = 30
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+
+# Retry delays while the service is unreachable
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+# Raised when the server has dropped an idle keep-alive connection
+_STALE_CONNECTION_ERRORS = (
+	http.client.RemoteDisconnected,
+	http.client.CannotSendRequest,
+	ConnectionResetError,
+	ConnectionAbortedError,
+	BrokenPipeError,
+)
+
+
+class StaleConnectionError(ConnectionError):
+	"""A reused keep-alive connection had been closed by the server.
+
+	Only raised when the server cannot have acted on the request: sending it
+	failed, or it is idempotent. It is safe to send again on a new connection.
+	"""
+
+
+@dataclass
+class ConnectionStats:
+	"""Keep-alive connection reuse statistics."""
+
+	requests: int = 0
+	connections_opened: int = 0
+	reconnects: int = 0
+
+	@property
+	def reused(self) -> int:
+		"""Number of requests served on an already-open connection."""
+		return self.requests - self.connections_opened
+
+
+class SlidingWindowLimiter:
+	"""Client-side mirror of the service's per-IP sliding-window rate limit."""
+
+	def __init__(
+		self,
+		max_requests: int = MAX_REQUESTS_PER_MINUTE,
+		window_seconds: float = RATE_LIMIT_WINDOW_SECONDS,
+		clock: Callable[[], float] = time.monotonic,
+	):
+		self.max_requests = max_requests
+		self.window_seconds = window_seconds
+		self._clock = clock
+		self._timestamps: deque[float] = deque()
+		self._blocked_until = 0.0
+		self._backoff_streak = 0
+
+	def try_acquire(self) -> float:
+		"""Claim a request slot if one is free.
+
+		Returns:
+			0.0 if a slot was claimed, otherwise seconds until one frees up.
+		"""
+		now = self._clock()
+		if now < self._blocked_until:
+			return self._blocked_until - now
+
+		cutoff = now - self.window_seconds
+		while self._timestamps and self._timestamps[0] <= cutoff:
+			self._timestamps.popleft()
+
+		if len(self._timestamps) >= self.max_requests:
+			return self._timestamps[0] + self.window_seconds - now
+
+		self._timestamps.append(now)
+		return 0.0
+
+	def back_off(self, retry_after: float | None = None) -> float:
+		"""Block new requests after the service rejected one for rate limiting.
+
+		Without a Retry-After hint the delay starts at one slot interval and
+		doubles on each consecutive rejection, capped at the full window.
+
+		Returns:
+			Seconds until requests may be attempted again.
+		"""
+		if retry_after is None:
+			slot = self.window_seconds / max(self.max_requests, 1)
+			retry_after = min(self.window_seconds, slot * 2**self._backoff_streak)
+		self._backoff_streak += 1
+		self._blocked_until = self._clock() + retry_after
+		return retry_after
+
+	def reset_backoff(self) -> None:
+		"""Clear the back-off streak after a request is accepted."""
+		self._backoff_streak = 0
+
 
 class SwearAPIClient:
-	"""Client for reporting swears to the swear-jar service API."""
+	"""Client for reporting swears to the swear-jar service API.
 
-	def __init__(self, base_url: str, api_key: str):
+	Holds a single persistent HTTP/1.1 keep-alive connection that is reused
+	across calls and re-opened if the server resets it. A count is only sent
+	again automatically when the reset proves it never reached the service.
+
+	Requests are paced to stay within the service's rate limit. Counts that
+	arrive while no request slot is free, or while the service is unreachable,
+	are held in an outbox and sent as a single POST once a slot frees up.
+	"""
+
+	def __init__(
+		self,
+		base_url: str,
+		api_key: str,
+		max_requests: int = MAX_REQUESTS_PER_MINUTE,
+		window_seconds: float = RATE_LIMIT_WINDOW_SECONDS,
+		outbox: ReportOutbox | None = None,
+	):
 		"""Initialize API client.
 
 		Args:
 			base_url: Base URL of the swear-jar service (e.g., http://localhost:3000)
 			api_key: API key for authentication
+			max_requests: Maximum requests allowed per rate limit window.
+			window_seconds: Length of the rate limit window in seconds.
+			outbox: Store for undelivered counts (default: memory-only). Any
+				counts recovered from a previous run are replayed right away.
 		"""
 		self.base_url = base_url.rstrip('/')
 		self.api_key = api_key
 
+		parts = urlsplit(self.base_url)
+		self._scheme = parts.scheme or 'http'
+		self._host = parts.hostname or 'localhost'
+		self._port = parts.port
+		self._path_prefix = parts.path.rstrip('/')
+
+		self._conn: http.client.HTTPConnection | None = None
+		self._lock = threading.Lock()
+		self.stats = ConnectionStats()
+
+		self._limiter = SlidingWindowLimiter(max_requests, window_seconds)
+		self._outbox = outbox if outbox is not None else ReportOutbox()
+		self._state_lock = threading.Lock()
+		self._flush_timer: threading.Timer | None = None
+		self._retry_streak = 0
+
+		if self._outbox.unsent:
+			log.info(f'Replaying {self._outbox.unsent} swear(s) from outbox')
+			with self._state_lock:
+				self._schedule_flush(0)
+
+	def _open_connection(self) -> http.client.HTTPConnection:
+		"""Open a new connection to the service."""
+		if self._scheme == 'https':
+			conn: http.client.HTTPConnection = http.client.HTTPSConnection(
+				self._host, self._port, timeout=REQUEST_TIMEOUT
+			)
+		else:
+			conn = http.client.HTTPConnection(
+				self._host, self._port, timeout=REQUEST_TIMEOUT
+			)
+		self.stats.connections_opened += 1
+		log.debug(
+			f'Opened connection #{self.stats.connections_opened} '
+			f'to {self._host}:{self._port}'
+		)
+		return conn
+
+	def _request(
+		self, method: str, path: str
+	) -> tuple[http.client.HTTPResponse, str]:
+		"""Send a request on the persistent connection.
+
+		Must be called with self._lock held. A request is never resent here:
+		once a POST has been written the server may have applied it even if
+		no response comes back, so the caller decides whether to send again.
+
+		Returns:
+			Tuple of (response, body). The response body has already been read.
+
+		Raises:
+			StaleConnectionError: If a reused connection had been closed before
+				the request could reach the server (or, for a GET, before it
+				answered). The connection has been dropped.
+			OSError, http.client.HTTPException: If the request fails.
+		"""
+		headers = {
+			'API-KEY': self.api_key,
+			'Content-Type': 'application/json',
+			'Content-Length': '0',
+		}
+
+		reused = self._conn is not None
+		if self._conn is None:
+			self._conn = self._open_connection()
+		sent = False
+		try:
+			self._conn.request(method, self._path_prefix + path, headers=headers)
+			sent = True
+			response = self._conn.getresponse()
+			body = response.read().decode('utf-8')
+		except _STALE_CONNECTION_ERRORS as e:
+			self._drop_connection()
+			if reused and (not sent or method == 'GET'):
+				self.stats.reconnects += 1
+				log.debug('Keep-alive connection was reset, reconnecting')
+				raise StaleConnectionError(str(e)) from e
+			raise
+		except Exception:
+			self._drop_connection()
+			raise
+
+		self.stats.requests += 1
+		if response.will_close:
+			self._drop_connection()
+		return response, body
+
 	def report_swears(self, count: int) -> bool:
 		"""Report swear count to the API.
 
-		Makes POST request to {base_url}/api/swears?pricePerSwear={price}&by={count}
+		The count is recorded in the outbox and everything undelivered is sent
+		as one POST to {base_url}/api/swears?pricePerSwear=0&by={total} if a rate
+		limit slot is free. Otherwise a flush is scheduled for when one frees up.
 
 		Args:
-			count: Number of swears to report.
+			count: Number of swears to report. Negative counts correct an
+				earlier over-report; the service rejects a total below zero.
 
 		Returns:
-			True if request succeeded, False otherwise.
+			True if the count was sent or deferred, False if the request failed
+			(the count stays in the outbox and is retried).
 		"""
-		if count <= 0:
+		if count == 0:
 			return True
 
-		url = f'{self.base_url}/api/swears?pricePerSwear=0&by={count}'
+		self._outbox.append(count)
+		return self.flush()
 
-		headers = {
-			'API-KEY': self.api_key,
-			'Content-Type': 'application/json',
-		}
+	def flush(self) -> bool:
+		"""Send all undelivered counts if a rate limit slot is free.
 
-		log.info(f'Reporting {count} swear(s) to API: {url}')
+		Returns:
+			True if counts were sent or deferred, False if the request failed.
+		"""
+		while True:
+			with self._state_lock:
+				if self._outbox.unsent != 0:
+					wait = self._limiter.try_acquire()
+					if wait > 0:
+						log.debug(
+							f'Rate limit reached, holding {self._outbox.unsent} '
+							f'swear(s) for {wait:.1f}s'
+						)
+						self._schedule_flush(wait)
+						return True
+				batch = self._outbox.reserve()
+				if batch is None:
+					# Nothing left, or another flush has a batch in flight and
+					# will pick up the rest
+					return True
+			_, count = batch
 
-		try:
-			request = urllib.request.Request(
-				url,
-				method='POST',
-				headers=headers,
-				data=b'',
-			)
+			if count == 0:
+				# Corrections cancelled these counts out exactly; retire them
+				# without a request
+				self._outbox.commit()
+				continue
+
+			try:
+				status, retry_after = self._post_swears(count)
+			except StaleConnectionError:
+				# Nothing reached the service; send again on a new connection,
+				# through the limiter like any other request
+				self._outbox.release()
+				continue
 
-			with urllib.request.urlopen(request, timeout=10) as response:
-				status = response.status
-				body = response.read().decode('utf-8')
+			if status == 200:
+				self._outbox.commit()
+				self._limiter.reset_backoff()
+				self._retry_streak = 0
+				# Loop to send anything that arrived while this batch was in flight
+				continue
 
-				if status == 200:
-					log.info(f'API response ({status}): {body}')
+			if status == 400:
+				# The service will never accept this batch; replaying it would
+				# wedge the outbox
+				log.error(f'Service rejected {count} swear(s), discarding')
+				self._outbox.commit()
+				return False
+
+			self._outbox.release()
+
+			with self._state_lock:
+				if status == 429:
+					delay = self._limiter.back_off(retry_after)
+					self._schedule_flush(delay)
+					log.warning(
+						f'Rate limited by service, retrying {count} swear(s) '
+						f'in {delay:.1f}s'
+					)
 					return True
-				else:
-					log.warning(f'API returned non-200 status: {status} - {body}')
-					return False
 
-		except urllib.error.HTTPError as e:
-			log.error(f'HTTP error reporting swears: {e.code} - {e.reason}')
-			return False
-		except urllib.error.URLError as e:
-			log.error(f'URL error reporting swears: {e.reason}')
+				delay = min(
+					RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2**self._retry_streak
+				)
+				self._retry_streak += 1
+				self._schedule_flush(delay)
+			log.warning(f'Report failed, retrying {count} swear(s) in {delay:.1f}s')
 			return False
+
+	def _post_swears(self, count: int) -> tuple[int | None, float | None]:
+		"""POST a swear count to the service.
+
+		Returns:
+			Tuple of (status, retry_after). Status is None if the request could
+			not be completed; retry_after is the Retry-After header, if any.
+
+		Raises:
+			StaleConnectionError: If the count was not sent; see _request().
+		"""
+		path = f'/api/swears?pricePerSwear=0&by={count}'
+
+		log.info(f'Reporting {count} swear(s) to API: {self.base_url}{path}')
+
+		try:
+			with self._lock:
+				response, body = self._request('POST', path)
+				stats = self.stats
+				log.debug(
+					f'Connection reuse: {stats.reused}/{stats.requests} requests '
+					f'reused, {stats.connections_opened} opened, '
+					f'{stats.reconnects} reconnects'
+				)
+
+			status = response.status
+			if status == 200:
+				metrics.reports_sent.inc()
+				log.debug(f'API response ({status}): {body}')
+			else:
+				metrics.reports_failed.inc()
+				if status != 429:
+					log.warning(f'API returned non-200 status: {status} - {body}')
+			return status, _parse_retry_after(response.getheader('Retry-After'))
+
+		except StaleConnectionError:
+			raise
+		except (OSError, http.client.HTTPException) as e:
+			metrics.reports_failed.inc()
+			log.error(f'Connection error reporting swears: {e}')
+			return None, None
 		except Exception as e:
+			metrics.reports_failed.inc()
 			log.exception(f'Unexpected error reporting swears: {e}')
-			return False
+			return None, None
+
+	def fetch_swears(self) -> int | None:
+		"""Fetch the current swear count from the service.
+
+		The service's rate limit counts every request, so this waits for a
+		slot from the same limiter as the reports.
+
+		Returns:
+			The count, or None if the request failed.
+		"""
+		try:
+			try:
+				response, body = self._get('/api/swears?pricePerSwear=0')
+			except StaleConnectionError:
+				response, body = self._get('/api/swears?pricePerSwear=0')
+			if response.status == 429:
+				with self._state_lock:
+					self._limiter.back_off(
+						_parse_retry_after(response.getheader('Retry-After'))
+					)
+			if response.status != 200:
+				log.warning(f'API returned non-200 status: {response.status} - {body}')
+				return None
+			return int(json.loads(body)['swears'])
+		except (OSError, http.client.HTTPException, ValueError, KeyError) as e:
+			log.error(f'Error fetching swears: {e}')
+			return None
+
+	def _get(self, path: str) -> tuple[http.client.HTTPResponse, str]:
+		"""GET on the persistent connection once the limiter grants a slot."""
+		while True:
+			with self._state_lock:
+				wait = self._limiter.try_acquire()
+			if wait <= 0:
+				break
+			log.debug(f'Rate limit reached, waiting {wait:.1f}s to fetch')
+			time.sleep(wait)
+		with self._lock:
+			return self._request('GET', path)
+
+	def _schedule_flush(self, delay: float) -> None:
+		"""Flush pending counts after a delay.
+
+		Must be called with self._state_lock held.
+		"""
+		if self._flush_timer is not None and self._flush_timer.is_alive():
+			return
+		self._flush_timer = threading.Timer(delay, self._on_flush_timer)
+		self._flush_timer.daemon = True
+		self._flush_timer.start()
+
+	def _on_flush_timer(self) -> None:
+		"""Timer callback: retry sending pending counts."""
+		with self._state_lock:
+			self._flush_timer = None
+		self.flush()
+
+	@property
+	def pending(self) -> int:
+		"""Number of swears not yet delivered to the service."""
+		return self._outbox.pending
+
+	def _drop_connection(self) -> None:
+		"""Discard the current connection. Must be called with self._lock held."""
+		if self._conn is not None:
+			self._conn.close()
+			self._conn = None
+
+	def close(self) -> None:
+		"""Close the persistent connection and log reuse statistics."""
+		with self._state_lock:
+			if self._flush_timer is not None:
+				self._flush_timer.cancel()
+				self._flush_timer = None
+		with self._lock:
+			self._drop_connection()
+		stats = self.stats
+		log.info(
+			f'API client closed: {stats.requests} requests, '
+			f'{stats.connections_opened} connections opened, '
+			f'{stats.reconnects} reconnects'
+		)
+
+
+def create_api_client(
+	base_url: str, api_key: str, outbox: ReportOutbox
+) -> SwearAPIClient:
+	"""Create an API client using the saved rate limit settings."""
+	max_requests, window_seconds = get_rate_limit()
+	return SwearAPIClient(
+		base_url,
+		api_key,
+		max_requests=max_requests or MAX_REQUESTS_PER_MINUTE,
+		window_seconds=window_seconds or RATE_LIMIT_WINDOW_SECONDS,
+		outbox=outbox,
+	)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+	"""Parse a Retry-After header given in seconds."""
+	if value is None:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		return None
@@ -0,0 +1,715 @@
+"""Textual TUI for Vox: live transcript, status and configuration."""
+
+import time
+from pathlib import Path
+from queue import Queue
+
+import numpy as np
+import psutil
+from textual import work
+from textual.app import App, ComposeResult
+from textual.binding import Binding
+from textual.containers import Container, Horizontal, Vertical
+from textual.reactive import reactive
+from textual.widgets import Footer, Header, Input
+from textual.worker import get_current_worker
+
+from api_client import SwearAPIClient, create_api_client
+from audio import DTYPE, AudioCapture
+from bleep import BleepOutput
+from cli import MODEL_SIZES
+from config import (
+	get_adaptive_model,
+	get_device_channel,
+	get_idle_unload_minutes,
+	get_saved_device,
+	save_model_size,
+)
+from config_screen import ConfigSaved, ConfigScreen
+from devices import DeviceRegistry, InputDevice
+from governor import ModelGovernor, ModelStep
+from halp import Halp
+from logging_setup import get_logger
+from metrics import metrics
+from outbox import ReportOutbox
+from pipeline import Pipeline, transcription_pipeline
+from processing import PipelineStats
+from recorder import FlightRecorder
+from swear_detection import SwearDetector
+from tracing import tracer
+from transcription import TranscriptionEngine, load_transcription_engine
+from widgets import (
+	PipelineHealth,
+	PipelinePanel,
+	StatusPanel,
+	TranscriptView,
+)
+
+log = get_logger(__name__)
+
+
+def _format_bytes(size: int) -> str:
+	if size >= 1024**3:
+		return f'{size / (1024**3):.1f} GB'
+	return f'{size / (1024**2):.1f} MB'
+
+
+class VoxAnalysis(App):
+	CSS_PATH = ['styles/vox.tcss', 'styles/config.tcss']
+	SCREENS = {'halp': Halp}
+	BINDINGS = [
+		Binding(key='q', action='quit', description='Quit'),
+		Binding(
+			key='question_mark',
+			action='push_screen("halp")',
+			description='Help',
+			key_display='?',
+		),
+		Binding(key='space', action='toggle_recording', description='Record'),
+		Binding(key='c', action='open_config', description='Config'),
+		Binding(
+			key='slash',
+			action='search_transcript',
+			description='Search',
+			key_display='/',
+		),
+		Binding(key='escape', action='close_search', show=False),
+	]
+
+	is_recording = reactive(False)
+	is_loading = reactive(False)
+	model_ready = reactive(False)  # Starts False, set True after async load
+	model_idle = reactive(False)  # Model unloaded after sitting idle
+	api_configured = reactive(False)
+	selected_device_id: reactive[int | None] = reactive(None)
+	selected_device_name: reactive[str] = reactive('System Default')
+	audio_level: reactive[float] = reactive(0.0)
+	selected_channel: reactive[int] = reactive(0)
+	selected_channel_count: reactive[int] = reactive(1)
+	selected_model: reactive[str] = reactive('base')
+
+	def __init__(
+		self,
+		swear_detector: SwearDetector,
+		api_client: SwearAPIClient | None,
+		outbox: ReportOutbox,
+		initial_base_url: str | None = None,
+		initial_api_key: str | None = None,
+		initial_model_size: str = 'base',
+		model_server: Path | None = None,
+		recorder: FlightRecorder | None = None,
+		sample_format: str = DTYPE,
+		transcript_file: Path | None = None,
+		bleep: BleepOutput | None = None,
+	):
+		super().__init__()
+		self._process = psutil.Process()
+		self.audio_queue: Queue = Queue()
+		self.swear_detector = swear_detector
+		self.api_client = api_client
+		self.outbox = outbox
+		self._base_url = initial_base_url
+		self._api_key = initial_api_key
+		self._api_configured = api_client is not None
+		self._initial_model_size = initial_model_size
+		self._model_server = model_server
+		self.recorder = recorder
+		self.bleep = bleep
+		self._transcript_file = transcript_file
+
+		# Load saved device and channel preference. They are checked against the
+		# device list once the registry has scanned it (see _on_devices_changed)
+		saved_id, saved_name = get_saved_device()
+		self._initial_device_id = saved_id
+		self._initial_device_name = saved_name or 'System Default'
+		self._initial_channel = (
+			get_device_channel(saved_id) if saved_id is not None else 0
+		)
+
+		self.devices = DeviceRegistry(
+			on_change=lambda devices: self.call_from_thread(
+				self._on_devices_changed, devices
+			),
+			# A rescan would also close the bleep output stream
+			can_rescan=lambda: not self.audio_capture.is_running and bleep is None,
+		)
+		self.audio_capture = AudioCapture(
+			self.audio_queue,
+			on_error=lambda msg: self.call_from_thread(self.notify, msg),
+			on_level=lambda lvl: self.call_from_thread(self._update_level, lvl),
+			on_chunk=(
+				self._on_chunk
+				if recorder is not None or bleep is not None
+				else None
+			),
+			dtype=sample_format,
+		)
+		self.transcription_engine: TranscriptionEngine | None = None
+		self.pipeline_stats = PipelineStats()
+		self._pipeline: Pipeline | None = None
+		self.governor = (
+			ModelGovernor(initial_model_size) if get_adaptive_model() else None
+		)
+		# Smaller models the governor stepped down to, kept loaded so stepping
+		# between them is instant
+		self._step_engines: dict[str, TranscriptionEngine] = {}
+		self._switching_model = False
+		self._idle_unload_seconds = get_idle_unload_minutes() * 60
+		self._last_active = time.monotonic()
+		metrics.model_loaded.set_function(
+			lambda: self.transcription_engine is not None
+			and self.transcription_engine.is_loaded
+		)
+		metrics.queue_depth.set_function(lambda: self._queued_seconds)
+
+	def compose(self) -> ComposeResult:
+		yield Header()
+		yield Container(
+			Vertical(
+				Horizontal(
+					StatusPanel(id='status'),
+					PipelinePanel(id='pipeline'),
+					id='panels',
+				),
+				TranscriptView(spill_path=self._transcript_file, id='transcript'),
+				Input(
+					placeholder='Search transcript (Enter: older match, Esc: close)',
+					id='transcript-search',
+				),
+				id='main-content',
+			),
+		)
+		yield Footer()
+
+	def on_mount(self) -> None:
+		self.title = 'Swear Jar'
+		self._update_stats()
+		self.set_interval(1.0, self._update_stats)
+
+		# Apply saved device and channel selection
+		self.selected_device_id = self._initial_device_id
+		self.selected_device_name = self._initial_device_name
+		self.selected_channel = self._initial_channel
+		self.devices.start()
+		self.query_one('#transcript-search', Input).display = False
+
+		# Set API configured state
+		self.api_configured = self._api_configured
+
+		# Set initial model and start async loading
+		self.selected_model = self._initial_model_size
+		self.notify(f'Loading {self._initial_model_size} model...')
+		self._load_initial_model()
+
+		# Show loaded word count
+		self.notify(f'Loaded {self.swear_detector.word_count} swear words.')
+
+	def _on_devices_changed(self, devices: list[InputDevice]) -> None:
+		"""Re-check the selected device against a new device list.
+
+		Runs after the first scan and whenever a rescan finds devices added or
+		removed. Ids can shift on a rescan, so the device is found by name too.
+		"""
+		if self.selected_device_id is not None:
+			device = self.devices.find(
+				self.selected_device_id, self.selected_device_name
+			)
+			if device is None:
+				name = self.selected_device_name
+				message = f'Device {name} not found, using System Default'
+				log.warning(message)
+				self.notify(message, severity='warning')
+				self.selected_device_id = None
+				self.selected_device_name = 'System Default'
+				self.selected_channel = 0
+				self.selected_channel_count = 1
+			else:
+				self.selected_device_id = device.id
+				self.selected_channel_count = device.channels
+				# Validate channel is within range
+				if self.selected_channel >= device.channels:
+					self.selected_channel = 0
+		if isinstance(self.screen, ConfigScreen):
+			self.screen.update_devices(devices)
+
+	def _on_chunk(self, captured_ns: int, chunk: np.ndarray) -> None:
+		"""Hand a captured chunk to the recorder and bleep output (audio thread)."""
+		if self.recorder is not None:
+			self.recorder.feed(captured_ns, chunk)
+		if self.bleep is not None:
+			self.bleep.feed(captured_ns, chunk)
+
+	def _update_level(self, level: float) -> None:
+		"""Update audio level (called from audio thread)."""
+		self.audio_level = level
+
+	def _update_stats(self) -> None:
+		"""Update CPU/memory stats for this process in header subtitle."""
+		cpu = self._process.cpu_percent()
+		system_cpu = psutil.cpu_percent()
+		mem_str = _format_bytes(self._process.memory_info().rss)
+		self.sub_title = (
+			f'CPU: {cpu:.1f}% (system {system_cpu:.0f}%) | MEM: {mem_str}'
+		)
+		self._update_pipeline_health()
+		self._check_idle()
+		self._govern_model(system_cpu)
+
+	def _govern_model(self, system_cpu: float) -> None:
+		"""Let the governor step the model down or up (1 Hz, from _update_stats)."""
+		governor = self.governor
+		if governor is None or self._switching_model or not self.model_ready:
+			return
+		rtf = self.pipeline_stats.rtf if self.is_recording else None
+		step = governor.observe(rtf, system_cpu, time.monotonic())
+		if step is None:
+			return
+		if step.model == governor.ceiling or step.model in self._step_engines:
+			self._on_model_stepped(step)
+			return
+		self._switching_model = True
+		self.notify(f'Transcription is falling behind, loading {step.model}...')
+		self._load_step_model(step, governor.ceiling)
+
+	@work(thread=True, exclusive=True, group='model_step')
+	def _load_step_model(self, step: ModelStep, ceiling: str) -> None:
+		"""Load a smaller model for the governor; the current one keeps decoding."""
+		try:
+			engine = self._do_model_load(step.model)
+		except Exception as e:
+			log.exception(f'Failed to load {step.model} model: {e}')
+			self.call_from_thread(
+				self.notify, f'Failed to load {step.model} model: {e}', severity='error'
+			)
+			self.call_from_thread(self._on_step_model_failed, ceiling)
+			return
+		self.call_from_thread(self._on_step_model_loaded, step, ceiling, engine)
+
+	def _on_step_model_loaded(
+		self, step: ModelStep, ceiling: str, engine: TranscriptionEngine
+	) -> None:
+		governor = self.governor
+		if governor is None or governor.ceiling != ceiling or not self._switching_model:
+			# The configured model changed or was unloaded meanwhile
+			engine.unload()
+			return
+		self._step_engines[step.model] = engine
+		self._on_model_stepped(step)
+
+	def _on_step_model_failed(self, ceiling: str) -> None:
+		governor = self.governor
+		if governor is not None and governor.ceiling == ceiling:
+			self._switching_model = False
+			# Stay on the current model; retry once it has settled again
+			governor.switched(governor.current, time.monotonic())
+
+	def _on_model_stepped(self, step: ModelStep) -> None:
+		"""Decode the next window with the model the governor picked."""
+		governor = self.governor
+		assert governor is not None
+		previous = governor.current
+		governor.switched(step.model, time.monotonic())
+		self._switching_model = False
+		down = MODEL_SIZES.index(step.model) < MODEL_SIZES.index(previous)
+		self.notify(
+			f'Model {previous} -> {step.model}: {step.reason}',
+			severity='warning' if down else 'information',
+		)
+		self.query_one('#status', StatusPanel).model_note = (
+			f'{step.model}, configured {governor.ceiling}'
+			if governor.stepped_down
+			else ''
+		)
+
+	def _drop_step_engines(self) -> None:
+		"""Unload the governor's smaller models (safe on a worker thread)."""
+		engines = list(self._step_engines.values())
+		self._step_engines.clear()
+		for engine in engines:
+			engine.unload()
+
+	def _reset_governor(self) -> None:
+		"""Back to the configured model once the smaller ones are dropped."""
+		self._switching_model = False
+		if self.governor is not None:
+			self.governor.reset(self.selected_model)
+		self.query_one('#status', StatusPanel).model_note = ''
+
+	def _decode_engine(self) -> TranscriptionEngine:
+		"""Engine for the next window: the governor's pick or the configured one."""
+		governor = self.governor
+		if governor is not None:
+			engine = self._step_engines.get(governor.current)
+			if engine is not None:
+				return engine
+		assert self.transcription_engine is not None, 'Engine must be loaded'
+		return self.transcription_engine
+
+	def _check_idle(self) -> None:
+		"""Unload the model once nothing has been recorded for the idle period."""
+		if (
+			self._idle_unload_seconds <= 0
+			or self.is_recording
+			or not self.model_ready
+			or self.transcription_engine is None
+		):
+			return
+		if time.monotonic() - self._last_active < self._idle_unload_seconds:
+			return
+		self.model_ready = False
+		self.model_idle = True
+		self._unload_idle_model()
+
+	@work(thread=True, exclusive=True, group='model_idle')
+	def _unload_idle_model(self) -> None:
+		"""Drop the model and report how much memory came back."""
+		engine = self.transcription_engine
+		if engine is None:
+			return
+		before = self._process.memory_info().rss
+		engine.unload()
+		self._drop_step_engines()
+		after = self._process.memory_info().rss
+		log.info(
+			f'Model {engine.model_size} unloaded after idle: '
+			f'RSS {_format_bytes(before)} -> {_format_bytes(after)}'
+		)
+		self.call_from_thread(self._on_idle_model_unloaded, before, after)
+
+	def _on_idle_model_unloaded(self, before: int, after: int) -> None:
+		minutes = self._idle_unload_seconds / 60
+		self._reset_governor()
+		self.query_one('#status', StatusPanel).idle_note = (
+			f'idle RSS {_format_bytes(after)}'
+		)
+		self.notify(
+			f'Model unloaded after {minutes:g} min idle '
+			f'({_format_bytes(before)} -> {_format_bytes(after)})'
+		)
+
+	def _wake_model(self, resume_recording: bool) -> None:
+		"""Start reloading an idle-unloaded model in the background."""
+		if not self.model_idle or self.is_loading:
+			return
+		self.is_loading = True
+		self.notify('Reloading model...')
+		self._reload_idle_model(resume_recording)
+
+	@work(thread=True, exclusive=True, group='model_reload')
+	def _reload_idle_model(self, resume_recording: bool) -> None:
+		"""Reload the idle engine's model from its local files."""
+		engine = self.transcription_engine
+		worker = get_current_worker()
+		try:
+			assert engine is not None, 'Idle unload requires an engine'
+			started = time.perf_counter()
+			engine.load()
+			seconds = time.perf_counter() - started
+		except Exception as e:
+			log.exception(f'Failed to reload model: {e}')
+			self.call_from_thread(
+				self.notify, f'Failed to reload model: {e}', severity='error'
+			)
+			self.call_from_thread(setattr, self, 'is_loading', False)
+			return
+		log.info(f'Model {engine.model_size} reloaded in {seconds:.2f}s')
+		# A model change from the config screen replaced this engine meanwhile
+		if not worker.is_cancelled:
+			self.call_from_thread(
+				self._on_idle_model_reloaded, seconds, resume_recording
+			)
+
+	def _on_idle_model_reloaded(self, seconds: float, resume_recording: bool) -> None:
+		self.is_loading = False
+		self._set_model_active()
+		self.notify(f'Model reloaded in {seconds:.1f}s')
+		if resume_recording:
+			self.start_recording()
+
+	def _set_model_active(self) -> None:
+		"""Mark the model loaded and restart the idle countdown."""
+		self.model_idle = False
+		self.model_ready = True
+		self._last_active = time.monotonic()
+		self.query_one('#status', StatusPanel).idle_note = ''
+
+	def _update_pipeline_health(self) -> None:
+		"""Push a pipeline health snapshot to the panel (1 Hz, from _update_stats)."""
+		latency = tracer.histogram('speech_to_report')
+		p50 = p95 = None
+		if latency is not None and latency.count:
+			p50 = latency.percentile(50) / 1e6
+			p95 = latency.percentile(95) / 1e6
+		self.query_one('#pipeline', PipelinePanel).health = PipelineHealth(
+			rtf=self.pipeline_stats.rtf,
+			queue_seconds=self._queued_seconds,
+			decode_seconds=self.pipeline_stats.last_decode_seconds,
+			latency_p50_seconds=p50,
+			latency_p95_seconds=p95,
+			backlog=self.outbox.pending,
+			skipped_ratio=self.pipeline_stats.skip_ratio,
+		)
+
+	def _append_transcript(self, text: str, spans: list[tuple[int, int]]) -> None:
+		"""Append text to transcript (called from main thread via call_from_thread)."""
+		self.query_one('#transcript', TranscriptView).append_text(text, spans)
+
+	def _on_text(self, text: str) -> None:
+		"""Show a transcription (called on the pipeline's detect stage)."""
+		# Highlighting is worked out here, once, rather than on every repaint
+		spans = [(start, end) for _, start, end in self.swear_detector.locate(text)]
+		self.call_from_thread(self._append_transcript, text, spans)
+
+	def action_search_transcript(self) -> None:
+		"""Open the transcript search box."""
+		search = self.query_one('#transcript-search', Input)
+		search.display = True
+		search.focus()
+
+	def action_close_search(self) -> None:
+		"""Close the transcript search box and clear its highlights."""
+		search = self.query_one('#transcript-search', Input)
+		if not search.display:
+			return
+		search.value = ''
+		search.display = False
+		self.query_one('#transcript', TranscriptView).search('')
+		self.set_focus(None)
+
+	def on_input_changed(self, event: Input.Changed) -> None:
+		"""Search the transcript as the query is typed."""
+		if event.input.id != 'transcript-search':
+			return
+		found = self.query_one('#transcript', TranscriptView).search(event.value)
+		event.input.set_class(bool(event.value) and not found, '-no-match')
+
+	def on_input_submitted(self, event: Input.Submitted) -> None:
+		"""Step to the next older match."""
+		if event.input.id == 'transcript-search':
+			self.query_one('#transcript', TranscriptView).search_older()
+
+	def _report_swears(self, count: int, detected: list[str]) -> None:
+		"""Report a window's swears (called on the pipeline's report stage)."""
+		if self.api_client is None:
+			return
+		with tracer.span('report'):
+			reported = self.api_client.report_swears(count)
+		latency = tracer.end_to_end()
+		if latency is not None:
+			metrics.speech_to_report_seconds.observe(latency)
+		if reported:
+			log.info(f'Reported {count} swear(s): {detected}')
+		else:
+			log.warning(f'Queued {count} swear(s) for retry: {detected}')
+
+	def watch_is_recording(self, recording: bool) -> None:
+		"""Update UI when recording state changes."""
+		self.query_one('#status', StatusPanel).recording = recording
+
+	def watch_is_loading(self, loading: bool) -> None:
+		"""Update UI when loading state changes."""
+		self.query_one('#status', StatusPanel).loading = loading
+
+	def watch_model_ready(self, ready: bool) -> None:
+		"""Update UI when model ready state changes."""
+		self.query_one('#status', StatusPanel).model_ready = ready
+
+	def watch_model_idle(self, idle: bool) -> None:
+		"""Update UI when the model is unloaded for idleness or woken."""
+		self.query_one('#status', StatusPanel).model_idle = idle
+
+	def watch_audio_level(self, level: float) -> None:
+		"""Propagate level to status panel."""
+		self.query_one('#status', StatusPanel).audio_level = level
+
+	def watch_selected_device_name(self, name: str) -> None:
+		"""Update device display in status panel."""
+		self.query_one('#status', StatusPanel).device_name = name
+
+	def watch_selected_channel(self, channel: int) -> None:
+		"""Update channel display in status panel."""
+		self.query_one('#status', StatusPanel).channel = channel
+
+	def watch_selected_channel_count(self, count: int) -> None:
+		"""Update channel count display in status panel."""
+		self.query_one('#status', StatusPanel).channel_count = count
+
+	def action_toggle_recording(self) -> None:
+		"""Toggle audio recording on/off."""
+		if self.model_idle:
+			self._wake_model(resume_recording=self.api_configured)
+			return
+		if not self.model_ready:
+			self.notify('Model is still loading...', severity='warning')
+			return
+		if not self.api_configured:
+			self.notify(
+				'API not configured. Set base URL and API key.', severity='warning'
+			)
+			self.action_open_config()
+			return
+		if self.is_recording:
+			self.stop_recording()
+		else:
+			self.start_recording()
+
+	def action_open_config(self) -> None:
+		"""Open configuration screen with fresh instance."""
+		# Likely about to record; start reloading an idle model now
+		self._wake_model(resume_recording=False)
+		self.push_screen(ConfigScreen(self.devices))
+
+	def on_config_saved(self, event: ConfigSaved) -> None:
+		"""Handle configuration save from ConfigScreen."""
+		# Update device state
+		self.selected_device_id = event.device_id
+		self.selected_device_name = event.device_name
+		self.selected_channel = event.channel
+		self.selected_channel_count = event.channel_count
+
+		# Reload model if changed
+		if event.model != self.selected_model:
+			was_recording = self.is_recording
+			if was_recording:
+				self.stop_recording()
+			self.model_ready = False
+			self.notify(f'Loading {event.model} model...')
+			self._reload_model(event.model, was_recording)
+
+		# Update API client if changed
+		if event.base_url and event.api_key:
+			self._base_url = event.base_url
+			self._api_key = event.api_key
+			if self.api_client is not None:
+				self.api_client.close()
+			self.api_client = create_api_client(
+				event.base_url, event.api_key, self.outbox
+			)
+			self.api_configured = True
+
+		# Restart audio capture if recording and device changed
+		if self.is_recording:
+			self.audio_capture.stop()
+			with self.devices.hold():
+				self.audio_capture.start(
+					device_id=event.device_id, channel=event.channel
+				)
+
+		self.notify('Configuration saved')
+
+	def _do_model_load(self, model_size: str) -> TranscriptionEngine:
+		"""Load a transcription model (runs in worker thread)."""
+		return load_transcription_engine(model_size, self._model_server)
+
+	@work(thread=True, exclusive=True, group='model_reload')
+	def _load_initial_model(self) -> None:
+		"""Load the initial transcription model in a background thread."""
+		try:
+			self.transcription_engine = self._do_model_load(self._initial_model_size)
+			self.call_from_thread(self._on_initial_model_loaded)
+		except Exception as e:
+			log.exception(f'Failed to load model: {e}')
+			self.call_from_thread(
+				self.notify, f'Failed to load model: {e}', severity='error'
+			)
+			self.call_from_thread(self._on_model_load_failed)
+
+	def _on_initial_model_loaded(self) -> None:
+		"""Called when initial model loading completes."""
+		self._set_model_active()
+		self.notify(f'Model {self._initial_model_size} ready')
+
+	def _on_model_load_failed(self) -> None:
+		"""Called when model loading fails - prompt user to configure."""
+		self.push_screen(ConfigScreen(self.devices))
+
+	@work(thread=True, exclusive=True, group='model_reload')
+	def _reload_model(self, new_model: str, resume_recording: bool) -> None:
+		"""Reload the transcription model in a background thread."""
+		try:
+			# Let the last recording finish transcribing with the old model
+			if self._pipeline is not None:
+				self._pipeline.join()
+			# Unload current model if exists
+			if self.transcription_engine is not None:
+				self.transcription_engine.unload()
+			self._drop_step_engines()
+
+			self.transcription_engine = self._do_model_load(new_model)
+			self.call_from_thread(self._on_model_loaded, new_model, resume_recording)
+		except Exception as e:
+			log.exception(f'Failed to load model: {e}')
+			self.call_from_thread(
+				self.notify, f'Failed to load model: {e}', severity='error'
+			)
+			self.call_from_thread(setattr, self, 'model_ready', True)
+
+	def _on_model_loaded(self, new_model: str, resume_recording: bool) -> None:
+		"""Called when model loading completes."""
+		self.selected_model = new_model
+		self.is_loading = False
+		self._reset_governor()
+		self._set_model_active()
+		save_model_size(new_model)
+		self.notify(f'Model changed to {new_model}')
+
+		if resume_recording:
+			self.start_recording()
+
+	def start_recording(self) -> None:
+		"""Start audio capture and transcription."""
+		self.is_recording = True
+		# A fresh queue per recording: the last one may still be draining
+		self.audio_queue = Queue()
+		self.audio_capture.audio_queue = self.audio_queue
+		with self.devices.hold():
+			self.audio_capture.start(
+				device_id=self.selected_device_id,
+				channel=self.selected_channel,
+			)
+		self._start_pipeline()
+
+	def stop_recording(self) -> None:
+		"""Stop audio capture; audio already captured is still transcribed."""
+		self.is_recording = False
+		self.audio_capture.stop()
+		if self._pipeline is not None:
+			self._pipeline.stop()
+		self._last_active = time.monotonic()
+
+	def action_quit(self) -> None:
+		"""Handle quit action - stop audio before exiting."""
+		if self.is_recording:
+			self.stop_recording()
+		if self._pipeline is not None:
+			self._pipeline.cancel()
+		self.devices.close()
+		if self.api_client is not None:
+			self.api_client.close()
+		self.outbox.close()
+		if self.recorder is not None:
+			self.recorder.close()
+		if self.bleep is not None:
+			self.bleep.close()
+		self.exit()
+
+	@property
+	def _queued_seconds(self) -> float:
+		pipeline = self._pipeline
+		return pipeline.queued_seconds if pipeline is not None else 0.0
+
+	def _start_pipeline(self) -> None:
+		"""Start transcribing this recording's audio queue."""
+		# Engine is guaranteed to exist because recording requires model_ready=True
+		assert self.transcription_engine is not None, 'Engine must be loaded'
+		self._pipeline = transcription_pipeline(
+			self.audio_queue,
+			self.transcription_engine,
+			self.swear_detector,
+			on_text=self._on_text,
+			report=self._report_swears,
+			stats=self.pipeline_stats,
+			on_words=self.bleep.on_words if self.bleep is not None else None,
+			select_engine=self._decode_engine,
+		)
+		self._pipeline.start()
@@ -1,21 +1,46 @@
 """Audio capture module using sounddevice for microphone input."""
 
+import time
 from queue import Queue
-from typing import Any, Callable, cast
+from typing import TYPE_CHECKING, Any, Callable, cast
 
 import numpy as np
-import sounddevice as sd
+
+if TYPE_CHECKING:
+	import sounddevice as sd
 
 from logging_setup import get_logger
+from metrics import metrics
+from tracing import tracer
 
 log = get_logger(__name__)
 
+# sounddevice is imported where it is used: importing it loads PortAudio and
+# enumerates every audio device, which is slow on machines with many virtual
+# devices and should not delay startup.
+
 SAMPLE_RATE = 16000
 CHANNELS = 1
 DTYPE = 'float32'
+# Capture formats; int16 halves every buffer between the callback and the
+# model, and is converted to float32 once, in normalize_audio()
+SAMPLE_FORMATS = ('float32', 'int16')
+INT16_FULL_SCALE = 32768.0
 BLOCKSIZE = 1024
 
 
+def mean_square(chunk: np.ndarray) -> float:
+	"""Mean square of a non-empty float32 or int16 chunk, full scale = 1.0."""
+	samples = chunk.reshape(-1)
+	if samples.dtype == np.int16:
+		# int16 products overflow; einsum accumulates them exactly in int64
+		# through a small internal buffer instead of converting the chunk
+		total = np.einsum('i,i->', samples, samples, dtype=np.int64)
+		return float(total) / samples.size / INT16_FULL_SCALE**2
+	# vdot avoids a squared temporary
+	return float(np.vdot(samples, samples)) / samples.size
+
+
 class AudioCapture:
 	"""Captures audio from microphone using sounddevice."""
 
@@ -24,11 +49,16 @@ class AudioCapture:
 		audio_queue: Queue,
 		on_error: Callable[[str], None] | None = None,
 		on_level: Callable[[float], None] | None = None,
+		on_chunk: Callable[[int, np.ndarray], None] | None = None,
+		dtype: str = DTYPE,
 	):
 		self.audio_queue = audio_queue
+		self.dtype = dtype
 		self.on_error = on_error
 		self.on_level = on_level
-		self.stream: sd.InputStream | None = None
+		# Also receives every (capture_ns, chunk); must not block
+		self.on_chunk = on_chunk
+		self.stream: 'sd.InputStream | None' = None
 		self._running = False
 		self._device_id: int | None = None
 		self._channel: int = 0
@@ -39,11 +69,19 @@ class AudioCapture:
 		indata: np.ndarray,
 		frames: int,
 		time_info: dict,
-		status: sd.CallbackFlags,
+		status: 'sd.CallbackFlags',
 	) -> None:
-		"""Called by sounddevice for each audio block."""
-		if status and self.on_error:
-			self.on_error(f'Audio status: {status}')
+		"""Called by sounddevice for each audio block.
+
+		Queues (capture_ns, samples) so downstream stages can measure latency
+		from the moment audio arrived.
+		"""
+		captured_ns = time.perf_counter_ns()
+		if status:
+			if status.input_overflow:
+				metrics.audio_overruns.inc()
+			if self.on_error:
+				self.on_error(f'Audio status: {status}')
 
 		# Extract selected channel if capturing multi-channel audio
 		if self._num_channels > 1:
@@ -51,11 +89,15 @@ class AudioCapture:
 		else:
 			audio_data = indata.copy()
 
-		self.audio_queue.put(audio_data)
+		self.audio_queue.put((captured_ns, audio_data))
+		if self.on_chunk:
+			self.on_chunk(captured_ns, audio_data)
+		if tracer.enabled:
+			tracer.record('capture.enqueue', captured_ns, time.perf_counter_ns())
 
 		# Calculate RMS level and emit via callback
 		if self.on_level:
-			rms = np.sqrt(np.mean(audio_data**2))
+			rms = np.sqrt(mean_square(audio_data))
 			# Convert to dB scale for perceptually accurate metering
 			# Reference: 0 dB = max level (1.0), -60 dB = silence
 			if rms > 0:
@@ -71,6 +113,8 @@ class AudioCapture:
 		if self._running:
 			return
 
+		import sounddevice as sd
+
 		self._device_id = device_id
 		self._channel = channel
 
@@ -93,7 +137,7 @@ class AudioCapture:
 		self.stream = sd.InputStream(
 			samplerate=SAMPLE_RATE,
 			channels=self._num_channels,
-			dtype=DTYPE,
+			dtype=self.dtype,
 			callback=self._audio_callback,
 			blocksize=BLOCKSIZE,
 			device=device_id,
@@ -128,6 +172,8 @@ class AudioCapture:
 	@staticmethod
 	def list_devices() -> list[dict]:
 		"""List available audio input devices."""
+		import sounddevice as sd
+
 		devices = sd.query_devices()
 		input_devices = []
 		for i, dev in enumerate(devices):
@@ -144,6 +190,8 @@ class AudioCapture:
 	@staticmethod
 	def validate_device(device_id: int) -> bool:
 		"""Check if a device ID is valid and has input channels."""
+		import sounddevice as sd
+
 		try:
 			device = cast(dict[str, Any], sd.query_devices(device_id))
 			return device['max_input_channels'] > 0
@@ -153,6 +201,8 @@ class AudioCapture:
 	@staticmethod
 	def get_device_channels(device_id: int) -> int:
 		"""Get the number of input channels for a device."""
+		import sounddevice as sd
+
 		try:
 			device = cast(dict[str, Any], sd.query_devices(device_id))
 			return device['max_input_channels']
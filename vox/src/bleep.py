@@ -0,0 +1,347 @@
+"""Bleep output: the microphone played back on a fixed delay, swears removed.
+
+Every captured chunk is written into a DelayLine at the position its capture
+time gives it and is read out `delay` seconds later, on the default output
+device or, for headless testing, as s16le mono PCM at 16 kHz to a file or
+named pipe. Meanwhile the transcription pipeline decodes each window with
+word timestamps and clears it: the window's span is marked as checked, and
+every swear SwearDetector finds in it (padded by BLEEP_PAD_SECONDS) is
+marked for replacement with a tone or silence.
+
+Playback fails closed and the delay never changes:
+- Audio whose window has not been cleared when it is due (the model is
+  behind the delay budget, or the decode failed) is replaced, never played
+  unchecked.
+- Audio that arrives after its slot has played (an underrun) is dropped;
+  the slot plays as silence.
+Each replaced span is counted in vox_bleeps_total by reason.
+
+The delay has to cover a whole window plus queueing and decode: the first
+sample of a window is only cleared BUFFER_DURATION_SECONDS after capture,
+once the window is complete and decoded.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+	import sounddevice as sd
+
+	from swear_detection import SwearDetector
+	from transcription import TimedWord
+
+from audio import BLOCKSIZE, INT16_FULL_SCALE, SAMPLE_RATE
+from config import DEFAULT_BLEEP_DELAY_SECONDS
+from logging_setup import get_logger
+from metrics import metrics
+from processing import BUFFER_DURATION_SECONDS
+
+log = get_logger(__name__)
+
+BLEEP_SOUNDS = ('tone', 'silence')
+TONE_HZ = 1000
+TONE_LEVEL = 0.25
+# Word timestamps are ~0.1 s accurate; widen each bleep by this on each side
+BLEEP_PAD_SECONDS = 0.1
+# Capture or playback this far off the position the clock predicts is
+# treated as a discontinuity rather than jitter
+RESYNC_SAMPLES = SAMPLE_RATE // 4
+# Audio held beyond the delay, for chunks captured ahead of the clock
+RING_MARGIN_SAMPLES = 2 * SAMPLE_RATE
+
+
+def _add_span(spans: list[list[int]], start: int, end: int) -> None:
+	"""Add [start, end) to a sorted list of disjoint spans, merging overlaps."""
+	spans.append([start, end])
+	spans.sort()
+	merged = [spans[0]]
+	for span in spans[1:]:
+		if span[0] <= merged[-1][1]:
+			merged[-1][1] = max(merged[-1][1], span[1])
+		else:
+			merged.append(span)
+	spans[:] = merged
+
+
+def _mark(mask: np.ndarray, start: int, end: int, value: bool) -> None:
+	"""Set mask[start:end] to value, clipped to the mask."""
+	start = max(start, 0)
+	end = min(end, len(mask))
+	if start < end:
+		mask[start:end] = value
+
+
+class DelayLine:
+	"""Captured audio indexed by sample position, read back `delay` later.
+
+	Positions count samples since `origin_ns` on the capture clock
+	(time.perf_counter_ns), so audio captured after a pause lands where it
+	belongs and the gap plays as silence. Not thread-safe; BleepOutput
+	serializes access. Times are passed in so benchmarks can simulate them.
+	"""
+
+	def __init__(self, delay: float, sound: str = 'tone', origin_ns: int = 0):
+		self.delay = int(delay * SAMPLE_RATE)
+		self.sound = sound
+		self.origin_ns = origin_ns
+		self._capacity = self.delay + RING_MARGIN_SAMPLES
+		self._ring = np.zeros(self._capacity, dtype=np.float32)
+		# Positions of the first sample ever written and the end of the last
+		self._first: int | None = None
+		self._written = 0
+		self._played: int | None = None
+		# capture_ns of each chunk still held -> its start position
+		self._chunk_starts: dict[int, int] = {}
+		# Spans checked by the model (or known silent), and spans to replace
+		self._cleared: list[list[int]] = []
+		self._bleeps: list[tuple[int, int]] = []
+		self._late = False
+		self.bleeped = 0
+		self.late_samples = 0
+		self.underrun_samples = 0
+
+	def position(self, ns: int) -> int:
+		"""Sample position of a capture clock time."""
+		return (ns - self.origin_ns) * SAMPLE_RATE // 1_000_000_000
+
+	def write(self, captured_ns: int, chunk: np.ndarray) -> None:
+		"""Add a chunk whose last sample was captured at captured_ns."""
+		samples = chunk.reshape(-1)
+		if samples.dtype == np.int16:
+			samples = samples.astype(np.float32) / INT16_FULL_SCALE
+		start = self.position(captured_ns) - len(samples)
+		if self._first is None:
+			self._first = self._written = start
+		if abs(start - self._written) <= RESYNC_SAMPLES:
+			# Contiguous with the last chunk; absorb callback jitter
+			start = self._written
+		elif start > self._written:
+			# Capture paused: the gap is silence, nothing to check
+			fill = min(start - self._written, self._capacity)
+			self._store(start - fill, np.zeros(fill, dtype=np.float32))
+			_add_span(self._cleared, self._written, start)
+		end = start + len(samples)
+
+		if self._played is not None and start < self._played:
+			self.underrun_samples += min(end, self._played) - start
+			metrics.bleeps.inc('underrun')
+		self._store(start, samples)
+		self._written = end
+		self._chunk_starts[captured_ns] = start
+		for oldest, position in list(self._chunk_starts.items()):
+			if position >= end - self._capacity:
+				break
+			del self._chunk_starts[oldest]
+
+	def clear(
+		self, started_ns: int, samples: int, swears: list[tuple[float, float]]
+	) -> bool:
+		"""Mark a window as checked and bleep its swears.
+
+		Args:
+			started_ns: capture_ns of the window's first chunk.
+			samples: Window length.
+			swears: (start, end) seconds of each swear from the window start.
+
+		Returns:
+			False if the window's audio is no longer held (already played).
+		"""
+		start = self._chunk_starts.get(started_ns)
+		if start is None:
+			return False
+		_add_span(self._cleared, start, start + samples)
+		pad = BLEEP_PAD_SECONDS * SAMPLE_RATE
+		for begin, end in swears:
+			self._bleeps.append((
+				start + int(begin * SAMPLE_RATE - pad),
+				start + int(end * SAMPLE_RATE + pad),
+			))
+			self.bleeped += 1
+			metrics.bleeps.inc('swear')
+		return True
+
+	def read(self, frames: int, now_ns: int) -> np.ndarray:
+		"""The next `frames` samples of output, due at now_ns."""
+		due = self.position(now_ns) - self.delay
+		if self._played is None or abs(self._played - due) > RESYNC_SAMPLES:
+			self._played = due
+		start = self._played
+		end = start + frames
+		self._played = end
+
+		out = np.zeros(frames, dtype=np.float32)
+		if self._first is None:
+			return out
+		first = max(start, self._first, self._written - self._capacity)
+		last = min(end, self._written)
+		if first >= last:
+			# Nothing captured for this slot: silence
+			self._late = False
+			return out
+		out[first - start : last - start] = self._load(first, last - first)
+
+		replace = np.zeros(frames, dtype=bool)
+		_mark(replace, first - start, last - start, True)
+		for span_start, span_end in self._cleared:
+			_mark(replace, span_start - start, span_end - start, False)
+		late = int(np.count_nonzero(replace))
+		if late:
+			self.late_samples += late
+			if not self._late:
+				metrics.bleeps.inc('late')
+		self._late = bool(late)
+		for span_start, span_end in self._bleeps:
+			_mark(
+				replace,
+				max(span_start, first) - start,
+				min(span_end, last) - start,
+				True,
+			)
+
+		if replace.any():
+			if self.sound == 'tone':
+				phase = np.arange(start, end) * (2 * np.pi * TONE_HZ / SAMPLE_RATE)
+				out[replace] = TONE_LEVEL * np.sin(phase[replace])
+			else:
+				out[replace] = 0.0
+		self._cleared = [span for span in self._cleared if span[1] > end]
+		self._bleeps = [span for span in self._bleeps if span[1] > end]
+		return out
+
+	def _store(self, start: int, samples: np.ndarray) -> None:
+		# Only the newest `capacity` samples of an oversized write survive
+		start += max(0, len(samples) - self._capacity)
+		samples = samples[-self._capacity :]
+		begin = start % self._capacity
+		head = min(len(samples), self._capacity - begin)
+		self._ring[begin : begin + head] = samples[:head]
+		self._ring[: len(samples) - head] = samples[head:]
+
+	def _load(self, start: int, count: int) -> np.ndarray:
+		begin = start % self._capacity
+		head = min(count, self._capacity - begin)
+		return np.concatenate(
+			(self._ring[begin : begin + head], self._ring[: count - head])
+		)
+
+
+class BleepOutput:
+	"""Delayed, bleeped copy of the captured audio.
+
+	feed() is the capture sink and on_words() the pipeline hook; both only
+	touch memory. Call start() to open the output and close() to stop it.
+	"""
+
+	def __init__(
+		self,
+		swear_detector: 'SwearDetector',
+		delay: float = DEFAULT_BLEEP_DELAY_SECONDS,
+		sound: str = 'tone',
+		sink: Path | None = None,
+	):
+		"""Create the output.
+
+		Args:
+			swear_detector: Finds the swears to bleep in each window's words.
+			delay: Seconds between capture and playback.
+			sound: 'tone' or 'silence' in place of each swear.
+			sink: Write PCM here instead of playing it (a file or named pipe).
+		"""
+		if delay <= BUFFER_DURATION_SECONDS:
+			log.warning(
+				f'Bleep delay {delay:g}s does not cover a '
+				f'{BUFFER_DURATION_SECONDS:g}s window plus decode; most audio '
+				'will be muted before it is checked'
+			)
+		self.delay = delay
+		self.sink = sink
+		self._detector = swear_detector
+		self._line = DelayLine(delay, sound, time.perf_counter_ns())
+		self._lock = threading.Lock()
+		self._stream: sd.OutputStream | None = None
+		self._stop = threading.Event()
+		self._thread: threading.Thread | None = None
+
+	def start(self) -> None:
+		if self.sink is not None:
+			self._thread = threading.Thread(
+				target=self._run_sink, name='bleep-sink', daemon=True
+			)
+			self._thread.start()
+			log.info(f'Bleep output to {self.sink} on a {self.delay:g}s delay')
+			return
+		import sounddevice as sd
+
+		self._stream = sd.OutputStream(
+			samplerate=SAMPLE_RATE,
+			channels=1,
+			dtype='float32',
+			blocksize=BLOCKSIZE,
+			callback=self._output_callback,
+		)
+		self._stream.start()
+		log.info(f'Bleep output on the default device on a {self.delay:g}s delay')
+
+	def feed(self, captured_ns: int, chunk: np.ndarray) -> None:
+		"""Queue a captured chunk for playback (called on the audio thread)."""
+		with self._lock:
+			self._line.write(captured_ns, chunk)
+
+	def on_words(self, started_ns: int, samples: int, words: list['TimedWord']) -> None:
+		"""Pipeline hook: a window has been checked; bleep the swears in it."""
+		matches = self._detector.locate_words([word.word for word in words])
+		swears = [(words[first].start, words[last].end) for _, first, last in matches]
+		with self._lock:
+			cleared = self._line.clear(started_ns, samples, swears)
+		if not cleared:
+			log.debug(f'Window checked after its audio played ({len(swears)} swears)')
+
+	def _output_callback(
+		self,
+		outdata: np.ndarray,
+		frames: int,
+		time_info: dict,
+		status: 'sd.CallbackFlags',
+	) -> None:
+		if status.output_underflow:
+			metrics.bleeps.inc('underrun')
+		with self._lock:
+			outdata[:, 0] = self._line.read(frames, time.perf_counter_ns())
+
+	def _run_sink(self) -> None:
+		"""Background thread: write one block per block duration to the sink."""
+		assert self.sink is not None
+		block_ns = BLOCKSIZE * 1_000_000_000 // SAMPLE_RATE
+		try:
+			# Opening a named pipe blocks until a reader opens it
+			with open(self.sink, 'wb') as sink:
+				due_ns = time.perf_counter_ns()
+				while not self._stop.is_set():
+					with self._lock:
+						block = self._line.read(BLOCKSIZE, due_ns)
+					pcm = (np.clip(block, -1.0, 1.0) * 32767).astype('<i2')
+					sink.write(pcm.tobytes())
+					sink.flush()
+					due_ns += block_ns
+					self._stop.wait(max(0, due_ns - time.perf_counter_ns()) / 1e9)
+		except OSError as e:
+			log.error(f'Bleep output to {self.sink} stopped: {e}')
+
+	def close(self) -> None:
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join(timeout=1.0)
+		if self._stream is not None:
+			self._stream.stop()
+			self._stream.close()
+			self._stream = None
+		line = self._line
+		log.info(
+			f'Bleep output closed: {line.bleeped} bleeped, '
+			f'{line.late_samples / SAMPLE_RATE:.1f}s muted unchecked, '
+			f'{line.underrun_samples / SAMPLE_RATE:.1f}s dropped late'
+		)
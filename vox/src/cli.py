@@ -1,11 +1,24 @@
 """CLI argument parsing for Vox."""
 
 import argparse
+import re
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import Path
 
+from config import (
+	DEFAULT_BLEEP_DELAY_SECONDS,
+	DEFAULT_RECORD_MINUTES,
+	MODEL_SERVER_SOCKET,
+	RECORDER_FILE,
+)
+from logging_setup import LOG_LEVELS
 
 MODEL_SIZES = ['tiny', 'base', 'small', 'medium', 'large']
+# Mirrors audio.SAMPLE_FORMATS (not imported: audio pulls in numpy)
+SAMPLE_FORMATS = ['float32', 'int16']
+# Mirrors bleep.BLEEP_SOUNDS
+BLEEP_SOUNDS = ['tone', 'silence']
 
 
 @dataclass
@@ -16,6 +29,51 @@ class VoxArgs:
 	api_key: str | None
 	word_list: Path
 	model_size: str | None
+	headless: bool
+	log_level: str | None
+	trace: Path | None
+	metrics_port: int | None
+	model_server: Path | None
+	ingest: str | None
+	speculative: str | None
+	record: float | None
+	sample_format: str
+	transcript_file: Path | None
+	bleep: float | None
+	bleep_to: Path | None
+	bleep_sound: str
+
+
+@dataclass
+class ScanArgs:
+	"""Parsed arguments for `vox scan`."""
+
+	file: Path
+	out: Path | None
+	format: str | None
+	word_list: Path
+	model_size: str | None
+	workers: int | None
+	chunk_seconds: float
+	language: str
+	restart: bool
+	log_level: str | None
+
+
+@dataclass
+class ReanalyzeArgs:
+	"""Parsed arguments for `vox reanalyze`."""
+
+	start: float
+	end: float
+	recording: Path
+	out: Path | None
+	format: str | None
+	word_list: Path
+	model_size: str | None
+	chunk_seconds: float
+	language: str
+	log_level: str | None
 
 
 def get_default_word_list() -> Path:
@@ -37,6 +95,8 @@ def parse_args() -> VoxArgs:
 	parser = argparse.ArgumentParser(
 		prog='vox',
 		description='Speech-to-text TUI with swear word detection',
+		epilog='Run "vox scan --help" to scan a recording offline, or '
+		'"vox reanalyze --help" to re-check audio kept by --record.',
 	)
 
 	parser.add_argument(
@@ -72,8 +132,147 @@ def parse_args() -> VoxArgs:
 		help='Whisper model size (overrides saved config)',
 	)
 
+	parser.add_argument(
+		'--headless',
+		action='store_true',
+		help='Run without the TUI, emitting JSON-lines events on stdout',
+	)
+
+	parser.add_argument(
+		'--log-level',
+		type=str.upper,
+		choices=LOG_LEVELS,
+		default=None,
+		help='Minimum level written to vox_debug.log (overrides saved config)',
+	)
+
+	parser.add_argument(
+		'--trace',
+		type=Path,
+		default=None,
+		metavar='OUT.json',
+		help='Record per-stage pipeline spans and write a Chrome trace on exit',
+	)
+
+	parser.add_argument(
+		'--metrics-port',
+		type=int,
+		default=None,
+		metavar='PORT',
+		help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics',
+	)
+
+	parser.add_argument(
+		'--model-server',
+		type=Path,
+		nargs='?',
+		const=MODEL_SERVER_SOCKET,
+		default=None,
+		metavar='SOCKET',
+		help='Transcribe on a shared model server (src/model_server.py) instead '
+		'of loading the model in this process',
+	)
+
+	parser.add_argument(
+		'--ingest',
+		type=str,
+		default=None,
+		metavar='ADDRESS',
+		help='With --headless, transcribe PCM streamed to HOST:PORT or a Unix '
+		'socket path instead of the microphone (see src/ingest.py)',
+	)
+
+	parser.add_argument(
+		'--speculative',
+		choices=MODEL_SIZES,
+		nargs='?',
+		const='tiny',
+		default=None,
+		metavar='MODEL',
+		help='With --headless, report swears from a fast MODEL (default: tiny) on '
+		'~1s windows right away and correct them once the full model has run',
+	)
+
+	parser.add_argument(
+		'--record',
+		type=float,
+		nargs='?',
+		const=DEFAULT_RECORD_MINUTES,
+		default=None,
+		metavar='MINUTES',
+		help='Keep the last MINUTES of microphone audio '
+		f'(default: {DEFAULT_RECORD_MINUTES:g}) on disk for "vox reanalyze"',
+	)
+
+	parser.add_argument(
+		'--sample-format',
+		choices=SAMPLE_FORMATS,
+		default='float32',
+		help='Capture format; int16 halves audio memory up to inference '
+		'(default: float32)',
+	)
+
+	parser.add_argument(
+		'--transcript-file',
+		type=Path,
+		default=None,
+		metavar='FILE',
+		help='Append the whole transcript to FILE (the TUI keeps the most '
+		'recent 10000 lines in memory and writes older ones out as it goes; '
+		'scrollback and search read them back from FILE)',
+	)
+
+	parser.add_argument(
+		'--bleep',
+		type=float,
+		nargs='?',
+		const=DEFAULT_BLEEP_DELAY_SECONDS,
+		default=None,
+		metavar='DELAY',
+		help='Play the microphone back DELAY seconds late '
+		f'(default: {DEFAULT_BLEEP_DELAY_SECONDS:g}) with swears bleeped; audio '
+		'not yet checked by the model when due is muted',
+	)
+
+	parser.add_argument(
+		'--bleep-to',
+		type=Path,
+		default=None,
+		metavar='FILE',
+		help='With --bleep, write s16le 16 kHz mono PCM to FILE (or a named pipe) '
+		'instead of the default output device',
+	)
+
+	parser.add_argument(
+		'--bleep-sound',
+		choices=BLEEP_SOUNDS,
+		default='tone',
+		help='What replaces a swear in the --bleep output (default: tone)',
+	)
+
 	args = parser.parse_args()
 
+	if args.record is not None and args.record <= 0:
+		parser.error('--record needs a positive number of minutes')
+	if args.record is not None and args.ingest is not None:
+		parser.error('--record keeps microphone audio and cannot be used with --ingest')
+	if args.ingest is not None and not args.headless:
+		parser.error('--ingest requires --headless')
+	if args.speculative is not None and not args.headless:
+		parser.error('--speculative requires --headless')
+	if args.transcript_file is not None and args.headless:
+		parser.error('--transcript-file is for the TUI; --headless prints transcripts')
+	if args.bleep is not None and args.bleep <= 0:
+		parser.error('--bleep needs a positive delay in seconds')
+	if args.bleep_to is not None and args.bleep is None:
+		parser.error('--bleep-to requires --bleep')
+	if args.bleep is not None and args.ingest is not None:
+		parser.error('--bleep delays the microphone and cannot be used with --ingest')
+	if args.bleep is not None and args.speculative is not None:
+		parser.error('--bleep cannot be used with --speculative')
+	if args.bleep is not None and args.model_server is not None:
+		parser.error('--bleep needs word timestamps, which --model-server lacks')
+
 	word_list = args.word_list if args.word_list else get_default_word_list()
 
 	if not word_list.exists():
@@ -84,4 +283,244 @@ def parse_args() -> VoxArgs:
 		api_key=args.api_key,
 		word_list=word_list,
 		model_size=args.model_size,
+		headless=args.headless,
+		log_level=args.log_level,
+		trace=args.trace,
+		metrics_port=args.metrics_port,
+		model_server=args.model_server,
+		ingest=args.ingest,
+		speculative=args.speculative,
+		record=args.record,
+		sample_format=args.sample_format,
+		transcript_file=args.transcript_file,
+		bleep=args.bleep,
+		bleep_to=args.bleep_to,
+		bleep_sound=args.bleep_sound,
+	)
+
+
+def parse_scan_args(argv: list[str]) -> ScanArgs:
+	"""Parse `vox scan` arguments (everything after "scan").
+
+	Returns:
+		ScanArgs dataclass with parsed values.
+
+	Raises:
+		SystemExit: If arguments are missing or invalid.
+	"""
+	parser = argparse.ArgumentParser(
+		prog='vox scan',
+		description='Scan a recording for swears and write a timestamped report',
+	)
+	parser.add_argument(
+		'file', type=Path, help='Recording (WAV, or anything ffmpeg can read)'
+	)
+	parser.add_argument(
+		'-o',
+		'--out',
+		type=Path,
+		default=None,
+		help='Report path (default: <file>.swears.json next to the recording)',
+	)
+	parser.add_argument(
+		'--format',
+		choices=['json', 'csv'],
+		default=None,
+		help='Report format (default: from --out extension, else json)',
+	)
+	parser.add_argument(
+		'-w',
+		'--word-list',
+		type=Path,
+		default=None,
+		help='Path to swear words file (default: vox/swear_words.txt)',
+	)
+	parser.add_argument(
+		'-m',
+		'--model-size',
+		type=str,
+		choices=MODEL_SIZES,
+		default=None,
+		help='Whisper model size (default: saved config)',
+	)
+	parser.add_argument(
+		'-j',
+		'--workers',
+		type=int,
+		default=None,
+		help='Worker processes, each with its own model (default: CPU count)',
+	)
+	parser.add_argument(
+		'--chunk-seconds',
+		type=float,
+		default=30.0,
+		help='Longest chunk; cuts fall at the quietest point past half of it',
+	)
+	parser.add_argument('--language', type=str, default='en')
+	parser.add_argument(
+		'--restart',
+		action='store_true',
+		help='Ignore progress saved by an interrupted scan',
+	)
+	parser.add_argument(
+		'--log-level',
+		type=str.upper,
+		choices=LOG_LEVELS,
+		default=None,
+		help='Minimum level written to vox_debug.log (overrides saved config)',
+	)
+
+	args = parser.parse_args(argv)
+
+	word_list = args.word_list if args.word_list else get_default_word_list()
+	if not word_list.exists():
+		parser.error(f'Word list file not found: {word_list}')
+	if args.workers is not None and args.workers < 1:
+		parser.error('--workers must be at least 1')
+	if args.chunk_seconds < 1:
+		parser.error('--chunk-seconds must be at least 1')
+
+	return ScanArgs(
+		file=args.file,
+		out=args.out,
+		format=args.format,
+		word_list=word_list,
+		model_size=args.model_size,
+		workers=args.workers,
+		chunk_seconds=args.chunk_seconds,
+		language=args.language,
+		restart=args.restart,
+		log_level=args.log_level,
+	)
+
+
+_RELATIVE_TIME = re.compile(r'-?(\d+(?:\.\d+)?)([smh])')
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def parse_time(value: str, now: datetime | None = None) -> float:
+	"""Parse a point in time as Unix seconds.
+
+	Accepts "now", a duration ago ("90s", "5m", "-1.5h"), a clock time
+	("14:05" or "14:05:30", the most recent one) or an ISO 8601 date and time.
+
+	Raises:
+		ValueError: If the value is none of these.
+	"""
+	now = now or datetime.now()
+	value = value.strip()
+	if value == 'now':
+		return now.timestamp()
+	if match := _RELATIVE_TIME.fullmatch(value):
+		amount, unit = match.groups()
+		return now.timestamp() - float(amount) * _UNIT_SECONDS[unit]
+	for clock_format in ('%H:%M', '%H:%M:%S'):
+		try:
+			clock = datetime.strptime(value, clock_format).time()
+		except ValueError:
+			continue
+		moment = datetime.combine(now.date(), clock)
+		if moment > now:
+			moment -= timedelta(days=1)
+		return moment.timestamp()
+	try:
+		return datetime.fromisoformat(value).timestamp()
+	except ValueError:
+		raise ValueError(
+			f'unrecognized time {value!r} (use HH:MM[:SS], 5m, or an ISO date)'
+		) from None
+
+
+def parse_reanalyze_args(argv: list[str]) -> ReanalyzeArgs:
+	"""Parse `vox reanalyze` arguments (everything after "reanalyze").
+
+	Returns:
+		ReanalyzeArgs dataclass with parsed values.
+
+	Raises:
+		SystemExit: If arguments are missing or invalid.
+	"""
+	parser = argparse.ArgumentParser(
+		prog='vox reanalyze',
+		description='Re-run audio kept by --record through a model and word list',
+		epilog='Times are HH:MM[:SS] (most recent), a duration ago such as 5m, '
+		'or an ISO 8601 date and time.',
+	)
+	parser.add_argument('start', metavar='FROM', help='Start of the range')
+	parser.add_argument(
+		'end', metavar='TO', nargs='?', default='now', help='End (default: now)'
+	)
+	parser.add_argument(
+		'--recording',
+		type=Path,
+		default=RECORDER_FILE,
+		help=f'Flight recorder file (default: {RECORDER_FILE}; further vox '
+		'instances record to numbered siblings such as flight-recorder-1.pcm)',
+	)
+	parser.add_argument(
+		'-o', '--out', type=Path, default=None, help='Also write a report here'
+	)
+	parser.add_argument(
+		'--format',
+		choices=['json', 'csv'],
+		default=None,
+		help='Report format (default: from --out extension, else json)',
+	)
+	parser.add_argument(
+		'-w',
+		'--word-list',
+		type=Path,
+		default=None,
+		help='Path to swear words file (default: vox/swear_words.txt)',
+	)
+	parser.add_argument(
+		'-m',
+		'--model-size',
+		type=str,
+		choices=MODEL_SIZES,
+		default=None,
+		help='Whisper model size (default: saved config)',
+	)
+	parser.add_argument(
+		'--chunk-seconds',
+		type=float,
+		default=30.0,
+		help='Longest chunk; cuts fall at the quietest point past half of it',
+	)
+	parser.add_argument('--language', type=str, default='en')
+	parser.add_argument(
+		'--log-level',
+		type=str.upper,
+		choices=LOG_LEVELS,
+		default=None,
+		help='Minimum level written to vox_debug.log (overrides saved config)',
+	)
+
+	args = parser.parse_args(argv)
+
+	now = datetime.now()
+	try:
+		start = parse_time(args.start, now)
+		end = parse_time(args.end, now)
+	except ValueError as e:
+		parser.error(str(e))
+	if end <= start:
+		parser.error('TO must be after FROM')
+	word_list = args.word_list if args.word_list else get_default_word_list()
+	if not word_list.exists():
+		parser.error(f'Word list file not found: {word_list}')
+	if args.chunk_seconds < 1:
+		parser.error('--chunk-seconds must be at least 1')
+
+	return ReanalyzeArgs(
+		start=start,
+		end=end,
+		recording=args.recording,
+		out=args.out,
+		format=args.format,
+		word_list=word_list,
+		model_size=args.model_size,
+		chunk_seconds=args.chunk_seconds,
+		language=args.language,
+		log_level=args.log_level,
 	)
@@ -6,6 +6,17 @@ from typing import TypedDict, cast
 
 CONFIG_DIR = Path.home() / '.config' / 'vox'
 CONFIG_FILE = CONFIG_DIR / 'settings.json'
+OUTBOX_FILE = CONFIG_DIR / 'outbox.log'
+# Default socket of the shared model server
+MODEL_SERVER_SOCKET = CONFIG_DIR / 'model-server.sock'
+# Rolling capture kept by --record, re-checked with `vox reanalyze`
+RECORDER_FILE = CONFIG_DIR / 'flight-recorder.pcm'
+DEFAULT_RECORD_MINUTES = 30.0
+# Capture-to-playback delay of --bleep; must cover a window plus its decode
+DEFAULT_BLEEP_DELAY_SECONDS = 5.0
+
+# Minutes without recording before the model is unloaded (0 disables)
+DEFAULT_IDLE_UNLOAD_MINUTES = 15.0
 
 
 class VoxConfig(TypedDict, total=False):
@@ -17,6 +28,11 @@ class VoxConfig(TypedDict, total=False):
 	base_url: str | None
 	api_key: str | None
 	model_size: str | None
+	rate_limit_requests: int | None
+	rate_limit_window: float | None
+	log_level: str | None
+	idle_unload_minutes: float | None
+	adaptive_model: bool | None
 
 
 # Module-level cache to avoid repeated disk I/O
@@ -123,3 +139,33 @@ def save_model_size(size: str) -> None:
 	config = load_config()
 	config['model_size'] = size
 	save_config(config)
+
+
+def get_rate_limit() -> tuple[int | None, float | None]:
+	"""Get client-side API rate limit overrides.
+
+	Returns:
+		Tuple of (max_requests, window_seconds). Either may be None if not set.
+	"""
+	config = load_config()
+	return config.get('rate_limit_requests'), config.get('rate_limit_window')
+
+
+def get_log_level() -> str | None:
+	"""Get saved log level (None if not set)."""
+	config = load_config()
+	return config.get('log_level')
+
+
+def get_idle_unload_minutes() -> float:
+	"""Get the idle model unload delay in minutes (0 means never unload)."""
+	config = load_config()
+	minutes = config.get('idle_unload_minutes')
+	return DEFAULT_IDLE_UNLOAD_MINUTES if minutes is None else max(0.0, minutes)
+
+
+def get_adaptive_model() -> bool:
+	"""Whether to step down to a smaller model while transcription falls behind."""
+	config = load_config()
+	enabled = config.get('adaptive_model')
+	return True if enabled is None else bool(enabled)
@@ -9,7 +9,6 @@ from textual.message import Message
 from textual.screen import Screen
 from textual.widgets import Button, Footer, Header, Input, Label, Rule, Select
 
-from audio import AudioCapture
 from config import (
 	get_api_config,
 	get_device_channel,
@@ -19,6 +18,7 @@ from config import (
 	save_device,
 	save_device_channel,
 )
+from devices import DeviceRegistry, InputDevice
 
 # Model options: (display_name, model_key)
 MODEL_OPTIONS: list[tuple[str, str]] = [
@@ -62,20 +62,27 @@ class ConfigScreen(Screen):
 		Binding(key='escape', action='app.pop_screen', description='Return'),
 	]
 
-	def __init__(self):
+	def __init__(self, registry: DeviceRegistry):
 		super().__init__()
+		self._registry = registry
 		# Flag to suppress change handlers during initial hydration
 		self._hydrating = False
 		# Set defaults - actual values loaded in on_mount
 		self.current_device_id: int | None = None
 		self.current_device_name = 'System Default'
-		self.devices: list[dict] = []
+		self.devices: list[InputDevice] = []
 		self.current_channel = 0
 		self.current_channel_count = 1
 		self.current_model = 'base'
 		self.current_base_url = ''
 		self.current_api_key = ''
 
+	def _get_device_options(self) -> list[tuple[str, int | None]]:
+		"""Generate device options from the current device list."""
+		options: list[tuple[str, int | None]] = [('System Default', None)]
+		options.extend((d.name, d.id) for d in self.devices)
+		return options
+
 	def _get_channel_options(self) -> list[tuple[str, int]]:
 		"""Generate channel options based on current channel count."""
 		return [(f'Channel {i + 1}', i) for i in range(self.current_channel_count)]
@@ -88,10 +95,8 @@ class ConfigScreen(Screen):
 			yield Label('Microphone Settings', classes='section-title')
 
 			yield Label('Device:', classes='field-label')
-			device_options: list[tuple[str, int | None]] = [('System Default', None)]
-			device_options.extend((d['name'], d['id']) for d in self.devices)
 			yield Select(
-				device_options,
+				self._get_device_options(),
 				value=self.current_device_id,
 				id='device-select',
 				classes='config-select',
@@ -165,20 +170,32 @@ class ConfigScreen(Screen):
 		self.current_device_id, self.current_device_name = get_saved_device()
 		self.current_device_name = self.current_device_name or 'System Default'
 
-		# Get devices list
-		self.devices = AudioCapture.list_devices()
+		# Cached device list; rescanned in the background for hot-plugged devices
+		# unless a stream is open
+		self.devices = list(self._registry.devices)
+		self._registry.refresh()
 
 		# Load channel config
-		if self.current_device_id is not None:
-			self.current_channel = get_device_channel(self.current_device_id)
-			self.current_channel_count = AudioCapture.get_device_channels(
-				self.current_device_id
-			)
-			if self.current_channel >= self.current_channel_count:
-				self.current_channel = 0
-		else:
-			self.current_channel = 0
-			self.current_channel_count = 1
+		self.current_channel = 0
+		self.current_channel_count = 1
+		saved_id = self.current_device_id
+		if saved_id is not None:
+			saved_channel = get_device_channel(saved_id)
+			device = self._registry.find(saved_id, self.current_device_name)
+			if device is None and not self._registry.ready:
+				# Not scanned yet: keep the saved device selectable until it is
+				device = InputDevice(
+					saved_id, self.current_device_name, saved_channel + 1, 0.0
+				)
+				self.devices.append(device)
+			if device is None:
+				self.current_device_id = None
+				self.current_device_name = 'System Default'
+			else:
+				self.current_device_id = device.id
+				self.current_channel_count = device.channels
+				if saved_channel < device.channels:
+					self.current_channel = saved_channel
 
 		# Load model config
 		self.current_model = get_model_size()
@@ -215,9 +232,7 @@ class ConfigScreen(Screen):
 		self._hydrating = True
 		# Update device select options
 		device_select = self.query_one('#device-select', Select)
-		device_options: list[tuple[str, int | None]] = [('System Default', None)]
-		device_options.extend((d['name'], d['id']) for d in self.devices)
-		device_select.set_options(device_options)
+		device_select.set_options(self._get_device_options())
 
 		# Update channel select options (hide during hydration to prevent flash)
 		channel_select = self.query_one('#channel-select', Select)
@@ -257,10 +272,7 @@ class ConfigScreen(Screen):
 
 	def _on_device_changed(self, device_id: int | None) -> None:
 		"""Update channel options when device changes."""
-		if device_id is None:
-			self.current_channel_count = 1
-		else:
-			self.current_channel_count = AudioCapture.get_device_channels(device_id)
+		self.current_channel_count = self._registry.channels(device_id)
 
 		# Update channel select options
 		channel_select = self.query_one('#channel-select', Select)
@@ -271,6 +283,34 @@ class ConfigScreen(Screen):
 		if isinstance(current_channel, int) and current_channel >= self.current_channel_count:
 			channel_select.value = 0
 
+	def update_devices(self, devices: list[InputDevice]) -> None:
+		"""Show a rescanned device list, keeping the selected device by name."""
+		if self._hydrating:
+			# Let hydration finish with the old list first
+			self.set_timer(0.1, lambda: self.update_devices(devices))
+			return
+		device_select = self.query_one('#device-select', Select)
+		selected = device_select.value
+		name = next((d.name for d in self.devices if d.id == selected), None)
+		self.devices = list(devices)
+		device = self._registry.find(
+			selected if isinstance(selected, int) else None, name
+		)
+		device_id = device.id if device is not None else None
+
+		# set_options() resets the value asynchronously (see _apply_config_to_widgets)
+		self._hydrating = True
+		device_select.set_options(self._get_device_options())
+
+		def restore_selection() -> None:
+			device_select.value = device_id
+			self._hydrating = False
+			channels = self._registry.channels(device_id)
+			if device_id != selected or channels != self.current_channel_count:
+				self._on_device_changed(device_id)
+
+		self.set_timer(0.05, restore_selection)
+
 	def on_button_pressed(self, event: Button.Pressed) -> None:
 		"""Handle button presses."""
 		if event.button.id == 'cancel-btn':
@@ -300,8 +340,8 @@ class ConfigScreen(Screen):
 		device_name = 'System Default'
 		if device_id is not None:
 			for d in self.devices:
-				if d['id'] == device_id:
-					device_name = d['name']
+				if d.id == device_id:
+					device_name = d.name
 					break
 
 		# Save device config
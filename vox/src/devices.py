@@ -0,0 +1,155 @@
+"""Cached audio input device list, enumerated off the UI thread.
+
+PortAudio enumerates every device when it initializes, which takes hundreds
+of ms on machines with many virtual devices (VoiceMeeter, OBS virtual
+audio), and it never notices devices plugged in afterwards. DeviceRegistry
+does that enumeration on its own thread and keeps the result as a snapshot
+the UI reads instantly. To pick up hot-plugged devices it re-initializes
+PortAudio when asked (the device picker asks when it opens), and only while
+no stream is open; it never rescans on a timer.
+
+Device ids are PortAudio indices and can shift when the list is rescanned,
+so a device is looked up by id only if the name still matches, otherwise by
+name.
+"""
+
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from audio import AudioCapture
+from logging_setup import get_logger
+
+log = get_logger(__name__)
+
+
+class InputDevice(NamedTuple):
+	"""One audio input device as PortAudio last listed it."""
+
+	id: int
+	name: str
+	channels: int
+	sample_rate: float
+
+
+def _rescan_portaudio() -> None:
+	"""Re-initialize PortAudio so it enumerates devices again.
+
+	This relies on sounddevice's private _terminate()/_initialize(): it has no
+	public way to rescan. Terminating PortAudio closes every open stream, so
+	callers must make sure none is open.
+	"""
+	import sounddevice as sd
+
+	sd._terminate()
+	sd._initialize()
+
+
+class DeviceRegistry:
+	"""Snapshot of input devices, rescanned on a background thread on request.
+
+	Readers never block: `devices` is empty until the first scan has
+	finished (see `ready`). on_change runs on the registry thread after
+	every scan that changes the list, including the first.
+	"""
+
+	def __init__(
+		self,
+		on_change: Callable[[list[InputDevice]], None] | None = None,
+		can_rescan: Callable[[], bool] = lambda: True,
+	):
+		"""Create the registry (call start() to scan).
+
+		Args:
+			on_change: Called with the new list when it changes.
+			can_rescan: Checked before re-initializing PortAudio; return False
+				while any input or output stream is open (a rescan would close
+				it).
+		"""
+		self.on_change = on_change
+		self._can_rescan = can_rescan
+		self._devices: list[InputDevice] = []
+		self._ready = threading.Event()
+		self._wake = threading.Event()
+		self._closed = False
+		# Held while PortAudio is re-initialized; see hold()
+		self._lock = threading.Lock()
+		self._thread = threading.Thread(
+			target=self._run, name='device-registry', daemon=True
+		)
+
+	def start(self) -> None:
+		self._thread.start()
+
+	def refresh(self) -> None:
+		"""Rescan soon (e.g. when the device picker opens); returns at once.
+
+		Skipped while can_rescan() is False; the current list is kept.
+		"""
+		self._wake.set()
+
+	def close(self) -> None:
+		self._closed = True
+		self._wake.set()
+
+	@contextmanager
+	def hold(self) -> Iterator[None]:
+		"""No rescan starts while held; wrap opening a stream in it."""
+		with self._lock:
+			yield
+
+	@property
+	def devices(self) -> list[InputDevice]:
+		return self._devices
+
+	@property
+	def ready(self) -> bool:
+		"""Whether the first scan has finished."""
+		return self._ready.is_set()
+
+	def find(
+		self, device_id: int | None, name: str | None = None
+	) -> InputDevice | None:
+		"""The device with this id (and name, if given), else the first by name."""
+		devices = self._devices
+		for device in devices:
+			if device.id == device_id and (name is None or device.name == name):
+				return device
+		if name is not None:
+			for device in devices:
+				if device.name == name:
+					return device
+		return None
+
+	def channels(self, device_id: int | None) -> int:
+		"""Input channels of a device; 1 if it is unknown or the default."""
+		device = self.find(device_id) if device_id is not None else None
+		return device.channels if device is not None else 1
+
+	def _run(self) -> None:
+		rescan = False
+		while not self._closed:
+			try:
+				self._scan(rescan)
+			except Exception as e:
+				log.exception(f'Audio device scan failed: {e}')
+			self._ready.set()
+			self._wake.wait()
+			self._wake.clear()
+			rescan = True
+
+	def _scan(self, rescan: bool) -> None:
+		with self._lock:
+			if rescan:
+				if not self._can_rescan():
+					log.debug('Audio stream open, not rescanning devices')
+					return
+				_rescan_portaudio()
+			devices = [InputDevice(**device) for device in AudioCapture.list_devices()]
+		if devices == self._devices and self._ready.is_set():
+			return
+		log.info(f'{len(devices)} audio input device(s)')
+		self._devices = devices
+		if self.on_change is not None:
+			self.on_change(devices)
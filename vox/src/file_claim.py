@@ -0,0 +1,67 @@
+"""Per-process claims on state files shared by every vox instance.
+
+Several vox processes can run at once (see --model-server), and files such
+as the outbox must only ever be written by one of them. A claim is an
+exclusive flock on a sidecar `<name>.lock` file, held until it is released
+or the process exits. The data file itself is never locked, so the owner
+may still replace it atomically with os.replace().
+
+When another process holds a file, the claim moves on to the first free
+numbered sibling (outbox.log, outbox-1.log, ...). A later run that finds a
+sibling free picks up whatever a crashed instance left in it.
+"""
+
+from pathlib import Path
+from typing import IO
+
+try:
+	import fcntl
+except ImportError:  # Windows: claims are not enforced
+	fcntl = None  # type: ignore[assignment]
+
+# Numbered siblings tried before giving up
+MAX_INSTANCES = 16
+
+
+class FileClaim:
+	"""An exclusive claim on `path`, held until release()."""
+
+	def __init__(self, path: Path, lock_file: IO[bytes]):
+		self.path = path
+		self._lock_file: IO[bytes] | None = lock_file
+
+	def release(self) -> None:
+		"""Give up the claim. Safe to call more than once."""
+		if self._lock_file is not None:
+			# Closing the descriptor drops the flock
+			self._lock_file.close()
+			self._lock_file = None
+
+
+def instance_path(path: Path, instance: int) -> Path:
+	"""The path instance number `instance` uses in place of `path`."""
+	if instance == 0:
+		return path
+	return path.with_name(f'{path.stem}-{instance}{path.suffix}')
+
+
+def claim_file(path: Path) -> FileClaim:
+	"""Claim `path`, or its first free numbered sibling.
+
+	Raises:
+		OSError: If the directory cannot be created, or every sibling up to
+			MAX_INSTANCES is held by another process.
+	"""
+	path.parent.mkdir(parents=True, exist_ok=True)
+	for instance in range(MAX_INSTANCES):
+		candidate = instance_path(path, instance)
+		lock_file = open(candidate.with_name(candidate.name + '.lock'), 'ab')
+		if fcntl is None:
+			return FileClaim(candidate, lock_file)
+		try:
+			fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+		except BlockingIOError:
+			lock_file.close()
+			continue
+		return FileClaim(candidate, lock_file)
+	raise OSError(f'{path} and {MAX_INSTANCES - 1} siblings are in use')
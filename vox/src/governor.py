@@ -0,0 +1,135 @@
+"""Model governor: step down to a smaller model while the CPU is contended.
+
+When a game or an encoder spikes the CPU, the configured model can fall
+behind the microphone (real-time factor above 1) and detections arrive
+later and later. ModelGovernor is fed the rolling RTF and the system CPU
+load once a second and decides when to step down to the next smaller model
+and when there is headroom to step back up, never above the configured
+model. It only decides; the app loads models and switches engines.
+
+Hysteresis keeps it from flapping:
+- Down once RTF has stayed above DOWNGRADE_RTF for DOWNGRADE_SECONDS.
+- Up once the larger model's expected RTF (the current RTF scaled by
+  MODEL_COST) has stayed below UPGRADE_RTF, and system CPU below
+  UPGRADE_CPU_PERCENT, for UPGRADE_SECONDS.
+- After each step nothing is decided for SETTLE_SECONDS, until the rolling
+  RTF only covers windows decoded by the new model.
+"""
+
+from typing import NamedTuple
+
+from cli import MODEL_SIZES
+from logging_setup import get_logger
+from processing import BUFFER_DURATION_SECONDS, RTF_HISTORY_WINDOWS
+
+log = get_logger(__name__)
+
+# Rough CPU decode cost relative to tiny, to predict RTF after stepping up
+MODEL_COST = {'tiny': 1.0, 'base': 2.0, 'small': 6.0, 'medium': 16.0, 'large': 32.0}
+DOWNGRADE_RTF = 1.0
+DOWNGRADE_SECONDS = 10.0
+UPGRADE_RTF = 0.6
+UPGRADE_CPU_PERCENT = 70.0
+UPGRADE_SECONDS = 60.0
+SETTLE_SECONDS = RTF_HISTORY_WINDOWS * BUFFER_DURATION_SECONDS
+
+
+class ModelStep(NamedTuple):
+	"""A change of model the governor wants, and why."""
+
+	model: str
+	reason: str
+
+
+class ModelGovernor:
+	"""Decides which model to decode with from RTF and CPU load.
+
+	Call observe() about once a second while recording; when it returns a
+	step, switch engines and then call switched(). Not thread-safe.
+	"""
+
+	def __init__(self, ceiling: str):
+		"""Start on `ceiling`, the configured model, which is never exceeded."""
+		self.ceiling = ceiling
+		self.current = ceiling
+		self._over_since: float | None = None
+		self._headroom_since: float | None = None
+		self._settle_until = 0.0
+
+	@property
+	def stepped_down(self) -> bool:
+		return self.current != self.ceiling
+
+	def reset(self, ceiling: str) -> None:
+		"""Go back to the configured model (e.g. after the user changed it)."""
+		self.ceiling = ceiling
+		self.current = ceiling
+		self._over_since = None
+		self._headroom_since = None
+		self._settle_until = 0.0
+
+	def switched(self, model: str, now: float) -> None:
+		"""Record that decoding now uses `model`."""
+		log.info(f'Model governor: decoding with {model} (configured {self.ceiling})')
+		self.current = model
+		self._over_since = None
+		self._headroom_since = None
+		self._settle_until = now + SETTLE_SECONDS
+
+	def observe(
+		self, rtf: float | None, cpu_percent: float, now: float
+	) -> ModelStep | None:
+		"""Feed one sample; returns a step once one is warranted.
+
+		Args:
+			rtf: Rolling real-time factor, or None while not recording.
+			cpu_percent: System-wide CPU load.
+			now: time.monotonic() seconds.
+		"""
+		if rtf is None or now < self._settle_until:
+			self._over_since = None
+			self._headroom_since = None
+			return None
+
+		smaller = self._neighbour(-1)
+		if rtf > DOWNGRADE_RTF and smaller is not None:
+			self._headroom_since = None
+			if self._over_since is None:
+				self._over_since = now
+			if now - self._over_since < DOWNGRADE_SECONDS:
+				return None
+			return self._step(
+				smaller,
+				f'RTF {rtf:.2f} for {now - self._over_since:.0f}s, '
+				f'CPU {cpu_percent:.0f}%',
+			)
+		self._over_since = None
+
+		larger = self._neighbour(1)
+		if larger is None:
+			return None
+		expected = rtf * MODEL_COST[larger] / MODEL_COST[self.current]
+		if expected >= UPGRADE_RTF or cpu_percent >= UPGRADE_CPU_PERCENT:
+			self._headroom_since = None
+			return None
+		if self._headroom_since is None:
+			self._headroom_since = now
+		if now - self._headroom_since < UPGRADE_SECONDS:
+			return None
+		return self._step(
+			larger,
+			f'RTF {rtf:.2f} (~{expected:.2f} on {larger}), CPU {cpu_percent:.0f}%',
+		)
+
+	def _neighbour(self, direction: int) -> str | None:
+		"""Next model down (-1) or up (1), within tiny..ceiling."""
+		if self.current not in MODEL_SIZES or self.ceiling not in MODEL_SIZES:
+			return None
+		index = MODEL_SIZES.index(self.current) + direction
+		if index < 0 or index > MODEL_SIZES.index(self.ceiling):
+			return None
+		return MODEL_SIZES[index]
+
+	def _step(self, model: str, reason: str) -> ModelStep:
+		log.info(f'Model governor: {self.current} -> {model} ({reason})')
+		return ModelStep(model, reason)
@@ -0,0 +1,336 @@
+"""Headless mode: the capture, transcription, detection and report pipeline
+without the Textual UI.
+
+Events are written to stdout as JSON lines; detailed logs still go to the log
+file. SIGINT/SIGTERM stop cleanly (flushing the last partial window and the
+outbox), SIGHUP reloads the word list.
+
+With an ingest address, audio comes from network PCM streams instead of the
+local microphone; each stream gets its own transcription pipeline and its
+events carry the stream name.
+
+With a speculative model, swears heard by the fast path are reported (and
+emitted with "speculative": true) right away; the full model's later
+verdict is emitted as a "correction" event whenever the counts differ.
+
+With a bleep output, the microphone is also played back on a fixed delay
+with its swears bleeped (see src/bleep.py).
+"""
+
+import json
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from queue import Queue
+from typing import Any
+
+import numpy as np
+
+from api_client import SwearAPIClient
+from audio import DTYPE, AudioCapture
+from bleep import BleepOutput
+from config import get_device_channel, get_saved_device
+from ingest import IngestAddress, IngestServer, IngestStream, StreamFormat
+from logging_setup import get_logger
+from metrics import metrics
+from outbox import ReportOutbox
+from pipeline import Pipeline, transcription_pipeline
+from recorder import FlightRecorder
+from speculative import ReconciliationLedger, speculative_pipeline
+from swear_detection import SwearDetector
+from tracing import tracer
+from transcription import TranscriptionEngine, load_transcription_engine
+
+log = get_logger(__name__)
+
+
+def emit(event: str, **fields: Any) -> None:
+	"""Write one JSON-lines event to stdout."""
+	record = {'ts': round(time.time(), 3), 'event': event, **fields}
+	sys.stdout.write(json.dumps(record) + '\n')
+	sys.stdout.flush()
+
+
+def _resolve_device() -> tuple[int | None, int]:
+	"""Get the saved device and channel, falling back to the system default."""
+	device_id, _ = get_saved_device()
+	if device_id is None or not AudioCapture.validate_device(device_id):
+		return None, 0
+	channel = get_device_channel(device_id)
+	if channel >= AudioCapture.get_device_channels(device_id):
+		channel = 0
+	return device_id, channel
+
+
+class HeadlessRunner:
+	"""Runs the pipeline until a shutdown signal arrives."""
+
+	def __init__(
+		self,
+		swear_detector: SwearDetector,
+		api_client: SwearAPIClient | None,
+		outbox: ReportOutbox,
+		model_size: str,
+		model_server: Path | None = None,
+		ingest_address: IngestAddress | None = None,
+		speculative_model: str | None = None,
+		recorder: FlightRecorder | None = None,
+		sample_format: str = DTYPE,
+		bleep: BleepOutput | None = None,
+	):
+		self.swear_detector = swear_detector
+		self.api_client = api_client
+		self.outbox = outbox
+		self.model_size = model_size
+		self.model_server = model_server
+		self.ingest_address = ingest_address
+		self.speculative_model = speculative_model
+		self.recorder = recorder
+		self.sample_format = sample_format
+		self.bleep = bleep
+		self.audio_queue: Queue = Queue()
+		self._stop = threading.Event()
+		self._engine: TranscriptionEngine | None = None
+		self._fast_engine: TranscriptionEngine | None = None
+		self._pipelines: list[Pipeline] = []
+		metrics.model_loaded.set_function(
+			lambda: self._engine is not None and self._engine.is_loaded
+		)
+		metrics.queue_depth.set_function(
+			lambda: sum(pipeline.queued_seconds for pipeline in list(self._pipelines))
+		)
+
+	def _handle_stop(self, signum: int, frame: object) -> None:
+		log.info(f'Received signal {signum}, shutting down')
+		self._stop.set()
+
+	def _handle_reload(self, signum: int, frame: object) -> None:
+		try:
+			self.swear_detector.reload()
+		except FileNotFoundError as e:
+			emit('error', message=str(e))
+			return
+		emit('word_list_reloaded', words=self.swear_detector.word_count)
+
+	def _install_signal_handlers(self) -> None:
+		signal.signal(signal.SIGINT, self._handle_stop)
+		signal.signal(signal.SIGTERM, self._handle_stop)
+		if hasattr(signal, 'SIGHUP'):
+			signal.signal(signal.SIGHUP, self._handle_reload)
+
+	def _on_swears(self, count: int, detected: list[str], stream: str | None) -> None:
+		"""Report a window's swears (called on the pipeline's report stage)."""
+		source = self._source(stream)
+		reported = self._report(count)
+		emit('swears', count=count, words=detected, reported=reported, **source)
+
+	def _on_ledger_report(
+		self, delta: int, words: list[str], speculative: bool, stream: str | None
+	) -> None:
+		"""Report a speculative count or a correction from a stream's ledger."""
+		source = self._source(stream)
+		reported = self._report(delta)
+		if speculative:
+			emit(
+				'swears',
+				count=delta,
+				words=words,
+				reported=reported,
+				speculative=True,
+				**source,
+			)
+		else:
+			emit('correction', by=delta, words=words, reported=reported, **source)
+
+	def _report(self, count: int) -> bool:
+		"""Send a count to the service; False if it is not configured or failed."""
+		if self.api_client is None:
+			return False
+		with tracer.span('report'):
+			reported = self.api_client.report_swears(count)
+		latency = tracer.end_to_end()
+		if latency is not None:
+			metrics.speech_to_report_seconds.observe(latency)
+		return reported
+
+	@staticmethod
+	def _source(stream: str | None) -> dict[str, str]:
+		# Ingest events name their stream; microphone events stay as they were
+		return {'stream': stream} if stream is not None else {}
+
+	def _start_worker(
+		self, audio_queue: Queue, name: str, stream: str | None = None
+	) -> None:
+		"""Transcribe `audio_queue` until stopped."""
+		assert self._engine is not None, 'Model must be loaded first'
+		if self._fast_engine is None:
+			pipeline = transcription_pipeline(
+				audio_queue,
+				self._engine,
+				self.swear_detector,
+				on_text=lambda text: emit(
+					'transcript', text=text, **self._source(stream)
+				),
+				report=lambda count, detected: self._on_swears(count, detected, stream),
+				name=name,
+				on_words=self.bleep.on_words if self.bleep is not None else None,
+			)
+		else:
+			# One ledger per pipeline: positions are offsets into this stream
+			ledger = ReconciliationLedger(
+				lambda delta, words, speculative: self._on_ledger_report(
+					delta, words, speculative, stream
+				)
+			)
+			pipeline = speculative_pipeline(
+				audio_queue,
+				self._fast_engine,
+				self._engine,
+				self.swear_detector,
+				ledger,
+				on_text=lambda text: emit(
+					'transcript', text=text, **self._source(stream)
+				),
+				name=name,
+			)
+		self._pipelines.append(pipeline)
+		pipeline.start()
+
+	def _on_chunk(self, captured_ns: int, chunk: np.ndarray) -> None:
+		"""Hand a captured chunk to the recorder and bleep output (audio thread)."""
+		if self.recorder is not None:
+			self.recorder.feed(captured_ns, chunk)
+		if self.bleep is not None:
+			self.bleep.feed(captured_ns, chunk)
+
+	def _start_capture(self) -> AudioCapture | None:
+		"""Record from the saved microphone; None if it cannot be opened."""
+		device_id, channel = _resolve_device()
+		capture = AudioCapture(
+			self.audio_queue,
+			on_error=lambda msg: emit('audio_error', message=msg),
+			on_chunk=(
+				self._on_chunk
+				if self.recorder is not None or self.bleep is not None
+				else None
+			),
+			dtype=self.sample_format,
+		)
+		try:
+			capture.start(device_id=device_id, channel=channel)
+		except Exception as e:
+			log.exception(f'Failed to start audio capture: {e}')
+			emit('error', message=f'Failed to start audio capture: {e}')
+			return None
+		emit('recording', device_id=device_id, channel=channel)
+		self._start_worker(self.audio_queue, 'transcription')
+		return capture
+
+	def _start_ingest(self) -> IngestServer | None:
+		"""Accept network PCM streams; None if the address cannot be bound."""
+		assert self.ingest_address is not None
+		server = IngestServer(
+			self.ingest_address,
+			on_new_stream=lambda stream: self._start_worker(
+				stream.audio_queue, f'transcription-{stream.name}', stream.name
+			),
+			on_event=self._on_ingest_event,
+		)
+		try:
+			server.start()
+		except OSError as e:
+			log.exception(f'Failed to start ingest: {e}')
+			emit('error', message=f'Failed to start ingest on {server.describe()}: {e}')
+			return None
+		metrics.queue_depth.set_function(lambda: server.queued_seconds)
+		emit('ingest_listening', address=server.describe())
+		return server
+
+	def _on_ingest_event(
+		self, event: str, stream: IngestStream, stream_format: StreamFormat, peer: str
+	) -> None:
+		if event == 'stream_connected':
+			emit(
+				event,
+				stream=stream.name,
+				peer=peer,
+				format=stream_format.sample_format,
+				rate=stream_format.rate,
+				channels=stream_format.channels,
+				reconnect=stream.connections > 1,
+			)
+		else:
+			emit(event, stream=stream.name, seconds=round(stream.seconds_received, 2))
+
+	def run(self) -> int:
+		"""Run until SIGINT/SIGTERM. Returns the process exit code."""
+		self._install_signal_handlers()
+		emit(
+			'starting',
+			model=self.model_size,
+			words=self.swear_detector.word_count,
+			api_configured=self.api_client is not None,
+		)
+		if self.api_client is None:
+			log.warning('API not configured, swears will only be logged')
+
+		started = time.perf_counter()
+		try:
+			self._engine = load_transcription_engine(
+				self.model_size, self.model_server
+			)
+		except Exception as e:
+			log.exception(f'Failed to load model: {e}')
+			emit('error', message=f'Failed to load model: {e}')
+			return 1
+		emit(
+			'model_loaded',
+			model=self.model_size,
+			seconds=round(time.perf_counter() - started, 2),
+		)
+		if self.speculative_model is not None:
+			started = time.perf_counter()
+			try:
+				self._fast_engine = load_transcription_engine(
+					self.speculative_model, self.model_server
+				)
+			except Exception as e:
+				log.exception(f'Failed to load speculative model: {e}')
+				emit('error', message=f'Failed to load speculative model: {e}')
+				return 1
+			emit(
+				'model_loaded',
+				model=self.speculative_model,
+				seconds=round(time.perf_counter() - started, 2),
+				speculative=True,
+			)
+		if self._stop.is_set():
+			return 0
+
+		if self.ingest_address is not None:
+			source = self._start_ingest()
+		else:
+			source = self._start_capture()
+		if source is None:
+			return 1
+
+		# Sleep until a signal handler sets the stop event
+		self._stop.wait()
+
+		source.stop()
+		# Sources are stopped, so everything they queued is ahead of END
+		for pipeline in list(self._pipelines):
+			pipeline.stop()
+		for pipeline in list(self._pipelines):
+			pipeline.join()
+		if self.api_client is not None:
+			self.api_client.close()
+		self.outbox.close()
+		if self.recorder is not None:
+			self.recorder.close()
+		if self.bleep is not None:
+			self.bleep.close()
+		emit('stopped', pending=self.outbox.pending)
+		return 0
@@ -0,0 +1,394 @@
+"""Network PCM ingest: audio streamed over TCP or a Unix socket instead of a
+local microphone (e.g. from the machine running OBS).
+
+A sender connects and writes one ASCII header line, then raw interleaved
+PCM until it disconnects:
+
+	VOXPCM format=s16le rate=48000 channels=2 stream=obs\\n
+
+format is s16le or f32le. Every field is optional; the defaults are s16le,
+16000 Hz, mono and the sender's host as the stream name. The server answers
+'OK\\n' or 'ERR <reason>\\n'. For example, with ffmpeg and netcat:
+
+	(printf 'VOXPCM format=s16le rate=48000 channels=2 stream=obs\\n';
+	 ffmpeg -i <input> -f s16le -ar 48000 -ac 2 -) | nc 127.0.0.1 4714
+
+Audio is downmixed to mono, resampled to 16 kHz and queued in capture-sized
+blocks, the same (capture_ns, block) items AudioCapture produces, so each
+stream feeds an ordinary transcription pipeline. The queue is a bounded jitter
+buffer: when transcription falls behind, the reader stops reading and TCP
+flow control pushes back on the sender rather than dropping audio.
+
+Streams are keyed by name. A sender that reconnects under the same name
+resumes its stream, including the partly filled window; a second live
+connection for a name is refused.
+"""
+
+import socket
+import socketserver
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Full, Queue
+
+import numpy as np
+
+from audio import BLOCKSIZE, SAMPLE_RATE
+from logging_setup import get_logger
+
+log = get_logger(__name__)
+
+HEADER_MAGIC = 'VOXPCM'
+MAX_HEADER_BYTES = 512
+SAMPLE_FORMATS = {'s16le': np.dtype('<i2'), 'f32le': np.dtype('<f4')}
+MAX_CHANNELS = 32
+MAX_SAMPLE_RATE = 384000
+# Seconds of audio a stream may buffer ahead of transcription
+JITTER_BUFFER_SECONDS = 10.0
+JITTER_BUFFER_BLOCKS = int(JITTER_BUFFER_SECONDS * SAMPLE_RATE / BLOCKSIZE)
+RECV_BYTES = 65536
+# How often blocked reads and queue puts check for shutdown
+POLL_SECONDS = 0.5
+DEFAULT_INGEST_HOST = '127.0.0.1'
+
+IngestAddress = tuple[str, int] | Path
+
+
+def parse_ingest_address(value: str) -> IngestAddress:
+	"""Parse 'HOST:PORT', ':PORT' or 'PORT' as TCP; anything else is a socket path.
+
+	Raises:
+		ValueError: If a TCP port is not a number in range.
+	"""
+	host, sep, port = value.rpartition(':')
+	if not sep and not value.isdigit():
+		return Path(value)
+	if not port.isdigit() or not 0 <= int(port) <= 65535:
+		raise ValueError(f'Invalid ingest port: {port!r}')
+	return (host or DEFAULT_INGEST_HOST, int(port))
+
+
+@dataclass(frozen=True)
+class StreamFormat:
+	"""Wire format announced by a sender's header."""
+
+	sample_format: str = 's16le'
+	rate: int = SAMPLE_RATE
+	channels: int = 1
+
+	@property
+	def frame_bytes(self) -> int:
+		return SAMPLE_FORMATS[self.sample_format].itemsize * self.channels
+
+
+def parse_header(line: str) -> tuple[StreamFormat, str | None]:
+	"""Parse a header line into (format, stream name or None).
+
+	Raises:
+		ValueError: If the header is malformed or out of range.
+	"""
+	magic, *fields = line.split() or ['']
+	if magic != HEADER_MAGIC:
+		raise ValueError(f'Expected {HEADER_MAGIC} header')
+	values: dict[str, str] = {}
+	for field in fields:
+		key, sep, value = field.partition('=')
+		if not sep:
+			raise ValueError(f'Malformed header field: {field!r}')
+		values[key] = value
+	unknown = set(values) - {'format', 'rate', 'channels', 'stream'}
+	if unknown:
+		raise ValueError(f'Unknown header fields: {", ".join(sorted(unknown))}')
+
+	sample_format = values.get('format', 's16le')
+	if sample_format not in SAMPLE_FORMATS:
+		raise ValueError(f'Unsupported format: {sample_format}')
+	try:
+		rate = int(values.get('rate', SAMPLE_RATE))
+		channels = int(values.get('channels', 1))
+	except ValueError:
+		raise ValueError('rate and channels must be integers') from None
+	if not 1 <= rate <= MAX_SAMPLE_RATE:
+		raise ValueError(f'Unsupported sample rate: {rate}')
+	if not 1 <= channels <= MAX_CHANNELS:
+		raise ValueError(f'Unsupported channel count: {channels}')
+	return StreamFormat(sample_format, rate, channels), values.get('stream') or None
+
+
+class LinearResampler:
+	"""Streaming linear-interpolation resampler to SAMPLE_RATE.
+
+	Keeps the last input sample and the fractional read position between
+	calls so block boundaries are seamless. Linear interpolation is coarse,
+	but Whisper only looks at content below 8 kHz and is not bothered by it.
+	"""
+
+	def __init__(self, rate: int):
+		self._step = rate / SAMPLE_RATE
+		self._position = 0.0
+		self._previous: np.ndarray | None = None
+
+	def process(self, samples: np.ndarray) -> np.ndarray:
+		if self._step == 1.0 or len(samples) == 0:
+			return samples
+		if self._previous is not None:
+			samples = np.concatenate((self._previous, samples))
+		last = len(samples) - 1
+		positions = np.arange(self._position, last, self._step)
+		out = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+		next_position = positions[-1] + self._step if len(positions) else self._position
+		# Index `last` becomes index 0 of the next call
+		self._position = next_position - last
+		self._previous = samples[-1:]
+		return out
+
+
+class PCMDecoder:
+	"""Turns raw interleaved PCM bytes into mono float32 at SAMPLE_RATE."""
+
+	def __init__(self, stream_format: StreamFormat):
+		self.format = stream_format
+		self._dtype = SAMPLE_FORMATS[stream_format.sample_format]
+		self._resampler = LinearResampler(stream_format.rate)
+		# Bytes of a frame split across reads
+		self._remainder = b''
+
+	def decode(self, data: bytes) -> np.ndarray:
+		data = self._remainder + data
+		usable = len(data) - len(data) % self.format.frame_bytes
+		self._remainder = data[usable:]
+		samples = np.frombuffer(data[:usable], dtype=self._dtype)
+		if self._dtype.kind == 'i':
+			samples = samples.astype(np.float32) / 32768.0
+		else:
+			samples = samples.astype(np.float32)
+		if self.format.channels > 1:
+			samples = samples.reshape(-1, self.format.channels).mean(axis=1)
+		return self._resampler.process(samples)
+
+
+class IngestStream:
+	"""One named inbound stream: its jitter buffer and connection state.
+
+	Outlives individual connections, so the transcription pipeline reading
+	audio_queue keeps its partial window across a reconnect.
+	"""
+
+	def __init__(self, name: str):
+		self.name = name
+		self.audio_queue: Queue = Queue(maxsize=JITTER_BUFFER_BLOCKS)
+		self.connected = False
+		self.connections = 0
+		self.seconds_received = 0.0
+		self._pending = np.zeros(0, dtype=np.float32)
+
+	def feed(self, samples: np.ndarray, stopping: threading.Event) -> bool:
+		"""Queue full blocks of `samples`; False if stopped while blocked."""
+		captured_ns = time.perf_counter_ns()
+		self.seconds_received += len(samples) / SAMPLE_RATE
+		pending = np.concatenate((self._pending, samples))
+		full = len(pending) - len(pending) % BLOCKSIZE
+		for offset in range(0, full, BLOCKSIZE):
+			block = pending[offset : offset + BLOCKSIZE]
+			if not self._put((captured_ns, block), stopping):
+				return False
+		self._pending = pending[full:]
+		return True
+
+	def flush(self, stopping: threading.Event) -> None:
+		"""Queue the trailing partial block, e.g. when the sender disconnects."""
+		if len(self._pending):
+			self._put((time.perf_counter_ns(), self._pending), stopping)
+			self._pending = np.zeros(0, dtype=np.float32)
+
+	def _put(self, item: tuple[int, np.ndarray], stopping: threading.Event) -> bool:
+		# Blocking here stops the socket being read: backpressure to the sender
+		while not stopping.is_set():
+			try:
+				self.audio_queue.put(item, timeout=POLL_SECONDS)
+				return True
+			except Full:
+				continue
+		return False
+
+	@property
+	def queued_seconds(self) -> float:
+		return self.audio_queue.qsize() * BLOCKSIZE / SAMPLE_RATE
+
+
+class _IngestHandler(socketserver.BaseRequestHandler):
+	server: '_TCPServer | _UnixServer'
+
+	def handle(self) -> None:
+		ingest = self.server.ingest
+		sock: socket.socket = self.request
+		sock.settimeout(POLL_SECONDS)
+		peer = _peer_name(self.client_address)
+		try:
+			header, data = _read_header(sock, ingest.stopping)
+			stream_format, name = parse_header(header)
+			stream = ingest.attach(name or _default_stream_name(self.client_address))
+		except (ValueError, OSError) as e:
+			log.warning(f'Ingest from {peer} refused: {e}')
+			_reply(sock, f'ERR {e}')
+			return
+		_reply(sock, 'OK')
+		ingest.on_event('stream_connected', stream, stream_format, peer)
+		decoder = PCMDecoder(stream_format)
+		try:
+			while not ingest.stopping.is_set():
+				if data and not stream.feed(decoder.decode(data), ingest.stopping):
+					break
+				try:
+					data = sock.recv(RECV_BYTES)
+				except TimeoutError:
+					data = b''
+					continue
+				if not data:
+					break
+		except OSError as e:
+			log.warning(f'Ingest stream {stream.name}: {e}')
+		finally:
+			stream.flush(ingest.stopping)
+			ingest.detach(stream)
+			ingest.on_event('stream_disconnected', stream, stream_format, peer)
+
+
+def _peer_name(address: object) -> str:
+	if isinstance(address, tuple):
+		return f'{address[0]}:{address[1]}'
+	return 'unix'
+
+
+def _default_stream_name(address: object) -> str:
+	# The host, not host:port, so a sender reconnecting from a new ephemeral
+	# port resumes its stream
+	return str(address[0]) if isinstance(address, tuple) else 'unix'
+
+
+def _read_header(sock: socket.socket, stopping: threading.Event) -> tuple[str, bytes]:
+	"""Read up to the header newline; returns (header, PCM bytes read past it)."""
+	data = b''
+	while b'\n' not in data:
+		if len(data) > MAX_HEADER_BYTES or stopping.is_set():
+			raise ValueError('Missing header line')
+		try:
+			chunk = sock.recv(MAX_HEADER_BYTES)
+		except TimeoutError:
+			continue
+		if not chunk:
+			raise ValueError('Closed before header')
+		data += chunk
+	line, _, rest = data.partition(b'\n')
+	return line.decode('ascii', errors='replace'), rest
+
+
+def _reply(sock: socket.socket, message: str) -> None:
+	try:
+		sock.sendall(message.encode() + b'\n')
+	except OSError:
+		pass
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+	daemon_threads = True
+	allow_reuse_address = True
+	ingest: 'IngestServer'
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+	daemon_threads = True
+	ingest: 'IngestServer'
+
+
+# (event, stream, format, peer) for connects and disconnects
+IngestEventCallback = Callable[[str, IngestStream, StreamFormat, str], None]
+
+
+class IngestServer:
+	"""Accepts PCM streams and hands each new stream name to on_new_stream."""
+
+	def __init__(
+		self,
+		address: IngestAddress,
+		on_new_stream: Callable[[IngestStream], None],
+		on_event: IngestEventCallback | None = None,
+	):
+		self.address = address
+		self.on_new_stream = on_new_stream
+		self._on_event = on_event
+		self.streams: dict[str, IngestStream] = {}
+		self.stopping = threading.Event()
+		self._lock = threading.Lock()
+		self._server: _TCPServer | _UnixServer | None = None
+		self._thread: threading.Thread | None = None
+
+	def start(self) -> None:
+		"""Bind and serve on a background thread."""
+		if isinstance(self.address, Path):
+			self.address.unlink(missing_ok=True)
+			self._server = _UnixServer(str(self.address), _IngestHandler)
+		else:
+			self._server = _TCPServer(self.address, _IngestHandler)
+		self._server.ingest = self
+		self._thread = threading.Thread(
+			target=self._server.serve_forever, name='ingest', daemon=True
+		)
+		self._thread.start()
+		log.info(f'Ingest listening on {self.describe()}')
+
+	def describe(self) -> str:
+		if self._server is not None and not isinstance(self.address, Path):
+			host, port = self._server.server_address[:2]
+			return f'{host}:{port}'
+		return str(self.address)
+
+	def stop(self) -> None:
+		"""Stop accepting and unblock every connection's reader."""
+		self.stopping.set()
+		if self._server is not None:
+			self._server.shutdown()
+			self._server.server_close()
+			if isinstance(self.address, Path):
+				self.address.unlink(missing_ok=True)
+
+	def attach(self, name: str) -> IngestStream:
+		"""Claim a stream for a new connection, creating it on first use.
+
+		Raises:
+			ValueError: If another connection is already feeding the stream.
+		"""
+		with self._lock:
+			stream = self.streams.get(name)
+			created = stream is None
+			if stream is None:
+				stream = self.streams[name] = IngestStream(name)
+			elif stream.connected:
+				raise ValueError(f'Stream {name} is already connected')
+			stream.connected = True
+			stream.connections += 1
+		if created:
+			self.on_new_stream(stream)
+		return stream
+
+	def detach(self, stream: IngestStream) -> None:
+		with self._lock:
+			stream.connected = False
+
+	def on_event(
+		self, event: str, stream: IngestStream, stream_format: StreamFormat, peer: str
+	) -> None:
+		log.info(
+			f'Ingest {event}: {stream.name} from {peer} '
+			f'({stream_format.sample_format}, {stream_format.rate} Hz, '
+			f'{stream_format.channels} ch)'
+		)
+		if self._on_event is not None:
+			self._on_event(event, stream, stream_format, peer)
+
+	@property
+	def queued_seconds(self) -> float:
+		"""Audio buffered across all streams."""
+		return sum(stream.queued_seconds for stream in list(self.streams.values()))
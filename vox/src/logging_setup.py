@@ -1,19 +1,78 @@
-"""Logging configuration for Vox."""
+"""Logging configuration for Vox.
 
+Records are put on an in-memory queue by the logging thread and written to a
+size-rotated file by a QueueListener thread, so the audio and transcription
+threads never wait on disk I/O.
+"""
+
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
 # Suppress tokenizers parallelism warning
 os.environ['TOKENIZERS_PARALLELISM'] = 'false'
 
-# Configure file logging
-logging.basicConfig(
-	level=logging.DEBUG,
-	format='%(asctime)s [%(levelname)s] %(message)s',
-	handlers=[
-		logging.FileHandler('vox_debug.log', mode='w'),
-	],
-)
+LOG_FILE = 'vox_debug.log'
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+LOG_LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR']
+DEFAULT_LOG_LEVEL = 'INFO'
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def configure_logging(level: str = DEFAULT_LOG_LEVEL, log_file: str = LOG_FILE) -> None:
+	"""Route all logging through a queue to a rotating log file.
+
+	The previous run's log is rotated to <log_file>.1 so each run starts with
+	a fresh file.
+
+	Args:
+		level: Minimum level to record. Unknown names fall back to
+			DEFAULT_LOG_LEVEL so a bad saved setting cannot stop startup.
+		log_file: Path of the log file.
+	"""
+	global _listener
+	shutdown_logging()
+	level = level.upper()
+	if level not in LOG_LEVELS:
+		level = DEFAULT_LOG_LEVEL
+
+	file_handler = logging.handlers.RotatingFileHandler(
+		log_file,
+		maxBytes=LOG_MAX_BYTES,
+		backupCount=LOG_BACKUP_COUNT,
+		encoding='utf-8',
+	)
+	if file_handler.stream.tell() > 0:
+		file_handler.doRollover()
+	file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+	log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+	root = logging.getLogger()
+	for handler in root.handlers[:]:
+		root.removeHandler(handler)
+	root.addHandler(logging.handlers.QueueHandler(log_queue))
+	root.setLevel(level)
+
+	_listener = logging.handlers.QueueListener(log_queue, file_handler)
+	_listener.start()
+
+
+def shutdown_logging() -> None:
+	"""Stop the listener thread after writing any queued records."""
+	global _listener
+	if _listener is not None:
+		_listener.stop()
+		for handler in _listener.handlers:
+			handler.close()
+		_listener = None
+
+
+atexit.register(shutdown_logging)
 
 
 def get_logger(name: str) -> logging.Logger:
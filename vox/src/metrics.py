@@ -0,0 +1,261 @@
+"""Process metrics and an optional Prometheus text-format endpoint.
+
+Metrics are updated from many threads at once: pipeline stages (one set
+per ingest stream), the speculative fast and full paths, the outbox
+flusher and the audio callbacks. Each counter and histogram has its own
+lock, held only for the update or for copying a snapshot at scrape time,
+so a scrape never holds up a writer for longer than that copy.
+"""
+
+import bisect
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logging_setup import get_logger
+
+log = get_logger(__name__)
+
+METRICS_HOST = '127.0.0.1'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bucket upper bounds in seconds. A window is 3 s of audio, so decode time
+# past 3 s means transcription is falling behind
+DECODE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0)
+LATENCY_BUCKETS = (0.5, 1.0, 2.0, 3.0, 4.0, 5.0, 7.5, 10.0, 20.0, 60.0)
+
+
+def _escape(value: str) -> str:
+	return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Counter:
+	"""Monotonic counter, optionally split by one label."""
+
+	def __init__(self, name: str, help_text: str, label: str | None = None):
+		self.name = name
+		self.help_text = help_text
+		self.label = label
+		self._lock = threading.Lock()
+		self._values: dict[str, int] = {} if label else {'': 0}
+
+	def inc(self, label_value: str = '', amount: int = 1) -> None:
+		"""Add `amount`."""
+		with self._lock:
+			self._values[label_value] = self._values.get(label_value, 0) + amount
+
+	def expose(self) -> list[str]:
+		with self._lock:
+			values = dict(self._values)
+		lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+		for label_value, count in sorted(values.items()):
+			if self.label:
+				labels = f'{{{self.label}="{_escape(label_value)}"}}'
+				lines.append(f'{self.name}{labels} {count}')
+			else:
+				lines.append(f'{self.name} {count}')
+		return lines
+
+
+class Histogram:
+	"""Prometheus histogram with fixed bucket bounds (seconds)."""
+
+	def __init__(self, name: str, help_text: str, buckets: tuple[float, ...]):
+		self.name = name
+		self.help_text = help_text
+		self._bounds = buckets
+		self._lock = threading.Lock()
+		# Last slot is the +Inf bucket
+		self._counts = [0] * (len(buckets) + 1)
+		self._sum = 0.0
+
+	def observe(self, value: float) -> None:
+		"""Record one observation."""
+		index = bisect.bisect_left(self._bounds, value)
+		with self._lock:
+			self._counts[index] += 1
+			self._sum += value
+
+	def expose(self) -> list[str]:
+		with self._lock:
+			counts = list(self._counts)
+			total = self._sum
+		lines = [
+			f'# HELP {self.name} {self.help_text}',
+			f'# TYPE {self.name} histogram',
+		]
+		cumulative = 0
+		for bound, count in zip(self._bounds, counts):
+			cumulative += count
+			lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+		cumulative += counts[-1]
+		lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+		lines.append(f'{self.name}_sum {total}')
+		lines.append(f'{self.name}_count {cumulative}')
+		return lines
+
+
+class Gauge:
+	"""Value read from a callback at scrape time, optionally split by one label."""
+
+	def __init__(self, name: str, help_text: str, label: str | None = None):
+		self.name = name
+		self.help_text = help_text
+		self.label = label
+		self._reads: dict[str, Callable[[], float]] = {}
+
+	def set_function(self, read: Callable[[], float], label_value: str = '') -> None:
+		"""Set the callback that supplies the current value (of one label)."""
+		self._reads[label_value] = read
+
+	def expose(self) -> list[str]:
+		lines = []
+		for label_value, read in sorted(dict(self._reads).items()):
+			try:
+				value = float(read())
+			except Exception as e:
+				log.debug(f'Gauge {self.name} unavailable: {e}')
+				continue
+			if self.label:
+				labels = f'{{{self.label}="{_escape(label_value)}"}}'
+				lines.append(f'{self.name}{labels} {value}')
+			else:
+				lines.append(f'{self.name} {value}')
+		if not lines:
+			return []
+		return [
+			f'# HELP {self.name} {self.help_text}',
+			f'# TYPE {self.name} gauge',
+			*lines,
+		]
+
+
+def _resident_memory_bytes() -> float:
+	import psutil
+
+	return psutil.Process().memory_info().rss
+
+
+class Metrics:
+	"""All vox metrics."""
+
+	def __init__(self) -> None:
+		self.windows_processed = Counter(
+			'vox_windows_processed_total',
+			'Audio windows taken from the queue (decoded or skipped).',
+		)
+		self.windows_decoded = Counter(
+			'vox_windows_decoded_total', 'Audio windows transcribed.'
+		)
+		self.windows_skipped = Counter(
+			'vox_windows_skipped_total',
+			'Audio windows skipped by the noise gate without decoding.',
+		)
+		self.swears_detected = Counter(
+			'vox_swears_detected_total', 'Swear words detected.', label='word'
+		)
+		self.reports_sent = Counter(
+			'vox_reports_sent_total', 'Report requests accepted by the service.'
+		)
+		self.reports_failed = Counter(
+			'vox_reports_failed_total',
+			'Report requests that failed or were rejected (including 429).',
+		)
+		self.speculative_corrections = Counter(
+			'vox_speculative_corrections_total',
+			'Swears corrected after the fast path (up: missed, down: false).',
+			label='direction',
+		)
+		self.audio_overruns = Counter(
+			'vox_audio_overruns_total', 'Audio callbacks flagged with input overflow.'
+		)
+		self.bleeps = Counter(
+			'vox_bleeps_total',
+			'Spans of the bleep output replaced (swear, late: not checked in '
+			'time, underrun: audio arrived after its slot).',
+			label='reason',
+		)
+		self.decode_seconds = Histogram(
+			'vox_decode_seconds', 'Time to transcribe one window.', DECODE_BUCKETS
+		)
+		self.speech_to_report_seconds = Histogram(
+			'vox_speech_to_report_seconds',
+			'First sample of a window captured until its report completed.',
+			LATENCY_BUCKETS,
+		)
+		self.resident_memory = Gauge(
+			'vox_resident_memory_bytes', 'Resident set size of the vox process.'
+		)
+		self.resident_memory.set_function(_resident_memory_bytes)
+		self.model_loaded = Gauge(
+			'vox_model_loaded', '1 if a transcription model is loaded.'
+		)
+		self.queue_depth = Gauge(
+			'vox_audio_queue_seconds', 'Captured audio waiting to be transcribed.'
+		)
+		self.stage_queue_depth = Gauge(
+			'vox_stage_queue_depth',
+			'Items waiting for a pipeline stage (chunks for segment, else windows).',
+			label='stage',
+		)
+
+	def expose(self) -> str:
+		"""Render every metric in Prometheus text format."""
+		lines: list[str] = []
+		for metric in (
+			self.windows_processed,
+			self.windows_decoded,
+			self.windows_skipped,
+			self.swears_detected,
+			self.reports_sent,
+			self.reports_failed,
+			self.speculative_corrections,
+			self.audio_overruns,
+			self.bleeps,
+			self.decode_seconds,
+			self.speech_to_report_seconds,
+			self.resident_memory,
+			self.model_loaded,
+			self.queue_depth,
+			self.stage_queue_depth,
+		):
+			lines.extend(metric.expose())
+		return '\n'.join(lines) + '\n'
+
+
+# Process-wide metrics; always collected, served only with --metrics-port
+metrics = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+	def do_GET(self) -> None:
+		if self.path.split('?', 1)[0] != '/metrics':
+			self.send_error(404)
+			return
+		body = metrics.expose().encode()
+		self.send_response(200)
+		self.send_header('Content-Type', CONTENT_TYPE)
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format: str, *args: object) -> None:
+		log.debug('metrics: ' + format, *args)
+
+
+def start_metrics_server(port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+	"""Serve /metrics on a daemon thread.
+
+	Args:
+		port: Port to listen on (0 picks a free one).
+		host: Interface to bind; localhost unless overridden.
+
+	Returns:
+		The running server; call shutdown() to stop it.
+	"""
+	server = ThreadingHTTPServer((host, port), _MetricsHandler)
+	server.daemon_threads = True
+	thread = threading.Thread(target=server.serve_forever, name='metrics', daemon=True)
+	thread.start()
+	log.info(f'Serving metrics on http://{host}:{server.server_port}/metrics')
+	return server
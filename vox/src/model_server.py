@@ -0,0 +1,502 @@
+"""Shared model server: one process hosts the Whisper models for many vox
+instances over a Unix domain socket.
+
+Every frame is a fixed header, a JSON object and an optional binary payload:
+
+	!II (json length, payload length) | JSON | payload
+
+A client opens a connection, sends {'op': 'hello', 'model': size} and waits
+for the model to be ready. Each {'op': 'transcribe', 'id', 'language',
+'hotwords'} request carries one window of mono float32 PCM at 16 kHz as its
+payload and is answered with {'id', 'ok', 'text', 'queue_seconds',
+'decode_seconds'}. {'op': 'stats'} returns per-client counters and the
+server's RSS.
+
+Requests wait in a bounded queue per client. The workers take them round
+robin across clients with queued work, so one busy streamer cannot starve
+the others; a client whose queue is full stops being read, which pushes
+back through the socket.
+
+Run it with:
+
+	python src/model_server.py [--socket PATH] [--preload base] [--workers 1]
+
+then start each vox with --model-server.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from config import MODEL_SERVER_SOCKET
+from logging_setup import DEFAULT_LOG_LEVEL, LOG_LEVELS, configure_logging, get_logger
+from tracing import tracer
+from transcription import MODEL_SIZE, TranscriptionEngine, load_transcription_engine
+
+log = get_logger(__name__)
+
+FRAME_HEADER = struct.Struct('!II')
+# A 30 s window is under 2 MB of float32; anything far larger is garbage
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+# Windows a client may have waiting before the server stops reading from it
+MAX_CLIENT_QUEUE = 4
+SERVER_LOG_FILE = 'vox_model_server.log'
+# Windows are mono float32 at Whisper's input rate
+SAMPLE_RATE = 16000
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+	buffer = bytearray(size)
+	view = memoryview(buffer)
+	received = 0
+	while received < size:
+		count = sock.recv_into(view[received:])
+		if count == 0:
+			raise ConnectionError('Connection closed mid-frame')
+		received += count
+	return bytes(buffer)
+
+
+def send_frame(
+	sock: socket.socket, header: dict[str, Any], payload: bytes = b''
+) -> None:
+	"""Write one frame (the caller serializes writers on a socket)."""
+	body = json.dumps(header).encode()
+	sock.sendall(FRAME_HEADER.pack(len(body), len(payload)) + body + payload)
+
+
+def recv_frame(sock: socket.socket) -> tuple[dict[str, Any], bytes] | None:
+	"""Read one frame, or None if the peer closed the connection cleanly."""
+	first = sock.recv(FRAME_HEADER.size, socket.MSG_WAITALL)
+	if not first:
+		return None
+	if len(first) < FRAME_HEADER.size:
+		first += _recv_exact(sock, FRAME_HEADER.size - len(first))
+	body_size, payload_size = FRAME_HEADER.unpack(first)
+	if body_size + payload_size > MAX_FRAME_BYTES:
+		raise ConnectionError(f'Frame of {body_size + payload_size} bytes is too large')
+	header = json.loads(_recv_exact(sock, body_size))
+	payload = _recv_exact(sock, payload_size) if payload_size else b''
+	return header, payload
+
+
+class _Request:
+	__slots__ = ('audio', 'enqueued', 'hotwords', 'id', 'language')
+
+	def __init__(self, header: dict[str, Any], audio: np.ndarray):
+		self.id = header.get('id')
+		self.language = header.get('language', 'en')
+		self.hotwords = header.get('hotwords')
+		self.audio = audio
+		self.enqueued = time.perf_counter()
+
+
+class _ClientSession:
+	"""One connected vox instance: its engine, pending windows and counters."""
+
+	def __init__(self, client_id: int, sock: socket.socket):
+		self.client_id = client_id
+		self.sock = sock
+		self.engine: TranscriptionEngine | None = None
+		self.pending: deque[_Request] = deque()
+		self.closed = False
+		self.served = 0
+		self.audio_seconds = 0.0
+		self.decode_seconds = 0.0
+		# The reader answers hello/stats while workers send results
+		self.send_lock = threading.Lock()
+
+	def send(self, header: dict[str, Any]) -> None:
+		with self.send_lock:
+			send_frame(self.sock, header)
+
+
+class ModelServer(socketserver.ThreadingUnixStreamServer):
+	"""Hosts one TranscriptionEngine per model size and schedules windows
+	from all connected clients onto them."""
+
+	daemon_threads = True
+
+	def __init__(self, socket_path: Path, workers: int = 1):
+		self.socket_path = socket_path
+		self.workers = workers
+		# Resolved once the model has loaded; clients wanting a size that is
+		# still loading wait on its future, not on the lock
+		self._engines: dict[str, Future[TranscriptionEngine]] = {}
+		self._engines_lock = threading.Lock()
+		self._sessions: dict[int, _ClientSession] = {}
+		self._next_client_id = 0
+		# Clients with queued windows, in service order
+		self._ready: deque[_ClientSession] = deque()
+		self._cond = threading.Condition()
+		self._stopping = False
+		socket_path.parent.mkdir(parents=True, exist_ok=True)
+		_remove_stale_socket(socket_path)
+		super().__init__(str(socket_path), _ClientHandler)
+		os.chmod(socket_path, 0o600)
+		self._worker_threads = [
+			threading.Thread(target=self._work, name=f'model-worker-{i}', daemon=True)
+			for i in range(workers)
+		]
+		for thread in self._worker_threads:
+			thread.start()
+
+	def engine(self, model_size: str) -> TranscriptionEngine:
+		"""The shared engine for a model size, loading it on first request.
+
+		Loads run outside the lock, so a client asking for a loaded model
+		never waits behind another client's load of a different size.
+		"""
+		with self._engines_lock:
+			future = self._engines.get(model_size)
+			loading = future is None
+			if future is None:
+				future = self._engines[model_size] = Future()
+		if not loading:
+			return future.result()
+
+		started = time.perf_counter()
+		try:
+			engine = load_transcription_engine(model_size, num_workers=self.workers)
+		except BaseException as e:
+			# Let a later hello try again
+			with self._engines_lock:
+				del self._engines[model_size]
+			future.set_exception(e)
+			raise
+		future.set_result(engine)
+		seconds = time.perf_counter() - started
+		log.info(f'Loaded model {model_size} in {seconds:.2f}s')
+		return engine
+
+	def open_session(self, sock: socket.socket) -> _ClientSession:
+		with self._cond:
+			self._next_client_id += 1
+			session = _ClientSession(self._next_client_id, sock)
+			self._sessions[session.client_id] = session
+		log.info(f'Client {session.client_id} connected')
+		return session
+
+	def close_session(self, session: _ClientSession) -> None:
+		with self._cond:
+			session.closed = True
+			session.pending.clear()
+			if session in self._ready:
+				self._ready.remove(session)
+			self._sessions.pop(session.client_id, None)
+			self._cond.notify_all()
+		log.info(
+			f'Client {session.client_id} disconnected after {session.served} windows'
+		)
+
+	def submit(self, session: _ClientSession, request: _Request) -> None:
+		"""Queue a window, blocking the client's reader while its queue is full."""
+		with self._cond:
+			while len(session.pending) >= MAX_CLIENT_QUEUE and not self._stopping:
+				self._cond.wait()
+			session.pending.append(request)
+			if session not in self._ready:
+				self._ready.append(session)
+			self._cond.notify_all()
+
+	def _next_request(self) -> tuple[_ClientSession, _Request] | None:
+		with self._cond:
+			while not self._ready and not self._stopping:
+				self._cond.wait()
+			if self._stopping:
+				return None
+			session = self._ready.popleft()
+			request = session.pending.popleft()
+			# Back of the line: every other waiting client goes first
+			if session.pending:
+				self._ready.append(session)
+			# A reader may be waiting for room in this client's queue
+			self._cond.notify_all()
+			return session, request
+
+	def _work(self) -> None:
+		while (item := self._next_request()) is not None:
+			session, request = item
+			assert session.engine is not None, 'transcribe before hello'
+			started = time.perf_counter()
+			text = session.engine.transcribe(
+				request.audio, language=request.language, hotwords=request.hotwords
+			)
+			decode_seconds = time.perf_counter() - started
+			session.served += 1
+			session.audio_seconds += len(request.audio) / SAMPLE_RATE
+			session.decode_seconds += decode_seconds
+			if session.closed:
+				continue
+			try:
+				session.send({
+					'id': request.id,
+					'ok': True,
+					'text': text,
+					'queue_seconds': round(started - request.enqueued, 4),
+					'decode_seconds': round(decode_seconds, 4),
+				})
+			except OSError as e:
+				log.warning(f'Client {session.client_id}: result not sent: {e}')
+
+	def stats(self) -> dict[str, Any]:
+		import psutil
+
+		with self._cond:
+			clients = [
+				{
+					'client': s.client_id,
+					'model': s.engine.model_size if s.engine else None,
+					'queued': len(s.pending),
+					'served': s.served,
+					'audio_seconds': round(s.audio_seconds, 3),
+					'decode_seconds': round(s.decode_seconds, 3),
+				}
+				for s in self._sessions.values()
+			]
+		with self._engines_lock:
+			models = sorted(
+				size
+				for size, future in self._engines.items()
+				if future.done() and future.exception() is None
+			)
+		return {
+			'ok': True,
+			'models': models,
+			'workers': self.workers,
+			'rss_bytes': psutil.Process().memory_info().rss,
+			'clients': clients,
+		}
+
+	def server_close(self) -> None:
+		with self._cond:
+			self._stopping = True
+			self._cond.notify_all()
+		super().server_close()
+		self.socket_path.unlink(missing_ok=True)
+
+
+class _ClientHandler(socketserver.BaseRequestHandler):
+	server: ModelServer
+
+	def handle(self) -> None:
+		session = self.server.open_session(self.request)
+		try:
+			while (frame := recv_frame(self.request)) is not None:
+				self._dispatch(session, *frame)
+		except (OSError, ValueError) as e:
+			log.warning(f'Client {session.client_id}: {e}')
+		finally:
+			self.server.close_session(session)
+
+	def _dispatch(
+		self, session: _ClientSession, header: dict[str, Any], payload: bytes
+	) -> None:
+		op = header.get('op')
+		if op == 'transcribe':
+			if session.engine is None:
+				session.send({'id': header.get('id'), 'ok': False, 'error': 'no hello'})
+				return
+			audio = np.frombuffer(payload, dtype='<f4')
+			self.server.submit(session, _Request(header, audio))
+		elif op == 'hello':
+			model_size = header.get('model', MODEL_SIZE)
+			started = time.perf_counter()
+			try:
+				session.engine = self.server.engine(model_size)
+			except Exception as e:
+				log.exception(f'Failed to load model {model_size}')
+				session.send({'ok': False, 'error': f'Failed to load model: {e}'})
+				return
+			session.send({
+				'ok': True,
+				'model': model_size,
+				'client': session.client_id,
+				'load_seconds': round(time.perf_counter() - started, 3),
+			})
+		elif op == 'stats':
+			session.send(self.server.stats())
+		else:
+			session.send({'ok': False, 'error': f'Unknown op: {op!r}'})
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+	"""Delete a socket file left by a dead server; refuse to steal a live one."""
+	if not socket_path.exists():
+		return
+	probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	try:
+		probe.connect(str(socket_path))
+	except OSError:
+		socket_path.unlink()
+	else:
+		raise RuntimeError(f'A model server is already listening on {socket_path}')
+	finally:
+		probe.close()
+
+
+class RemoteTranscriptionEngine(TranscriptionEngine):
+	"""TranscriptionEngine that sends windows to a shared model server.
+
+	Loading connects and waits for the server to have the model; unloading
+	only disconnects, since other clients may be using the same model.
+	"""
+
+	def __init__(self, socket_path: Path, model_size: str = MODEL_SIZE):
+		super().__init__(model_size=model_size)
+		self.socket_path = socket_path
+		self._sock: socket.socket | None = None
+		self._next_id = 0
+		# One request in flight per connection
+		self._request_lock = threading.Lock()
+
+	def _connect(self) -> None:
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			sock.connect(str(self.socket_path))
+			send_frame(sock, {'op': 'hello', 'model': self.model_size})
+			frame = recv_frame(sock)
+		except OSError:
+			sock.close()
+			raise
+		if frame is None or not frame[0].get('ok'):
+			sock.close()
+			error = frame[0].get('error') if frame else 'connection closed'
+			raise RuntimeError(f'Model server refused {self.model_size}: {error}')
+		log.info(
+			f'Connected to model server {self.socket_path} as client '
+			f"{frame[0].get('client')} ({self.model_size} ready in "
+			f"{frame[0].get('load_seconds', 0.0):.2f}s)"
+		)
+		self._sock = sock
+
+	def _disconnect(self) -> None:
+		if self._sock is not None:
+			self._sock.close()
+			self._sock = None
+
+	def _request(self, header: dict[str, Any], payload: bytes) -> dict[str, Any]:
+		if self._sock is None:
+			self._connect()
+		assert self._sock is not None
+		send_frame(self._sock, header, payload)
+		frame = recv_frame(self._sock)
+		if frame is None:
+			raise ConnectionError('Model server closed the connection')
+		reply = frame[0]
+		if reply.get('id') != header['id']:
+			# Out of step with the server: this reply is for some other window
+			raise ConnectionError(
+				f"Model server answered request {reply.get('id')}, "
+				f"expected {header['id']}"
+			)
+		return reply
+
+	def load(self) -> None:
+		"""Connect to the server and wait until it has the model."""
+		with self._request_lock:
+			if self._sock is None:
+				self._connect()
+
+	def transcribe(
+		self,
+		audio: np.ndarray,
+		language: str = 'en',
+		hotwords: str | None = None,
+	) -> str:
+		"""Transcribe on the server; returns '' if it cannot be reached."""
+		payload = np.ascontiguousarray(audio.reshape(-1), dtype='<f4').tobytes()
+		with self._request_lock, tracer.span('decode'):
+			self._next_id += 1
+			header = {
+				'op': 'transcribe',
+				'id': self._next_id,
+				'language': language,
+				'hotwords': hotwords,
+			}
+			try:
+				reply = self._request(header, payload)
+			except (OSError, RuntimeError) as e:
+				# The server may have restarted; reconnect once before giving up
+				log.warning(f'Model server request failed, reconnecting: {e}')
+				self._disconnect()
+				try:
+					reply = self._request(header, payload)
+				except (OSError, RuntimeError) as e:
+					log.error(f'Model server unavailable: {e}')
+					self._disconnect()
+					return ''
+		if not reply.get('ok'):
+			log.error(f"Model server error: {reply.get('error')}")
+			return ''
+		return reply['text']
+
+	@property
+	def is_loaded(self) -> bool:
+		"""Check if connected to the server."""
+		return self._sock is not None
+
+	def unload(self) -> None:
+		"""Disconnect; the server keeps the model for its other clients."""
+		with self._request_lock:
+			self._disconnect()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--socket', type=Path, default=MODEL_SERVER_SOCKET)
+	parser.add_argument(
+		'--preload',
+		action='append',
+		default=[],
+		metavar='MODEL',
+		help='Load a model size at startup (repeatable); others load on first use',
+	)
+	parser.add_argument(
+		'--workers',
+		type=int,
+		default=1,
+		help='Windows transcribed concurrently (each uses 4 CPU threads)',
+	)
+	parser.add_argument(
+		'--log-level', type=str.upper, choices=LOG_LEVELS, default=DEFAULT_LOG_LEVEL
+	)
+	args = parser.parse_args()
+
+	try:
+		server = ModelServer(args.socket, workers=args.workers)
+	except RuntimeError as e:
+		sys.exit(str(e))
+	# After the socket check, so a refused second server leaves the log alone
+	configure_logging(args.log_level, SERVER_LOG_FILE)
+	for model_size in args.preload:
+		server.engine(model_size)
+
+	def stop(signum: int, frame: object) -> None:
+		# shutdown() waits for serve_forever, so it must not run on this thread
+		threading.Thread(target=server.shutdown).start()
+
+	signal.signal(signal.SIGINT, stop)
+	signal.signal(signal.SIGTERM, stop)
+	print(f'Model server listening on {args.socket}', flush=True)
+	try:
+		server.serve_forever()
+	finally:
+		server.server_close()
+
+
+if __name__ == '__main__':
+	main()
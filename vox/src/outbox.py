@@ -0,0 +1,234 @@
+"""Durable outbox for swear counts that have not been delivered yet."""
+
+import os
+import threading
+from pathlib import Path
+from typing import IO
+
+from file_claim import FileClaim, claim_file
+from logging_setup import get_logger
+
+log = get_logger(__name__)
+
+# Buffered appends are written and fsynced at most this often
+FSYNC_INTERVAL_SECONDS = 0.5
+# Truncate the log once everything is delivered and it has grown past this
+COMPACT_THRESHOLD_BYTES = 64 * 1024
+
+
+class ReportOutbox:
+	"""Append-only log of swear counts awaiting delivery.
+
+	Appends only touch memory; a background thread writes them to the log and
+	fsyncs in batches. A commit record is written synchronously once a batch
+	has been accepted by the service, so after a crash (including one halfway
+	through a replay) every count without a commit record is replayed. A crash
+	between the service accepting a batch and its commit record reaching disk
+	re-sends that batch once, i.e. delivery is at-least-once.
+
+	Log records, one per line:
+		a <seq> <count>   count appended with sequence number seq
+		c <seq>           everything up to and including seq was delivered
+
+	The log belongs to one vox process at a time (see file_claim): another
+	instance replaying it would report the same counts twice. When the log is
+	in use, the outbox opens the first free numbered sibling instead.
+
+	With no path the outbox is memory-only and nothing survives a restart.
+	"""
+
+	def __init__(self, path: Path | None = None):
+		"""Open the outbox, recovering any counts left over from a previous run.
+
+		Args:
+			path: Log file location, or None for a memory-only outbox. The
+				file actually used is self.path.
+
+		Raises:
+			OSError: If no log file could be claimed.
+		"""
+		self.path = path
+		self._claim: FileClaim | None = None
+		self._lock = threading.Lock()
+		self._io_lock = threading.Lock()
+		self._seq = 0
+		self._committed = 0
+		self._pending = 0
+		self._buffer: list[tuple[int, int]] = []
+		self._inflight_upto: int | None = None
+		self._inflight = 0
+		self._file: IO[str] | None = None
+		self._wake = threading.Event()
+		self._stop = threading.Event()
+		self._writer: threading.Thread | None = None
+
+		if path is not None:
+			self._claim = claim_file(path)
+			self.path = self._claim.path
+			if self.path != path:
+				log.info(f'Outbox {path} is in use by another vox, using {self.path}')
+			self._open(self.path)
+			self._writer = threading.Thread(
+				target=self._run_writer, name='outbox-writer', daemon=True
+			)
+			self._writer.start()
+
+	def _open(self, path: Path) -> None:
+		"""Replay the log from disk and rewrite it with only undelivered counts."""
+		entries: dict[int, int] = {}
+		committed = 0
+
+		if path.exists():
+			with open(path, 'r', encoding='utf-8') as f:
+				for line in f:
+					# A torn final record from a crash mid-write is ignored
+					if not line.endswith('\n'):
+						break
+					fields = line.split()
+					try:
+						if fields[0] == 'a' and len(fields) == 3:
+							entries[int(fields[1])] = int(fields[2])
+						elif fields[0] == 'c' and len(fields) == 2:
+							committed = max(committed, int(fields[1]))
+					except (ValueError, IndexError):
+						break
+
+		unsent = {seq: count for seq, count in entries.items() if seq > committed}
+		self._seq = max(entries, default=0)
+		self._committed = min(unsent, default=self._seq + 1) - 1
+		self._pending = sum(unsent.values())
+
+		# Compact: rewrite atomically with only the undelivered records
+		path.parent.mkdir(parents=True, exist_ok=True)
+		tmp_path = path.with_suffix(path.suffix + '.tmp')
+		with open(tmp_path, 'w', encoding='utf-8') as f:
+			f.writelines(f'a {seq} {count}\n' for seq, count in sorted(unsent.items()))
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp_path, path)
+
+		self._file = open(path, 'a', encoding='utf-8')
+
+		if self._pending:
+			log.info(
+				f'Outbox recovered {self._pending} unsent swear(s) '
+				f'in {len(unsent)} record(s) from {path}'
+			)
+
+	def append(self, count: int) -> None:
+		"""Record a count for delivery. Does no I/O on the calling thread."""
+		with self._lock:
+			self._seq += 1
+			self._pending += count
+			if self._file is not None:
+				self._buffer.append((self._seq, count))
+		if self._file is not None:
+			self._wake.set()
+
+	def reserve(self) -> tuple[int, int] | None:
+		"""Claim all undelivered counts for sending as one batch.
+
+		Only one batch may be in flight at a time; it must be finished with
+		commit() or release().
+
+		Returns:
+			Tuple of (upto_seq, total), or None if nothing is available.
+		"""
+		with self._lock:
+			if self._inflight_upto is not None or self._seq == self._committed:
+				return None
+			self._inflight_upto = self._seq
+			self._inflight = self._pending
+			return self._inflight_upto, self._inflight
+
+	def commit(self) -> None:
+		"""Durably mark the in-flight batch as delivered."""
+		with self._io_lock:
+			with self._lock:
+				upto = self._inflight_upto
+			if upto is None:
+				return
+			if self._file is not None:
+				self._write_buffered(f'c {upto}\n')
+			with self._lock:
+				self._pending -= self._inflight
+				self._inflight_upto = None
+				self._inflight = 0
+				self._committed = upto
+			self._maybe_compact()
+
+	def release(self) -> None:
+		"""Return the in-flight batch to the outbox after a failed send."""
+		with self._lock:
+			self._inflight_upto = None
+			self._inflight = 0
+
+	@property
+	def pending(self) -> int:
+		"""Total undelivered count, including any batch in flight."""
+		return self._pending
+
+	@property
+	def unsent(self) -> int:
+		"""Undelivered count not currently in flight."""
+		return self._pending - self._inflight
+
+	def _write_buffered(self, extra: str = '') -> None:
+		"""Write buffered appends (plus any extra record) and fsync.
+
+		Must be called with self._io_lock held.
+		"""
+		assert self._file is not None
+		with self._lock:
+			buffer, self._buffer = self._buffer, []
+		if not buffer and not extra:
+			return
+		self._file.write(''.join(f'a {seq} {count}\n' for seq, count in buffer) + extra)
+		self._file.flush()
+		os.fsync(self._file.fileno())
+
+	def _maybe_compact(self) -> None:
+		"""Truncate the log once it is large and fully delivered.
+
+		Must be called with self._io_lock held.
+		"""
+		if self._file is None or self._file.tell() < COMPACT_THRESHOLD_BYTES:
+			return
+		with self._lock:
+			if self._seq != self._committed or self._buffer:
+				return
+			self._file.seek(0)
+			self._file.truncate()
+			self._file.flush()
+			os.fsync(self._file.fileno())
+		log.debug('Outbox compacted')
+
+	def _run_writer(self) -> None:
+		"""Background thread: write and fsync buffered appends in batches."""
+		while not self._stop.is_set():
+			self._wake.wait()
+			self._wake.clear()
+			try:
+				with self._io_lock:
+					self._write_buffered()
+			except OSError as e:
+				log.error(f'Failed to write outbox: {e}')
+			# Let further appends accumulate into the next batch
+			self._stop.wait(FSYNC_INTERVAL_SECONDS)
+
+	def close(self) -> None:
+		"""Flush buffered appends to disk and stop the writer thread."""
+		if self._file is None:
+			return
+		self._stop.set()
+		self._wake.set()
+		if self._writer is not None:
+			self._writer.join(timeout=2)
+		with self._io_lock:
+			self._write_buffered()
+			self._file.close()
+			self._file = None
+		if self._claim is not None:
+			self._claim.release()
+		if self._pending:
+			log.info(f'Outbox closed with {self._pending} unsent swear(s)')
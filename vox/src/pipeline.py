@@ -0,0 +1,431 @@
+"""Threaded transcription pipeline with bounded queues between stages.
+
+	source -> segment -> transcribe -> detect -> report
+
+The source (AudioCapture or an ingest stream) fills the segment stage's
+queue with (capture_ns, chunk) items. Every other stage is a Stage: one
+worker thread blocked on its own bounded queue, handing each result to the
+next. Nothing polls; the end of the stream is an END marker that flows down
+the chain behind the last item.
+
+A full queue blocks the stage feeding it, so a slow model backs up through
+the segmenter into the capture queue, where it shows as
+vox_audio_queue_seconds; each stage's own backlog is exported as
+vox_stage_queue_depth{stage=...}. While the transcriber decodes a window,
+the segmenter is already cutting and gating the next one.
+
+With an on_words hook (the bleep output), windows are decoded with word
+timestamps and every window, including the ones gated as silence, is handed
+to the hook as soon as its words are known.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from queue import Full, Queue
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+	from swear_detection import SwearDetector
+	from transcription import TimedWord, TranscriptionEngine
+
+from audio import BLOCKSIZE, SAMPLE_RATE
+from logging_setup import get_logger
+from metrics import metrics
+from processing import (
+	BUFFER_DURATION_SECONDS,
+	SAMPLES_PER_BUFFER,
+	NoiseFloorTracker,
+	PipelineStats,
+	process_audio_buffer,
+	process_audio_buffer_words,
+)
+from tracing import TraceWindow, tracer
+
+log = get_logger(__name__)
+
+# 'speculate' only runs in the speculative pipeline (see speculative.py)
+STAGE_NAMES = ('segment', 'speculate', 'transcribe', 'detect', 'report')
+# Windows cut but not yet transcribed. Beyond this the segmenter stops
+# taking chunks and audio waits in the capture queue instead
+TRANSCRIBE_QUEUE_WINDOWS = 2
+# Transcripts and detections waiting; these stages only stall on a slow UI
+# or service
+DETECT_QUEUE_WINDOWS = 8
+REPORT_QUEUE_WINDOWS = 8
+# A trailing partial window shorter than this is dropped at end of stream
+MIN_FLUSH_SECONDS = 0.5
+
+# Marks the end of the stream in every stage queue
+END = object()
+
+
+class Stage:
+	"""One pipeline step: a worker thread reading its own queue.
+
+	`process` is called with each item and returns what to hand to the next
+	stage, or None to hand on nothing. When the input ends, `finish` (if
+	set) may return one last item. Exceptions are logged and the item is
+	dropped; the stage keeps running.
+	"""
+
+	def __init__(
+		self,
+		name: str,
+		process: Callable[[Any], Any],
+		maxsize: int = 0,
+		finish: Callable[[], Any] | None = None,
+		queue: Queue | None = None,
+	):
+		"""Create a stage.
+
+		Args:
+			name: Stage name, used for its thread and metrics.
+			process: Called on the stage thread with each item.
+			maxsize: Queue bound; put() blocks while it is full (0: unbounded).
+			finish: Called once after the last item.
+			queue: Existing queue to read instead of a new one (the source's).
+		"""
+		self.name = name
+		self.queue: Queue = queue if queue is not None else Queue(maxsize)
+		self.downstream: Stage | None = None
+		# Fed directly by `process`; each is sent END after this stage ends
+		self.branches: list[Stage] = []
+		# Called on the stage thread once it has handed on END
+		self.on_done: Callable[[], None] | None = None
+		self._process = process
+		self._finish = finish
+		self._cancelled = threading.Event()
+		self._thread: threading.Thread | None = None
+
+	def start(self, thread_name: str, cancelled: threading.Event) -> None:
+		self._cancelled = cancelled
+		self._thread = threading.Thread(target=self._run, name=thread_name, daemon=True)
+		self._thread.start()
+
+	def put(self, item: Any) -> None:
+		"""Queue an item, blocking while the stage is behind (backpressure)."""
+		self.queue.put(item)
+
+	def offer(self, item: Any) -> bool:
+		"""Queue an item unless the stage is full; False if it was not queued."""
+		try:
+			self.queue.put_nowait(item)
+		except Full:
+			return False
+		return True
+
+	def join(self, timeout: float | None = None) -> None:
+		if self._thread is not None:
+			self._thread.join(timeout)
+
+	@property
+	def running(self) -> bool:
+		return self._thread is not None and self._thread.is_alive()
+
+	def _hand_on(self, item: Any) -> None:
+		if item is not None and self.downstream is not None:
+			self.downstream.put(item)
+
+	def _run(self) -> None:
+		while (item := self.queue.get()) is not END:
+			# Once cancelled, keep draining so upstream puts never block
+			if self._cancelled.is_set():
+				continue
+			try:
+				self._hand_on(self._process(item))
+			except Exception as e:
+				log.exception(f'Pipeline stage {self.name} failed: {e}')
+		if self._finish is not None and not self._cancelled.is_set():
+			try:
+				self._hand_on(self._finish())
+			except Exception as e:
+				log.exception(f'Pipeline stage {self.name} failed to finish: {e}')
+		if self.downstream is not None:
+			self.downstream.put(END)
+		for branch in self.branches:
+			branch.put(END)
+		if self.on_done is not None:
+			self.on_done()
+
+
+class Pipeline:
+	"""Stages chained in order, started and stopped together."""
+
+	def __init__(
+		self,
+		name: str,
+		stages: list[Stage],
+		branches: list[tuple[Stage, Stage]] | None = None,
+	):
+		"""Chain `stages` in order.
+
+		Args:
+			name: Prefix for the stage thread names.
+			stages: The chain; each stage hands its results to the next.
+			branches: (feeder, branch) pairs for stages off the chain. The
+				feeder's process puts items on its branch itself; the branch
+				hands nothing on and ends once the feeder has.
+		"""
+		self.name = name
+		for stage, downstream in zip(stages, stages[1:]):
+			stage.downstream = downstream
+		leaves = [stages[-1]]
+		for feeder, branch in branches or []:
+			feeder.branches.append(branch)
+			leaves.append(branch)
+		self.stages = stages + [branch for _, branch in branches or []]
+		self._leaves_left = len(leaves)
+		for leaf in leaves:
+			leaf.on_done = self._finished
+		self._cancelled = threading.Event()
+		self._stopped = False
+
+	def start(self) -> None:
+		with _running_lock:
+			_running.add(self)
+		for stage in self.stages:
+			stage.start(f'{self.name}-{stage.name}', self._cancelled)
+
+	def stop(self) -> None:
+		"""End the stream after what the source has queued so far.
+
+		Everything already captured still goes through every stage,
+		including the last partial window. Returns at once; see join().
+		"""
+		if self._stopped:
+			return
+		self._stopped = True
+		self.stages[0].put(END)
+
+	def cancel(self) -> None:
+		"""Stop and drop queued work; a window being decoded is discarded."""
+		self._cancelled.set()
+		self.stop()
+
+	def join(self, timeout: float | None = None) -> None:
+		"""Wait for every stage to finish."""
+		for stage in self.stages:
+			stage.join(timeout)
+
+	def _finished(self) -> None:
+		with _running_lock:
+			self._leaves_left -= 1
+			if self._leaves_left == 0:
+				_running.discard(self)
+
+	@property
+	def running(self) -> bool:
+		return any(stage.running for stage in self.stages)
+
+	def depth(self, stage_name: str) -> int:
+		"""Items waiting in a stage's queue (0 if there is no such stage)."""
+		for stage in self.stages:
+			if stage.name == stage_name:
+				return stage.queue.qsize()
+		return 0
+
+	@property
+	def queued_seconds(self) -> float:
+		"""Audio captured but not yet transcribed (chunks and cut windows)."""
+		chunks = self.depth('segment') * BLOCKSIZE / SAMPLE_RATE
+		return chunks + self.depth('transcribe') * BUFFER_DURATION_SECONDS
+
+
+# Pipelines whose queues are exported until their last stage and branches end
+_running: set[Pipeline] = set()
+_running_lock = threading.Lock()
+
+
+def _queued(stage_name: str) -> int:
+	with _running_lock:
+		pipelines = list(_running)
+	return sum(pipeline.depth(stage_name) for pipeline in pipelines)
+
+
+for _name in STAGE_NAMES:
+	metrics.stage_queue_depth.set_function(
+		lambda stage_name=_name: _queued(stage_name), _name
+	)
+
+
+# on_words(capture_ns of the window's first chunk, window samples, words)
+WordsHook = Callable[[int, int, list['TimedWord']], None]
+
+
+@dataclass
+class Window:
+	"""A window of audio on its way through the pipeline."""
+
+	trace: TraceWindow
+	chunks: list[np.ndarray]
+	samples: int
+	cut_ns: int = 0
+	text: str = ''
+	count: int = 0
+	swears: list[str] = field(default_factory=list)
+
+
+class _Segmenter:
+	"""Cuts queued chunks into fixed-length windows and gates out silence."""
+
+	def __init__(
+		self,
+		gate: NoiseFloorTracker,
+		stats: PipelineStats | None,
+		on_words: WordsHook | None = None,
+	):
+		self._gate = gate
+		self._stats = stats
+		self._on_words = on_words
+		self._chunks: list[np.ndarray] = []
+		self._samples = 0
+		self._started_ns = 0
+		self._next_id = 0
+		self.chunks_received = 0
+
+	def process(self, item: tuple[int, np.ndarray]) -> Window | None:
+		captured_ns, chunk = item
+		if not self._chunks:
+			self._started_ns = captured_ns
+		self._chunks.append(chunk)
+		self._samples += len(chunk)
+		self.chunks_received += 1
+		if self._samples < SAMPLES_PER_BUFFER:
+			return None
+		return self._cut()
+
+	def finish(self) -> Window | None:
+		log.info(f'Transcription input ended. Chunks received: {self.chunks_received}')
+		if self._chunks and self._samples > SAMPLE_RATE * MIN_FLUSH_SECONDS:
+			log.info(f'Final flush: {self._samples} samples')
+			return self._cut()
+		return None
+
+	def _cut(self) -> Window | None:
+		window = Window(
+			TraceWindow(self._next_id, self._started_ns), self._chunks, self._samples
+		)
+		self._next_id += 1
+		self._chunks = []
+		self._samples = 0
+		trace = window.trace
+		now_ns = time.perf_counter_ns()
+		tracer.record('buffer', trace.started_ns, now_ns, trace.window_id)
+
+		metrics.windows_processed.inc()
+		started = time.perf_counter()
+		with tracer.window(trace):
+			with tracer.span('gate'):
+				silent = self._gate.is_silent(window.chunks)
+		if silent:
+			metrics.windows_skipped.inc()
+			if self._on_words is not None:
+				self._on_words(trace.started_ns, window.samples, [])
+			if self._stats is not None:
+				self._stats.record_window(
+					window.samples / SAMPLE_RATE,
+					time.perf_counter() - started,
+					skipped=True,
+				)
+			return None
+		window.cut_ns = time.perf_counter_ns()
+		return window
+
+
+def transcription_pipeline(
+	source: Queue,
+	transcription_engine: 'TranscriptionEngine',
+	swear_detector: 'SwearDetector',
+	on_text: Callable[[str], None],
+	report: Callable[[int, list[str]], None],
+	stats: PipelineStats | None = None,
+	gate: NoiseFloorTracker | None = None,
+	name: str = 'transcription',
+	on_words: WordsHook | None = None,
+	select_engine: Callable[[], 'TranscriptionEngine'] | None = None,
+) -> Pipeline:
+	"""Build the pipeline for one audio stream (call start() to run it).
+
+	Each window is opened as a TraceWindow on every stage that handles it,
+	so spans recorded in on_text and report are tagged with its id.
+
+	Args:
+		source: Queue of (capture_ns, chunk) items from AudioCapture or an
+			ingest stream; read by the segment stage.
+		transcription_engine: Engine to perform transcription.
+		swear_detector: Hotwords (re-read each window so word list reloads
+			take effect) and detection.
+		on_text: Called on the detect stage with each non-empty transcription.
+		report: Called on the report stage as report(count, words) for each
+			window with swears.
+		stats: If set, receives the audio length and processing time of
+			each window.
+		gate: Noise gate for this stream (default: a fresh NoiseFloorTracker).
+		name: Prefix for the stage thread names.
+		on_words: If set, windows are decoded with word timestamps and this is
+			called with each window's words once they are known: on the
+			transcribe stage, or with no words on the segment stage for a
+			window gated as silence. A window whose decode failed is not
+			passed on.
+		select_engine: If set, called for each window to pick the engine
+			instead of transcription_engine (the model governor's choice).
+	"""
+	segmenter = _Segmenter(
+		gate if gate is not None else NoiseFloorTracker(), stats, on_words
+	)
+
+	def decode(window: Window) -> str:
+		hotwords = swear_detector.hotwords
+		engine = select_engine() if select_engine is not None else transcription_engine
+		if on_words is None:
+			return process_audio_buffer(window.chunks, engine, hotwords)
+		try:
+			words = process_audio_buffer_words(window.chunks, engine, hotwords)
+		except Exception as e:
+			log.exception(f'Transcription error: {e}')
+			return ''
+		on_words(window.trace.started_ns, window.samples, words)
+		return ' '.join(word.word for word in words)
+
+	def transcribe(window: Window) -> Window | None:
+		trace = window.trace
+		tracer.record('queue', window.cut_ns, time.perf_counter_ns(), trace.window_id)
+		with tracer.window(trace):
+			started = time.perf_counter()
+			text = decode(window)
+			elapsed = time.perf_counter() - started
+		metrics.windows_decoded.inc()
+		metrics.decode_seconds.observe(elapsed)
+		if stats is not None:
+			stats.record_window(window.samples / SAMPLE_RATE, elapsed)
+		# The audio is no longer needed downstream
+		window.chunks = []
+		if not text.strip():
+			return None
+		window.text = text
+		return window
+
+	def detect(window: Window) -> Window | None:
+		with tracer.window(window.trace):
+			on_text(window.text)
+			with tracer.span('detect'):
+				window.count, window.swears = swear_detector.detect(window.text)
+		return window if window.count > 0 else None
+
+	def report_window(window: Window) -> None:
+		with tracer.window(window.trace):
+			report(window.count, window.swears)
+
+	return Pipeline(
+		name,
+		[
+			Stage('segment', segmenter.process, finish=segmenter.finish, queue=source),
+			Stage('transcribe', transcribe, TRANSCRIBE_QUEUE_WINDOWS),
+			Stage('detect', detect, DETECT_QUEUE_WINDOWS),
+			Stage('report', report_window, REPORT_QUEUE_WINDOWS),
+		],
+	)
@@ -1,40 +1,191 @@
 """Audio processing utilities for transcription."""
 
+import logging
+import threading
+from collections import deque
 from typing import TYPE_CHECKING
 
 import numpy as np
 
 if TYPE_CHECKING:
-	from transcription import TranscriptionEngine
+	from transcription import TimedWord, TranscriptionEngine
 
-from audio import SAMPLE_RATE
+from audio import INT16_FULL_SCALE, SAMPLE_RATE, mean_square
 from logging_setup import get_logger
+from tracing import tracer
 
 log = get_logger(__name__)
 
 # Buffer configuration
 BUFFER_DURATION_SECONDS = 3.0
 SAMPLES_PER_BUFFER = int(SAMPLE_RATE * BUFFER_DURATION_SECONDS)
+# Windows averaged into the rolling real-time factor
+RTF_HISTORY_WINDOWS = 10
+
+# Noise gate: a window is decoded only if some chunk rises this far above the
+# learned background level
+GATE_MARGIN_DB = 10.0
+# Share of the gap the floor closes per window when the room gets louder
+# (~30 s to adapt at 3 s windows); it follows quieter levels immediately
+GATE_FLOOR_RISE = 0.1
+# Floor never drops below this RMS (-80 dBFS), so digital silence followed by
+# faint hiss doesn't open the gate
+GATE_MIN_FLOOR = 1e-4
+# Windows decoded after one that opened the gate, to keep trailing words
+GATE_HANGOVER_WINDOWS = 1
+
+
+class PipelineStats:
+	"""Rolling per-window timings, written by the pipeline stages.
+
+	Read from the UI thread; the lock only guards the short history.
+	"""
+
+	def __init__(self, history: int = RTF_HISTORY_WINDOWS):
+		self._lock = threading.Lock()
+		self._history: deque[tuple[float, float]] = deque(maxlen=history)
+		self.windows = 0
+		self.skipped = 0
+		self.last_decode_seconds: float | None = None
+
+	def record_window(
+		self, audio_seconds: float, process_seconds: float, skipped: bool = False
+	) -> None:
+		"""Record one window, transcribed or skipped by the noise gate."""
+		with self._lock:
+			self._history.append((audio_seconds, process_seconds))
+			self.windows += 1
+			if skipped:
+				self.skipped += 1
+			else:
+				self.last_decode_seconds = process_seconds
+
+	@property
+	def rtf(self) -> float | None:
+		"""Processing time over audio time for recent windows (<1 keeps up)."""
+		with self._lock:
+			audio = sum(a for a, _ in self._history)
+			process = sum(p for _, p in self._history)
+		return process / audio if audio else None
+
+	@property
+	def skip_ratio(self) -> float | None:
+		"""Share of all windows skipped as silence."""
+		return self.skipped / self.windows if self.windows else None
+
+
+class NoiseFloorTracker:
+	"""Adaptive noise gate that learns the room's background level.
+
+	Works on the raw chunks of a window: the quietest chunk's RMS estimates
+	the background, the loudest decides whether anything rose above it. Only
+	the sums of squares are computed, so a silent window is rejected without
+	concatenating, normalizing or copying it.
+
+	One tracker per audio stream; not thread-safe.
+	"""
+
+	def __init__(
+		self,
+		margin_db: float = GATE_MARGIN_DB,
+		rise: float = GATE_FLOOR_RISE,
+		min_floor: float = GATE_MIN_FLOOR,
+		hangover: int = GATE_HANGOVER_WINDOWS,
+	):
+		self.ratio = 10 ** (margin_db / 20)
+		self.rise = rise
+		self.min_floor = min_floor
+		self.hangover = hangover
+		self.floor: float | None = None
+		self.decoded = 0
+		self.skipped = 0
+		self._hold = 0
+
+	def is_silent(self, audio_buffer: list[np.ndarray]) -> bool:
+		"""Update the floor with this window and decide whether to skip it.
+
+		The first window only teaches the floor and is always decoded.
+		"""
+		levels = [mean_square(chunk) for chunk in audio_buffer if chunk.size]
+		if not levels:
+			return True
+		quietest = max(np.sqrt(min(levels)), self.min_floor)
+		loudest = float(np.sqrt(max(levels)))
+
+		floor = self.floor
+		if floor is None or quietest < floor:
+			self.floor = quietest
+		else:
+			self.floor = floor + (quietest - floor) * self.rise
+
+		if floor is None or loudest > floor * self.ratio:
+			self._hold = self.hangover
+			silent = False
+		elif self._hold > 0:
+			self._hold -= 1
+			silent = False
+		else:
+			silent = True
+
+		if silent:
+			self.skipped += 1
+			log.debug(
+				'Skipping silent window: peak rms %.5f, floor %.5f', loudest, floor
+			)
+		else:
+			self.decoded += 1
+		return silent
 
 
 def normalize_audio(audio_data: np.ndarray, target_peak: float = 0.9) -> np.ndarray:
 	"""Normalize audio to target peak level.
 
+	int16 audio is converted to float32 in the same pass that applies the
+	gain, so it is the only conversion on the int16 path.
+
 	Args:
-		audio_data: Input audio samples.
+		audio_data: Input audio samples (float32, or int16 at full scale).
 		target_peak: Target peak amplitude (0.0 to 1.0).
 
 	Returns:
-		Normalized audio data.
+		Normalized audio data (float32).
 	"""
+	if audio_data.dtype == np.int16:
+		# max/min rather than abs: no temporary, and abs(-32768) overflows
+		peak = max(int(audio_data.max()), -int(audio_data.min())) / INT16_FULL_SCALE
+		gain = target_peak / peak if peak > 0.001 else 1.0
+		if gain != 1.0:
+			log.debug('Normalized audio: peak %.4f -> %s', peak, target_peak)
+		return np.multiply(audio_data, gain / INT16_FULL_SCALE, dtype=np.float32)
+
 	peak = float(np.max(np.abs(audio_data)))
 	if peak > 0.001:
 		normalized = audio_data * (target_peak / peak)
-		log.info(f'Normalized audio: peak {peak:.4f} -> {target_peak}')
+		log.debug('Normalized audio: peak %.4f -> %s', peak, target_peak)
 		return normalized
 	return audio_data
 
 
+def _prepare_buffer(audio_buffer: list[np.ndarray]) -> np.ndarray:
+	"""Concatenate and normalize a window for the model (the 'prep' span)."""
+	with tracer.span('prep'):
+		audio_data = np.concatenate(audio_buffer)
+
+		# Audio diagnostics (three full passes over the window, so only when read)
+		if log.isEnabledFor(logging.DEBUG):
+			scale = INT16_FULL_SCALE if audio_data.dtype == np.int16 else 1.0
+			log.debug(
+				'Audio buffer: %d samples, min=%.4f, max=%.4f, rms=%.4f',
+				len(audio_data),
+				float(np.min(audio_data)) / scale,
+				float(np.max(audio_data)) / scale,
+				float(np.sqrt(mean_square(audio_data))),
+			)
+
+		# Normalize before transcription
+		return normalize_audio(audio_data)
+
+
 def process_audio_buffer(
 	audio_buffer: list[np.ndarray],
 	transcription_engine: 'TranscriptionEngine',
@@ -53,25 +204,32 @@ def process_audio_buffer(
 	if not audio_buffer:
 		return ''
 
-	audio_data = np.concatenate(audio_buffer)
-
-	# Audio diagnostics
-	audio_min = float(np.min(audio_data))
-	audio_max = float(np.max(audio_data))
-	audio_rms = float(np.sqrt(np.mean(audio_data**2)))
-	log.info(
-		f'Audio buffer: {len(audio_data)} samples, '
-		f'min={audio_min:.4f}, max={audio_max:.4f}, rms={audio_rms:.4f}'
-	)
-
-	# Normalize before transcription
-	audio_data = normalize_audio(audio_data)
+	audio_data = _prepare_buffer(audio_buffer)
 
 	try:
-		log.info('Calling transcription engine...')
+		log.debug('Calling transcription engine...')
 		text = transcription_engine.transcribe(audio_data, hotwords=hotwords)
-		log.info(f'Transcription result: "{text}" (len={len(text)})')
+		log.debug('Transcription result: "%s" (len=%d)', text, len(text))
 		return text
 	except Exception as e:
-		log.exception(f'Transcription error: {e}')
+		log.exception('Transcription error: %s', e)
 		return ''
+
+
+def process_audio_buffer_words(
+	audio_buffer: list[np.ndarray],
+	transcription_engine: 'TranscriptionEngine',
+	hotwords: str | None = None,
+) -> list['TimedWord']:
+	"""Like process_audio_buffer, but with word timestamps.
+
+	Errors propagate, so callers can tell a failed decode from silence.
+
+	Returns:
+		Words with start/end seconds relative to the start of the buffer.
+	"""
+	if not audio_buffer:
+		return []
+	audio_data = _prepare_buffer(audio_buffer)
+	with tracer.span('decode'):
+		return transcription_engine.transcribe_words(audio_data, hotwords=hotwords)
@@ -0,0 +1,131 @@
+"""Re-check recorded audio: `vox reanalyze FROM [TO]`.
+
+Reads a time range back from the flight recorder (see recorder.py), which may
+still be recording, and runs it through any model and word list. Every swear
+is printed with its wall-clock time and context, so a disputed count can be
+compared against what was actually said.
+"""
+
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any
+
+from audio import SAMPLE_RATE
+from cli import ReanalyzeArgs
+from config import get_model_size
+from logging_setup import get_logger
+from recorder import read_recording, recording_coverage
+from scan import find_swears, split_at_silence, write_report
+from swear_detection import SwearDetector
+from transcription import TranscriptionEngine
+
+log = get_logger(__name__)
+
+
+def _wall_clock(seconds: float) -> str:
+	"""Local date and time of a Unix timestamp, to the millisecond."""
+	return datetime.fromtimestamp(seconds).isoformat(sep=' ', timespec='milliseconds')
+
+
+def run_reanalyze(args: ReanalyzeArgs) -> int:
+	"""Transcribe a recorded range and print its swears. Returns the exit code."""
+	try:
+		spans = read_recording(args.recording, args.start, args.end)
+	except FileNotFoundError:
+		print(
+			f'vox reanalyze: no recording at {args.recording} (run vox with --record)',
+			file=sys.stderr,
+		)
+		return 1
+	except ValueError as e:
+		print(f'vox reanalyze: {e}', file=sys.stderr)
+		return 1
+
+	if not spans:
+		coverage = recording_coverage(args.recording)
+		held = (
+			f'it holds {_wall_clock(coverage[0])} to {_wall_clock(coverage[1])}'
+			if coverage
+			else 'it is empty'
+		)
+		print(
+			f'vox reanalyze: nothing recorded between {_wall_clock(args.start)} and '
+			f'{_wall_clock(args.end)}; {held}',
+			file=sys.stderr,
+		)
+		return 1
+
+	detector = SwearDetector(args.word_list)
+	model_size = args.model_size or get_model_size()
+	audio_seconds = sum(len(span.audio) for span in spans) / SAMPLE_RATE
+	print(
+		f'Re-analyzing {audio_seconds:.1f}s of audio in {len(spans)} span(s) '
+		f'with {model_size}...',
+		file=sys.stderr,
+	)
+
+	started = time.perf_counter()
+	engine = TranscriptionEngine(model_size=model_size)
+	try:
+		engine.load()
+		swears: list[dict[str, Any]] = []
+		for span in spans:
+			chunks = split_at_silence(iter([span.audio]), args.chunk_seconds)
+			for offset, audio in chunks:
+				base = span.start + offset / SAMPLE_RATE
+				words = engine.transcribe_words(
+					audio, language=args.language, hotwords=detector.hotwords
+				)
+				timed = [
+					[word, round(base + start, 3), round(base + end, 3)]
+					for word, start, end in words
+				]
+				for swear in find_swears(detector, timed, clock=_wall_clock):
+					word, context = swear['word'], swear['context']
+					print(f'{swear["timestamp"]}  {word:<12} {context}')
+					swears.append(swear)
+	except Exception as e:
+		log.exception('Re-analysis failed')
+		print(f'vox reanalyze: {e}', file=sys.stderr)
+		return 1
+	finally:
+		engine.unload()
+
+	totals = Counter(swear['word'] for swear in swears)
+	elapsed = time.perf_counter() - started
+	if args.out is not None:
+		report_format = args.format or (
+			'csv' if args.out.suffix.lower() == '.csv' else 'json'
+		)
+		write_report(
+			args.out,
+			report_format,
+			{
+				'recording': str(args.recording),
+				'from': _wall_clock(args.start),
+				'to': _wall_clock(args.end),
+				'model': model_size,
+				'audio_seconds': round(audio_seconds, 3),
+				'spans': [
+					{
+						'start': _wall_clock(span.start),
+						'seconds': round(len(span.audio) / SAMPLE_RATE, 3),
+					}
+					for span in spans
+				],
+				'totals': {'swears': len(swears), 'words': dict(totals.most_common())},
+				'swears': swears,
+			},
+		)
+
+	breakdown = ', '.join(f'{word} {count}' for word, count in totals.most_common())
+	print(
+		f'{len(swears)} swear(s)'
+		+ (f' ({breakdown})' if breakdown else '')
+		+ f', analyzed in {elapsed:.1f}s'
+		+ (f' -> {args.out}' if args.out is not None else ''),
+		file=sys.stderr,
+	)
+	return 0
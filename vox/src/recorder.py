@@ -0,0 +1,327 @@
+"""Flight recorder: the last N minutes of captured audio on disk.
+
+Captured chunks are kept as int16 in a fixed-size memory-mapped ring file so
+a disputed count can be re-checked later (`vox reanalyze`). File layout:
+
+	header   4 KiB: magic, sample rate, capacities, samples and anchors written
+	anchors  ring of (sample position, wall-clock time) pairs
+	samples  ring of int16 mono samples at SAMPLE_RATE
+
+An anchor is written at the start of every contiguous run of audio and every
+ANCHOR_INTERVAL_SECONDS within one, so any sample's wall-clock time is its
+anchor's time plus its offset. The capture thread only appends to a deque; a
+writer thread converts each batch once and writes it sequentially, then
+publishes the new head in the header so readers (including other processes)
+never see a half-written batch.
+
+Each recording vox process claims its own ring file (see file_claim); a
+second instance records to flight-recorder-1.pcm and so on.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from audio import INT16_FULL_SCALE, SAMPLE_RATE
+from config import DEFAULT_RECORD_MINUTES
+from file_claim import claim_file
+from logging_setup import get_logger
+
+log = get_logger(__name__)
+
+MAGIC = b'VOXREC01'
+HEADER_BYTES = 4096
+HEADER_DTYPE = np.dtype([
+	('magic', 'S8'),
+	('rate', '<u4'),
+	('reserved', '<u4'),
+	('capacity', '<u8'),
+	('anchor_capacity', '<u8'),
+	('head', '<u8'),
+	('anchors', '<u8'),
+])
+ANCHOR_DTYPE = np.dtype([('position', '<u8'), ('time', '<f8')])
+
+# Batches are written this often; also the most audio lost on a crash
+WRITE_INTERVAL_SECONDS = 1.0
+# Dirty pages are synced to disk this often
+SYNC_INTERVAL_SECONDS = 10.0
+# Re-anchor within a contiguous run this often, bounding clock drift
+ANCHOR_INTERVAL_SECONDS = 10.0
+# A chunk this far off the time its position predicts starts a new run
+ANCHOR_TOLERANCE_SECONDS = 0.25
+# Samples just ahead of the writer are not read back, as they may be
+# overwritten while a reader copies them
+READ_MARGIN_SAMPLES = 2 * SAMPLE_RATE
+
+
+class RecordedSpan(NamedTuple):
+	"""Contiguous recorded audio starting at a wall-clock time."""
+
+	start: float
+	audio: np.ndarray
+
+
+def _layout(capacity: int, anchor_capacity: int) -> tuple[int, int]:
+	"""Byte offset of the sample ring and total file size."""
+	anchors_end = HEADER_BYTES + anchor_capacity * ANCHOR_DTYPE.itemsize
+	samples_offset = -(-anchors_end // HEADER_BYTES) * HEADER_BYTES
+	return samples_offset, samples_offset + capacity * 2
+
+
+def _anchor_capacity(capacity: int) -> int:
+	# Periodic anchors plus headroom for many short recording sessions
+	return 2 * int(capacity / SAMPLE_RATE / ANCHOR_INTERVAL_SECONDS) + 1024
+
+
+class _Ring:
+	"""Memory maps of one recorder file."""
+
+	def __init__(self, path: Path, mode: str):
+		header = np.memmap(path, dtype=HEADER_DTYPE, mode='r', shape=(1,))
+		if header['magic'][0] != MAGIC or header['rate'][0] != SAMPLE_RATE:
+			raise ValueError(f'{path} is not a vox flight recording')
+		capacity = int(header['capacity'][0])
+		anchor_capacity = int(header['anchor_capacity'][0])
+		del header
+		samples_offset, size = _layout(capacity, anchor_capacity)
+		if path.stat().st_size != size:
+			raise ValueError(f'{path} is truncated')
+
+		self.header = np.memmap(path, dtype=HEADER_DTYPE, mode=mode, shape=(1,))
+		self.anchors = np.memmap(
+			path,
+			dtype=ANCHOR_DTYPE,
+			mode=mode,
+			offset=HEADER_BYTES,
+			shape=(anchor_capacity,),
+		)
+		self.samples = np.memmap(
+			path, dtype='<i2', mode=mode, offset=samples_offset, shape=(capacity,)
+		)
+		self.capacity = capacity
+		self.anchor_capacity = anchor_capacity
+
+	def flush(self) -> None:
+		self.samples.flush()
+		self.anchors.flush()
+		self.header.flush()
+
+	def runs(self, start: float, end: float) -> list[tuple[float, int, int]]:
+		"""Contiguous recorded runs between two wall-clock times.
+
+		Returns:
+			(start time, first position, end position) per run, oldest first.
+		"""
+		head = int(self.header['head'][0])
+		written = int(self.header['anchors'][0])
+		oldest = max(0, head - self.capacity + READ_MARGIN_SAMPLES)
+
+		count = min(written, self.anchor_capacity)
+		indices = [(written - count + i) % self.anchor_capacity for i in range(count)]
+		anchors = [
+			(int(self.anchors[i]['position']), float(self.anchors[i]['time']))
+			for i in indices
+		]
+
+		runs: list[tuple[float, int, int]] = []
+		for n, (position, anchor_time) in enumerate(anchors):
+			run_end = anchors[n + 1][0] if n + 1 < len(anchors) else head
+			# Clip to what is still in the ring, then to the requested times
+			wanted_first = position + (start - anchor_time) * SAMPLE_RATE
+			wanted_last = position + (end - anchor_time) * SAMPLE_RATE
+			first = int(max(position, oldest, wanted_first))
+			last = int(min(run_end, wanted_last))
+			if last <= first:
+				continue
+			run_start = anchor_time + (first - position) / SAMPLE_RATE
+			if runs:
+				previous_start, previous_first, previous_last = runs[-1]
+				previous_seconds = (previous_last - previous_first) / SAMPLE_RATE
+				drift = previous_start + previous_seconds - run_start
+				if previous_last == first and abs(drift) < ANCHOR_TOLERANCE_SECONDS:
+					# A periodic anchor, not a gap: keep the run whole
+					runs[-1] = (previous_start, previous_first, last)
+					continue
+			runs.append((run_start, first, last))
+		return runs
+
+	def spans(self, start: float, end: float) -> list[RecordedSpan]:
+		"""Copy out the recorded audio between two wall-clock times."""
+		return [
+			RecordedSpan(run_start, self._read(first, last))
+			for run_start, first, last in self.runs(start, end)
+		]
+
+	def coverage(self) -> tuple[float, float] | None:
+		"""Wall-clock times of the oldest and newest sample still recorded."""
+		runs = self.runs(0.0, float('inf'))
+		if not runs:
+			return None
+		last_start, last_first, last_last = runs[-1]
+		return runs[0][0], last_start + (last_last - last_first) / SAMPLE_RATE
+
+	def _read(self, first: int, last: int) -> np.ndarray:
+		begin = first % self.capacity
+		count = last - first
+		head = min(count, self.capacity - begin)
+		pcm = np.concatenate(
+			(self.samples[begin : begin + head], self.samples[: count - head])
+		)
+		return pcm.astype(np.float32) / INT16_FULL_SCALE
+
+
+class FlightRecorder:
+	"""Rolling on-disk recording of the last `minutes` of captured audio.
+
+	feed() is called from the audio callback and never does I/O; call close()
+	to write out the last batch.
+	"""
+
+	def __init__(self, path: Path, minutes: float = DEFAULT_RECORD_MINUTES):
+		"""Open the recording at `path`, keeping its history if it fits.
+
+		A file made for a different length is replaced. If another vox is
+		recording to `path`, its first free numbered sibling is used; the
+		file actually used is self.path.
+
+		Raises:
+			OSError: If no recording file could be claimed.
+		"""
+		self._claim = claim_file(path)
+		self.path = self._claim.path
+		if self.path != path:
+			log.info(f'{path} is in use by another vox, recording to {self.path}')
+		capacity = int(minutes * 60 * SAMPLE_RATE)
+		self._ring = self._open(self.path, capacity)
+		self._pending: deque[tuple[int, np.ndarray]] = deque()
+		self._head = int(self._ring.header['head'][0])
+		self._anchors = int(self._ring.header['anchors'][0])
+		self._anchor_position = -1
+		self._anchor_time = 0.0
+		self._last_sync = time.monotonic()
+		self._stop = threading.Event()
+		self._writer = threading.Thread(
+			target=self._run_writer, name='flight-recorder', daemon=True
+		)
+		self._writer.start()
+		log.info(f'Flight recorder keeping {minutes:g} min of audio in {self.path}')
+
+	@staticmethod
+	def _open(path: Path, capacity: int) -> _Ring:
+		try:
+			ring = _Ring(path, 'r+')
+			if ring.capacity == capacity:
+				return ring
+			log.info(f'Recreating {path} for a different length')
+		except FileNotFoundError:
+			pass
+		except ValueError as e:
+			log.warning(f'Recreating flight recording: {e}')
+
+		anchor_capacity = _anchor_capacity(capacity)
+		_, size = _layout(capacity, anchor_capacity)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		tmp_path = path.with_suffix(path.suffix + '.tmp')
+		with open(tmp_path, 'wb') as f:
+			header = np.zeros(1, dtype=HEADER_DTYPE)
+			header['magic'] = MAGIC
+			header['rate'] = SAMPLE_RATE
+			header['capacity'] = capacity
+			header['anchor_capacity'] = anchor_capacity
+			f.write(header.tobytes())
+			# Sparse; blocks are allocated as the ring first fills
+			f.truncate(size)
+		os.replace(tmp_path, path)
+		return _Ring(path, 'r+')
+
+	def feed(self, captured_ns: int, chunk: np.ndarray) -> None:
+		"""Queue a captured chunk (called on the audio thread)."""
+		self._pending.append((captured_ns, chunk))
+
+	def _run_writer(self) -> None:
+		"""Background thread: write queued chunks in one batch per interval."""
+		while not self._stop.wait(WRITE_INTERVAL_SECONDS):
+			try:
+				self._write_batch()
+			except Exception as e:
+				log.exception(f'Flight recorder write failed: {e}')
+
+	def _write_batch(self) -> None:
+		batch = []
+		while self._pending:
+			batch.append(self._pending.popleft())
+		if not batch:
+			return
+
+		# perf_counter -> wall clock, measured now so it cannot drift
+		wall_offset = time.time() - time.perf_counter_ns() / 1e9
+		ring = self._ring
+		position = self._head
+		for captured_ns, chunk in batch:
+			captured = wall_offset + captured_ns / 1e9
+			since_anchor = position - self._anchor_position
+			expected = self._anchor_time + since_anchor / SAMPLE_RATE
+			if (
+				self._anchor_position < 0
+				or abs(captured - expected) > ANCHOR_TOLERANCE_SECONDS
+				or since_anchor >= ANCHOR_INTERVAL_SECONDS * SAMPLE_RATE
+			):
+				slot = self._anchors % ring.anchor_capacity
+				ring.anchors[slot] = (position, captured)
+				self._anchors += 1
+				self._anchor_position = position
+				self._anchor_time = captured
+			position += chunk.size
+
+		pcm = np.concatenate([chunk.reshape(-1) for _, chunk in batch])
+		if pcm.dtype != np.int16:
+			# Same scale as _read() and int16 capture, so a round trip is exact
+			pcm = np.clip(
+				np.rint(pcm * INT16_FULL_SCALE), -INT16_FULL_SCALE, INT16_FULL_SCALE - 1
+			).astype('<i2')
+		# Only the newest `capacity` samples of an oversized batch survive
+		pcm = pcm[-ring.capacity :]
+		begin = (position - len(pcm)) % ring.capacity
+		first = min(len(pcm), ring.capacity - begin)
+		ring.samples[begin : begin + first] = pcm[:first]
+		ring.samples[: len(pcm) - first] = pcm[first:]
+
+		# Publish only after the samples are in place
+		self._head = position
+		ring.header['anchors'] = self._anchors
+		ring.header['head'] = position
+
+		if time.monotonic() - self._last_sync >= SYNC_INTERVAL_SECONDS:
+			ring.flush()
+			self._last_sync = time.monotonic()
+
+	def close(self) -> None:
+		"""Write out queued audio and sync the file."""
+		self._stop.set()
+		self._writer.join()
+		self._write_batch()
+		self._ring.flush()
+		self._claim.release()
+
+
+def read_recording(path: Path, start: float, end: float) -> list[RecordedSpan]:
+	"""Audio recorded between two wall-clock times (Unix seconds).
+
+	Safe while vox is still recording to the file.
+
+	Raises:
+		FileNotFoundError: If there is no recording.
+		ValueError: If the file is not a flight recording.
+	"""
+	return _Ring(path, 'r').spans(start, end)
+
+
+def recording_coverage(path: Path) -> tuple[float, float] | None:
+	"""Wall-clock range still held by a recording, or None if it is empty."""
+	return _Ring(path, 'r').coverage()
@@ -0,0 +1,415 @@
+"""Offline scan of a recording for swears: `vox scan <file>`.
+
+The file is decoded as a stream (16-bit WAV directly, anything else through
+ffmpeg) and cut at the quietest point between half and all of
+--chunk-seconds, so words are rarely split. Chunks are transcribed with word
+timestamps across a pool of worker processes, each with its own model and an
+even share of the CPU threads. SwearDetector then maps every match back to
+its time in the recording.
+
+Finished chunks are appended to <report>.partial as JSON lines. Rerunning
+the same command after an interruption skips the journaled chunks; the
+journal is removed once the report is written.
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import Counter
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, TextIO
+
+import numpy as np
+
+from audio import SAMPLE_RATE
+from cli import ScanArgs
+from config import get_model_size
+from ingest import PCMDecoder, StreamFormat
+from logging_setup import get_logger
+from swear_detection import SwearDetector
+from transcription import TranscriptionEngine
+
+log = get_logger(__name__)
+
+READ_FRAMES = 65536
+READ_BYTES = 256 * 1024
+# Chunk cut points are chosen between frames of this length
+FRAME_SAMPLES = SAMPLE_RATE // 10
+# Words of context kept on each side of a swear in the report
+CONTEXT_WORDS = 5
+# Chunks waiting for a worker, per worker; bounds memory on long files
+QUEUED_CHUNKS_PER_WORKER = 2
+
+
+def read_pcm(path: Path) -> Iterator[np.ndarray]:
+	"""Yield a recording as mono float32 blocks at SAMPLE_RATE.
+
+	Raises:
+		RuntimeError: If the file needs ffmpeg and ffmpeg is missing or fails.
+	"""
+	try:
+		wav = wave.open(str(path), 'rb')
+	except (wave.Error, EOFError):
+		wav = None
+	if wav is not None and wav.getsampwidth() == 2:
+		with wav:
+			decoder = PCMDecoder(
+				StreamFormat('s16le', wav.getframerate(), wav.getnchannels())
+			)
+			while frames := wav.readframes(READ_FRAMES):
+				yield decoder.decode(frames)
+		return
+	if wav is not None:
+		wav.close()
+	yield from _read_with_ffmpeg(path)
+
+
+def _read_with_ffmpeg(path: Path) -> Iterator[np.ndarray]:
+	ffmpeg = shutil.which('ffmpeg')
+	if ffmpeg is None:
+		raise RuntimeError(f'{path.name} is not 16-bit WAV and ffmpeg is missing')
+	process = subprocess.Popen(
+		[
+			ffmpeg,
+			'-nostdin',
+			'-v',
+			'error',
+			'-i',
+			str(path),
+			'-f',
+			's16le',
+			'-ac',
+			'1',
+			'-ar',
+			str(SAMPLE_RATE),
+			'-',
+		],
+		stdout=subprocess.PIPE,
+		stderr=subprocess.PIPE,
+	)
+	assert process.stdout is not None and process.stderr is not None
+	decoder = PCMDecoder(StreamFormat())
+	try:
+		while data := process.stdout.read(READ_BYTES):
+			yield decoder.decode(data)
+	finally:
+		# Also reached when the consumer stops early
+		process.stdout.close()
+		if process.poll() is None:
+			process.kill()
+		error = process.stderr.read().decode(errors='replace').strip()
+		process.stderr.close()
+	if process.wait() != 0:
+		raise RuntimeError(f'ffmpeg could not decode {path.name}: {error}')
+
+
+def split_at_silence(
+	blocks: Iterator[np.ndarray], chunk_seconds: float
+) -> Iterator[tuple[int, np.ndarray]]:
+	"""Re-cut audio blocks into chunks of chunk_seconds/2..chunk_seconds.
+
+	Each cut lands in the middle of the quietest 0.1 s frame of the allowed
+	range. Holds at most one chunk of audio beyond the block being read.
+
+	Yields:
+		(start sample, chunk audio)
+	"""
+	max_frames = max(2, int(chunk_seconds * SAMPLE_RATE) // FRAME_SAMPLES)
+	min_frames = max_frames // 2
+	max_samples = max_frames * FRAME_SAMPLES
+	pending = np.zeros(0, dtype=np.float32)
+	start = 0
+	for block in blocks:
+		pending = np.concatenate((pending, block))
+		while len(pending) >= max_samples:
+			frames = pending[:max_samples].reshape(max_frames, FRAME_SAMPLES)
+			energy = np.mean(frames[min_frames:] ** 2, axis=1)
+			quietest = min_frames + int(np.argmin(energy))
+			cut = quietest * FRAME_SAMPLES + FRAME_SAMPLES // 2
+			yield start, pending[:cut]
+			start += cut
+			pending = pending[cut:]
+	if len(pending) >= FRAME_SAMPLES:
+		yield start, pending
+
+
+_worker_engine: TranscriptionEngine | None = None
+
+
+def _init_worker(model_size: str, cpu_threads: int) -> None:
+	global _worker_engine
+	# Ctrl-C is handled by the parent, which lets running chunks finish
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	_worker_engine = TranscriptionEngine(model_size=model_size, cpu_threads=cpu_threads)
+	_worker_engine.load()
+
+
+def _transcribe_chunk(
+	index: int,
+	start_sample: int,
+	audio: np.ndarray,
+	language: str,
+	hotwords: str | None,
+) -> dict[str, Any]:
+	"""Transcribe one chunk in a worker; times are seconds into the recording."""
+	assert _worker_engine is not None, 'Worker not initialized'
+	offset = start_sample / SAMPLE_RATE
+	words = _worker_engine.transcribe_words(audio, language=language, hotwords=hotwords)
+	return {
+		'chunk': index,
+		'start': round(offset, 3),
+		'end': round(offset + len(audio) / SAMPLE_RATE, 3),
+		'words': [
+			[word, round(offset + start, 3), round(offset + end, 3)]
+			for word, start, end in words
+		],
+	}
+
+
+class ScanJournal:
+	"""Append-only record of finished chunks for resuming a scan.
+
+	The first line identifies the scan (file, size, mtime and settings); a
+	journal written for anything else is discarded.
+	"""
+
+	def __init__(self, path: Path, identity: dict[str, Any]):
+		self.path = path
+		self.identity = identity
+		self._lock = threading.Lock()
+		self._file: TextIO | None = None
+
+	def open(self, restart: bool) -> dict[int, dict[str, Any]]:
+		"""Open for appending; returns the chunks already finished."""
+		records: dict[int, dict[str, Any]] = {}
+		if self.path.exists() and not restart:
+			with open(self.path, encoding='utf-8') as f:
+				lines = f.read().splitlines()
+			try:
+				identity = json.loads(lines[0]) if lines else None
+			except json.JSONDecodeError:
+				# Killed while the first line was being written
+				identity = None
+			if identity == self.identity:
+				for line in lines[1:]:
+					try:
+						record = json.loads(line)
+					except json.JSONDecodeError:
+						# Torn last line from a hard kill
+						break
+					records[record['chunk']] = record
+			else:
+				log.info(f'Discarding journal {self.path} from a different scan')
+		self._file = open(self.path, 'w', encoding='utf-8')
+		self._write(self.identity)
+		for record in records.values():
+			self._write(record)
+		return records
+
+	def _write(self, record: dict[str, Any]) -> None:
+		assert self._file is not None
+		self._file.write(json.dumps(record) + '\n')
+		self._file.flush()
+
+	def append(self, record: dict[str, Any]) -> None:
+		"""Record a finished chunk (called from executor callback threads)."""
+		with self._lock:
+			self._write(record)
+
+	def close(self, remove: bool = False) -> None:
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+		if remove:
+			self.path.unlink(missing_ok=True)
+
+
+def _clock(seconds: float) -> str:
+	"""H:MM:SS.mmm for a position in the recording."""
+	minutes, secs = divmod(seconds, 60)
+	hours, minutes = divmod(int(minutes), 60)
+	return f'{hours}:{minutes:02d}:{secs:06.3f}'
+
+
+def _end_progress() -> str:
+	"""Newline ending the progress line, which is only drawn on a terminal."""
+	return '\n' if sys.stderr.isatty() else ''
+
+
+def find_swears(
+	detector: SwearDetector,
+	words: list[list[Any]],
+	clock: Callable[[float], str] = _clock,
+) -> list[dict[str, Any]]:
+	"""Swears in one chunk's [word, start, end] list, with times and context.
+
+	`clock` formats a word's start time for the report's timestamp column.
+	"""
+	swears = []
+	for swear, first, last in detector.locate_words([word for word, _, _ in words]):
+		swears.append({
+			'word': swear,
+			'start': words[first][1],
+			'end': words[last][2],
+			'timestamp': clock(words[first][1]),
+			'context': ' '.join(
+				word
+				for word, _, _ in words[
+					max(0, first - CONTEXT_WORDS) : last + CONTEXT_WORDS + 1
+				]
+			),
+		})
+	return swears
+
+
+def write_report(
+	path: Path, report_format: str, report: dict[str, Any]
+) -> None:
+	"""Write the report as JSON, or the swear list as CSV."""
+	if report_format == 'json':
+		path.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+		return
+	with open(path, 'w', newline='', encoding='utf-8') as f:
+		writer = csv.DictWriter(
+			f, fieldnames=['start', 'end', 'timestamp', 'word', 'context']
+		)
+		writer.writeheader()
+		writer.writerows(report['swears'])
+
+
+def run_scan(args: ScanArgs) -> int:
+	"""Scan a recording and write its report. Returns the process exit code."""
+	if not args.file.is_file():
+		print(f'vox scan: no such file: {args.file}', file=sys.stderr)
+		return 1
+	detector = SwearDetector(args.word_list)
+	model_size = args.model_size or get_model_size()
+	report_format = args.format or (
+		'csv' if args.out is not None and args.out.suffix.lower() == '.csv' else 'json'
+	)
+	out = args.out or args.file.with_name(f'{args.file.stem}.swears.{report_format}')
+
+	cpus = os.cpu_count() or 1
+	workers = args.workers or cpus
+	# Split the cores between workers rather than oversubscribing them
+	cpu_threads = max(1, cpus // workers)
+
+	stat = args.file.stat()
+	journal = ScanJournal(
+		out.with_name(out.name + '.partial'),
+		{
+			'file': str(args.file.resolve()),
+			'size': stat.st_size,
+			'mtime_ns': stat.st_mtime_ns,
+			'model': model_size,
+			'chunk_seconds': args.chunk_seconds,
+			'language': args.language,
+		},
+	)
+	records = journal.open(args.restart)
+	if records:
+		print(f'Resuming: {len(records)} chunk(s) already scanned', file=sys.stderr)
+
+	started = time.perf_counter()
+	audio_seconds = 0.0
+	lock = threading.Lock()
+
+	def on_done(future: Future) -> None:
+		# Runs on the executor's thread, so chunks finished while the parent
+		# is interrupted still reach the journal
+		if future.cancelled() or future.exception() is not None:
+			return
+		record = future.result()
+		journal.append(record)
+		with lock:
+			records[record['chunk']] = record
+			finished = len(records)
+		if sys.stderr.isatty():
+			elapsed = time.perf_counter() - started
+			progress = f'\r{finished} chunk(s) scanned, {elapsed:.0f}s'
+			print(progress, end='', file=sys.stderr)
+
+	pool = ProcessPoolExecutor(
+		workers,
+		mp_context=multiprocessing.get_context('spawn'),
+		initializer=_init_worker,
+		initargs=(model_size, cpu_threads),
+	)
+	pending: set[Future] = set()
+	interrupted = False
+	try:
+		chunks = split_at_silence(read_pcm(args.file), args.chunk_seconds)
+		for index, (start, audio) in enumerate(chunks):
+			audio_seconds = (start + len(audio)) / SAMPLE_RATE
+			if index in records:
+				continue
+			while len(pending) >= workers * QUEUED_CHUNKS_PER_WORKER:
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					future.result()
+			future = pool.submit(
+				_transcribe_chunk, index, start, audio, args.language, detector.hotwords
+			)
+			future.add_done_callback(on_done)
+			pending.add(future)
+		for future in pending:
+			future.result()
+	except KeyboardInterrupt:
+		interrupted = True
+	except Exception as e:
+		# ffmpeg problems, or a chunk that failed in a worker
+		log.exception(f'Scan of {args.file} failed')
+		print(f'{_end_progress()}vox scan: {e}', file=sys.stderr)
+		# Keep progress worth resuming; drop a journal with nothing in it
+		journal.close(remove=not records)
+		return 1
+	finally:
+		pool.shutdown(cancel_futures=True)
+
+	if interrupted:
+		journal.close()
+		print(
+			f'{_end_progress()}Interrupted with {len(records)} chunk(s) saved to '
+			f'{journal.path}; rerun the same command to resume',
+			file=sys.stderr,
+		)
+		return 130
+
+	swears = [
+		swear
+		for chunk in sorted(records)
+		for swear in find_swears(detector, records[chunk]['words'])
+	]
+	totals = Counter(swear['word'] for swear in swears)
+	elapsed = time.perf_counter() - started
+	report = {
+		'file': str(args.file),
+		'model': model_size,
+		'duration_seconds': round(audio_seconds, 3),
+		'chunks': len(records),
+		'workers': workers,
+		'scan_seconds': round(elapsed, 3),
+		'totals': {'swears': len(swears), 'words': dict(totals.most_common())},
+		'swears': swears,
+	}
+	write_report(out, report_format, report)
+	journal.close(remove=True)
+
+	breakdown = ', '.join(f'{word} {count}' for word, count in totals.most_common())
+	print(
+		f'{_end_progress()}{len(swears)} swear(s) in {_clock(audio_seconds)}'
+		+ (f' ({breakdown})' if breakdown else '')
+		+ f', scanned in {elapsed:.1f}s -> {out}',
+		file=sys.stderr,
+	)
+	return 0
@@ -0,0 +1,357 @@
+"""Speculative fast-path detection, corrected by the full model.
+
+A small model transcribes ~1 s windows and their swears are reported straight
+away, so the overlay reacts well before a full 3 s window has even been
+captured. The normal model still transcribes the same audio in full-length
+windows and its counts are authoritative: a ReconciliationLedger remembers
+what was reported for each stretch of audio and, once the full model has
+covered it, reports the difference (by=+k for misses, by=-k for false
+positives).
+
+Both window streams are cut from the same chunks, and every full window ends
+exactly where a fast window ends, so each speculative report is settled by
+exactly one full window.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from queue import Queue
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+if TYPE_CHECKING:
+	from swear_detection import SwearDetector
+	from transcription import TranscriptionEngine
+
+from audio import SAMPLE_RATE
+from logging_setup import get_logger
+from metrics import metrics
+from pipeline import (
+	DETECT_QUEUE_WINDOWS,
+	MIN_FLUSH_SECONDS,
+	REPORT_QUEUE_WINDOWS,
+	TRANSCRIBE_QUEUE_WINDOWS,
+	Pipeline,
+	Stage,
+	Window,
+)
+from processing import NoiseFloorTracker, PipelineStats, process_audio_buffer
+from tracing import TraceWindow, tracer
+
+log = get_logger(__name__)
+
+# Fast windows are cut once they hold this much audio
+SPECULATIVE_WINDOW_SECONDS = 1.0
+# Fast windows per full window (3 x ~1 s, in line with BUFFER_DURATION_SECONDS)
+FAST_WINDOWS_PER_FULL = 3
+# Fast windows waiting for the fast model. A speculative count for audio the
+# full model is about to settle anyway is not worth queueing behind
+SPECULATE_QUEUE_WINDOWS = 2
+
+
+@dataclass
+class _Report:
+	"""Swears reported speculatively for samples [start, end) of the stream."""
+
+	start: int
+	end: int
+	words: list[str]
+
+
+class ReconciliationLedger:
+	"""What has been reported for each stretch of audio, and its corrections.
+
+	Positions are sample offsets from the start of the stream. The fast and
+	full workers call in concurrently. Deltas are worked out under the lock
+	and queued in that order; `report` is called after the lock is released,
+	by one thread at a time, in queue order. A correction therefore never
+	overtakes the speculative count it corrects (the service rejects a total
+	below zero), and a slow report holds up neither path's bookkeeping.
+	"""
+
+	def __init__(self, report: Callable[[int, list[str], bool], None]):
+		"""Create an empty ledger.
+
+		Args:
+			report: Called as report(delta, words, speculative) for every
+				count to send: the fast path's +n with the words it heard, or a
+				correction of +/-k with the words that were missed or wrong.
+		"""
+		self._report = report
+		self._lock = threading.Lock()
+		# Counts to send, in the order they were worked out
+		self._outgoing: deque[tuple[int, list[str], bool]] = deque()
+		self._delivering = threading.Lock()
+		self._reports: list[_Report] = []
+		self._settled_until = 0
+		self.speculative = 0
+		self.corrected = 0
+
+	def record_speculative(self, start: int, end: int, words: list[str]) -> int:
+		"""Report the fast path's swears for samples [start, end).
+
+		Returns:
+			The count reported; 0 if the full model has already settled this
+			audio (a late fast window would only be corrected straight back).
+		"""
+		with self._lock:
+			if end <= self._settled_until:
+				log.debug(f'Dropping late speculative window ending at {end}')
+				return 0
+			self._reports.append(_Report(start, end, list(words)))
+			if words:
+				self.speculative += len(words)
+				self._outgoing.append((len(words), list(words), True))
+		self._deliver()
+		return len(words)
+
+	def settle(self, end: int, words: list[str]) -> int:
+		"""Reconcile everything reported up to sample `end` with the full model.
+
+		Args:
+			end: End of the full window, in samples from the stream start.
+			words: Swears the full model heard in that window.
+
+		Returns:
+			The correction reported (0 if the fast path was right).
+		"""
+		with self._lock:
+			settled = [r for r in self._reports if r.end <= end]
+			self._reports = [r for r in self._reports if r.end > end]
+			self._settled_until = max(self._settled_until, end)
+
+			reported = Counter(word for r in settled for word in r.words)
+			heard = Counter(words)
+			delta = len(words) - sum(reported.values())
+			if delta == 0:
+				if reported != heard:
+					log.debug(f'Speculative words differ, count agrees: {settled}')
+				return 0
+
+			changed = list(
+				(heard - reported if delta > 0 else reported - heard).elements()
+			)
+			log.info(
+				f'Correcting speculative count by {delta:+d}: '
+				f'reported {sorted(reported.elements())}, heard {sorted(words)}'
+			)
+			self.corrected += delta
+			metrics.speculative_corrections.inc(
+				'up' if delta > 0 else 'down', abs(delta)
+			)
+			self._outgoing.append((delta, changed, False))
+		self._deliver()
+		return delta
+
+	def _deliver(self) -> None:
+		"""Send queued counts in order, unless another thread is sending them."""
+		while self._delivering.acquire(blocking=False):
+			try:
+				while True:
+					with self._lock:
+						if not self._outgoing:
+							break
+						delta, words, speculative = self._outgoing.popleft()
+					self._report(delta, words, speculative)
+			finally:
+				self._delivering.release()
+			# A count queued just before the release would otherwise wait
+			# for the next call
+			with self._lock:
+				if not self._outgoing:
+					return
+
+	@property
+	def unsettled(self) -> int:
+		"""Speculatively reported swears the full model has not covered yet."""
+		with self._lock:
+			return sum(len(r.words) for r in self._reports)
+
+
+@dataclass
+class _FullWindow(Window):
+	"""A full-path window and the stream position it settles up to."""
+
+	end: int = 0
+
+
+class _SpeculativeSegmenter:
+	"""Cuts queued chunks into fast windows and full windows.
+
+	Fast windows are offered to the speculate stage; full windows, which end
+	on a fast window boundary, are handed down the chain.
+	"""
+
+	def __init__(self, speculate: Stage):
+		self._speculate = speculate
+		self._fast_samples = int(SAMPLE_RATE * SPECULATIVE_WINDOW_SECONDS)
+		self._position = 0
+		self._fast_chunks: list[np.ndarray] = []
+		self._fast_start = 0
+		self._fast_cut = 0
+		self._chunks: list[np.ndarray] = []
+		self._samples = 0
+		self._started_ns = 0
+		self._next_id = 0
+
+	def process(self, item: tuple[int, np.ndarray]) -> _FullWindow | None:
+		captured_ns, chunk = item
+		if not self._chunks:
+			self._started_ns = captured_ns
+		self._fast_chunks.append(chunk)
+		self._chunks.append(chunk)
+		self._samples += len(chunk)
+		self._position += len(chunk)
+		if self._position - self._fast_start < self._fast_samples:
+			return None
+
+		# A fast path that is behind skips windows rather than stalling the
+		# full one; the full model settles that audio either way
+		if not self._speculate.offer(
+			(self._fast_start, self._position, self._fast_chunks)
+		):
+			log.debug(f'Fast path behind, skipping window ending at {self._position}')
+		self._fast_chunks = []
+		self._fast_start = self._position
+		self._fast_cut += 1
+		# Full windows end on a fast window boundary so settling is exact
+		if self._fast_cut % FAST_WINDOWS_PER_FULL:
+			return None
+		return self._cut()
+
+	def finish(self) -> _FullWindow | None:
+		log.info(f'Speculative transcription input ended at {self._position} samples')
+		if self._chunks and self._samples > SAMPLE_RATE * MIN_FLUSH_SECONDS:
+			log.info(f'Final flush: {self._samples} samples')
+			return self._cut()
+		return None
+
+	def _cut(self) -> _FullWindow:
+		window = _FullWindow(
+			TraceWindow(self._next_id, self._started_ns),
+			self._chunks,
+			self._samples,
+			end=self._position,
+		)
+		self._next_id += 1
+		self._chunks = []
+		self._samples = 0
+		now_ns = time.perf_counter_ns()
+		tracer.record('buffer', window.trace.started_ns, now_ns, window.trace.window_id)
+		window.cut_ns = now_ns
+		return window
+
+
+def speculative_pipeline(
+	source: Queue,
+	fast_engine: 'TranscriptionEngine',
+	transcription_engine: 'TranscriptionEngine',
+	swear_detector: 'SwearDetector',
+	ledger: ReconciliationLedger,
+	on_text: Callable[[str], None],
+	stats: PipelineStats | None = None,
+	name: str = 'transcription',
+) -> Pipeline:
+	"""Build a pipeline with a fast and a full path (call start() to run it).
+
+		source -> segment -> transcribe -> detect -> report
+		             |
+		             +-> speculate
+
+	Takes the place of transcription_pipeline() when a fast model is loaded.
+	Swears are reported through `ledger`: the speculate stage records
+	speculative counts, the report stage settles them with each full window.
+	on_text receives the full model's text only, and stats, metrics and trace
+	windows cover the full path only.
+
+	Stopping the pipeline drains it like any other: queued fast windows are
+	still speculated on, and every full window, including the last partial
+	one, is settled.
+
+	Args:
+		source: Queue of (capture_ns, chunk) items from AudioCapture or an
+			ingest stream; read by the segment stage.
+		fast_engine: Small engine for the speculative windows.
+		transcription_engine: Engine whose counts are authoritative.
+		swear_detector: Word list and hotwords (re-read each window).
+		ledger: Ledger that reports counts and corrections.
+		on_text: Called on the detect stage with each non-empty full-model
+			transcription.
+		stats: If set, receives the audio length and transcription time of
+			each full window.
+		name: Prefix for the stage thread names.
+	"""
+	# Each path learns its own floor; the window lengths differ
+	fast_gate = NoiseFloorTracker()
+	full_gate = NoiseFloorTracker()
+
+	def speculate(item: tuple[int, int, list[np.ndarray]]) -> None:
+		start, end, chunks = item
+		if fast_gate.is_silent(chunks):
+			return
+		text = process_audio_buffer(
+			chunks, fast_engine, hotwords=swear_detector.hotwords
+		)
+		words = [word for word, _, _ in swear_detector.locate(text)]
+		ledger.record_speculative(start, end, words)
+
+	def transcribe(window: _FullWindow) -> _FullWindow:
+		trace = window.trace
+		tracer.record('queue', window.cut_ns, time.perf_counter_ns(), trace.window_id)
+		with tracer.window(trace):
+			started = time.perf_counter()
+			metrics.windows_processed.inc()
+			with tracer.span('gate'):
+				silent = full_gate.is_silent(window.chunks)
+			if silent:
+				metrics.windows_skipped.inc()
+			else:
+				window.text = process_audio_buffer(
+					window.chunks,
+					transcription_engine,
+					hotwords=swear_detector.hotwords,
+				)
+			elapsed = time.perf_counter() - started
+		if not silent:
+			metrics.windows_decoded.inc()
+			metrics.decode_seconds.observe(elapsed)
+		if stats is not None:
+			stats.record_window(window.samples / SAMPLE_RATE, elapsed, skipped=silent)
+		window.chunks = []
+		# Handed on even when silent: anything the fast path heard here is wrong
+		return window
+
+	def detect(window: _FullWindow) -> _FullWindow:
+		if not window.text.strip():
+			return window
+		with tracer.window(window.trace):
+			on_text(window.text)
+			with tracer.span('detect'):
+				window.count, window.swears = swear_detector.detect(window.text)
+		return window
+
+	def settle(window: _FullWindow) -> None:
+		with tracer.window(window.trace):
+			with tracer.span('report'):
+				ledger.settle(window.end, window.swears)
+
+	def log_unsettled() -> None:
+		if ledger.unsettled:
+			log.info(f'{ledger.unsettled} speculative swear(s) left unsettled')
+
+	speculate_stage = Stage('speculate', speculate, SPECULATE_QUEUE_WINDOWS)
+	segmenter = _SpeculativeSegmenter(speculate_stage)
+	segment = Stage('segment', segmenter.process, finish=segmenter.finish, queue=source)
+	return Pipeline(
+		name,
+		[
+			segment,
+			Stage('transcribe', transcribe, TRANSCRIBE_QUEUE_WINDOWS),
+			Stage('detect', detect, DETECT_QUEUE_WINDOWS),
+			Stage('report', settle, REPORT_QUEUE_WINDOWS, finish=log_unsettled),
+		],
+		branches=[(segment, speculate_stage)],
+	)
@@ -1,9 +1,12 @@
 """Swear word detection module."""
 
 import re
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
 from pathlib import Path
 
 from logging_setup import get_logger
+from metrics import metrics
 
 log = get_logger(__name__)
 
@@ -23,6 +26,7 @@ class SwearDetector:
 		self.word_list_path = Path(word_list_path)
 		self._swear_words: set[str] = set()
 		self._pattern: re.Pattern[str] | None = None
+		self._hotwords: str | None = None
 		self._load_word_list()
 
 	def _load_word_list(self) -> None:
@@ -32,22 +36,38 @@ class SwearDetector:
 				f'Word list file not found: {self.word_list_path}'
 			)
 
+		swear_words: set[str] = set()
 		with open(self.word_list_path, 'r', encoding='utf-8') as f:
 			for line in f:
 				word = line.strip().lower()
 				if word and not word.startswith('#'):
-					self._swear_words.add(word)
+					swear_words.add(word)
 
 		# Pre-compile combined regex pattern for O(1) detection
-		if self._swear_words:
-			escaped = [re.escape(word) for word in self._swear_words]
-			pattern = r'\b(' + '|'.join(escaped) + r')\b'
-			self._pattern = re.compile(pattern, re.IGNORECASE)
+		pattern: re.Pattern[str] | None = None
+		if swear_words:
+			escaped = [re.escape(word) for word in swear_words]
+			pattern = re.compile(r'\b(' + '|'.join(escaped) + r')\b', re.IGNORECASE)
+
+		# Swap in the new list in one go so concurrent detect() calls see either
+		# the old or the new list, never a mix
+		self._swear_words = swear_words
+		self._pattern = pattern
+		self._hotwords = ' '.join(swear_words) if swear_words else None
 
 		log.info(
 			f'Loaded {len(self._swear_words)} swear words from {self.word_list_path}'
 		)
 
+	def reload(self) -> None:
+		"""Re-read the word list file.
+
+		Raises:
+			FileNotFoundError: If word list file no longer exists (the current
+				list is kept).
+		"""
+		self._load_word_list()
+
 	def detect(self, text: str) -> tuple[int, list[str]]:
 		"""Detect swear words in text.
 
@@ -66,9 +86,51 @@ class SwearDetector:
 
 		if detected:
 			log.info(f'Detected {len(detected)} swear(s) in text: {detected}')
+			for word in detected:
+				metrics.swears_detected.inc(word)
 
 		return len(detected), detected
 
+	def locate(self, text: str) -> list[tuple[str, int, int]]:
+		"""Find swear words with their character spans.
+
+		Unlike detect(), this does not log or count detections; offline scans
+		use it to map matches back to word timestamps.
+
+		Args:
+			text: Text to scan for swear words.
+
+		Returns:
+			List of (word, start, end) in order of appearance, with end exclusive.
+		"""
+		if not text or not self._pattern:
+			return []
+		return [
+			(match.group(0).lower(), match.start(), match.end())
+			for match in self._pattern.finditer(text)
+		]
+
+	def locate_words(self, words: Sequence[str]) -> list[tuple[str, int, int]]:
+		"""Find swear words in a list of transcribed words.
+
+		The words are matched as if joined by spaces, so multi-word entries
+		still match across them.
+
+		Returns:
+			List of (word, first, last) with the indices of the first and last
+			word each match covers (inclusive).
+		"""
+		# Character offset where each word starts in the joined text
+		offsets = []
+		position = 0
+		for word in words:
+			offsets.append(position)
+			position += len(word) + 1
+		return [
+			(swear, bisect_right(offsets, begin) - 1, bisect_left(offsets, end) - 1)
+			for swear, begin, end in self.locate(' '.join(words))
+		]
+
 	@property
 	def word_count(self) -> int:
 		"""Return number of loaded swear words."""
@@ -78,3 +140,8 @@ class SwearDetector:
 	def words(self) -> set[str]:
 		"""Return the set of loaded swear words."""
 		return self._swear_words
+
+	@property
+	def hotwords(self) -> str | None:
+		"""Space-separated word list to hint to the model (None if empty)."""
+		return self._hotwords
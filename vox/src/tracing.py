@@ -0,0 +1,322 @@
+"""Per-stage pipeline tracing.
+
+Spans around each pipeline stage are recorded into latency histograms and,
+when a trace file is requested, into a Chrome trace-event list that can be
+opened in chrome://tracing or https://ui.perfetto.dev.
+
+Spans are correlated by window id: the pipeline opens a TraceWindow for
+each 3 s buffer and every span recorded under that window, on whichever
+stage thread, is tagged with it.
+
+Tracing is off by default. While off, `tracer.span()` returns a shared no-op
+context manager and no stage is recorded. Windows are still tagged and
+speech_to_report is still recorded, once per reported window, so the
+pipeline panel and the metrics endpoint get latency figures without
+paying for spans.
+"""
+
+import atexit
+import contextlib
+import json
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from logging_setup import get_logger
+
+log = get_logger(__name__)
+
+# Stage names, in pipeline order
+STAGES = (
+	'capture.enqueue',  # audio callback: copy + queue.put
+	'buffer',  # first sample of a window captured -> window handed to the model
+	'gate',  # NoiseFloorTracker.is_silent
+	'queue',  # window cut -> picked up by the transcriber
+	'prep',  # concatenate + normalize
+	'vad',  # model.transcribe(): VAD, features, language detection
+	'decode',  # iterating the segment generator (beam search)
+	'detect',  # SwearDetector.detect
+	'report',  # SwearAPIClient.report_swears
+	'speech_to_report',  # first sample of a window captured -> report done
+)
+
+# Linear sub-buckets per power of two; 64 keeps values within ~1.6%
+SUB_BUCKET_BITS = 6
+# Largest value tracked exactly is 2^MAX_VALUE_BITS us (~12.7 days)
+MAX_VALUE_BITS = 40
+# Cap on buffered trace events (~100 bytes each) so a long run cannot grow
+# without bound; later events are counted but dropped
+MAX_TRACE_EVENTS = 1_000_000
+
+
+class TraceWindow(NamedTuple):
+	"""One transcription window: its id and when its first sample arrived."""
+
+	window_id: int
+	started_ns: int
+
+
+class LatencyHistogram:
+	"""HDR-style log-linear histogram of durations in microseconds.
+
+	Values below 2^(SUB_BUCKET_BITS + 1) are counted exactly; above that
+	each power of two is split into 2^SUB_BUCKET_BITS equal buckets, so the
+	relative error is bounded while memory stays fixed (~2k counters).
+	"""
+
+	def __init__(self) -> None:
+		self._half = 1 << SUB_BUCKET_BITS
+		self._counts = [0] * ((MAX_VALUE_BITS - SUB_BUCKET_BITS + 1) * self._half)
+		self.count = 0
+		self.total_us = 0
+		self.max_us = 0
+
+	def _index(self, value: int) -> int:
+		if value < 2 * self._half:
+			return value
+		shift = value.bit_length() - SUB_BUCKET_BITS - 1
+		return (shift + 1) * self._half + (value >> shift) - self._half
+
+	def _value_at(self, index: int) -> int:
+		"""Highest value that lands in bucket `index`."""
+		if index < 2 * self._half:
+			return index
+		shift = index // self._half - 1
+		mantissa = index % self._half + self._half
+		return ((mantissa + 1) << shift) - 1
+
+	def record(self, value_us: int) -> None:
+		"""Record one duration (not thread-safe; Tracer serializes calls)."""
+		value_us = max(0, value_us)
+		index = min(self._index(value_us), len(self._counts) - 1)
+		self._counts[index] += 1
+		self.count += 1
+		self.total_us += value_us
+		self.max_us = max(self.max_us, value_us)
+
+	def percentile(self, pct: float) -> int:
+		"""Value (us) at or below which `pct` percent of samples fall."""
+		if self.count == 0:
+			return 0
+		rank = max(1, int(self.count * pct / 100 + 0.5))
+		seen = 0
+		for index, bucket in enumerate(self._counts):
+			seen += bucket
+			if seen >= rank:
+				return min(self._value_at(index), self.max_us)
+		return self.max_us
+
+	def summary(self) -> dict[str, float]:
+		"""Count, mean and p50/p95/p99/max in milliseconds."""
+		if self.count == 0:
+			return {'count': 0}
+		return {
+			'count': self.count,
+			'mean_ms': round(self.total_us / self.count / 1000, 3),
+			'p50_ms': self.percentile(50) / 1000,
+			'p95_ms': self.percentile(95) / 1000,
+			'p99_ms': self.percentile(99) / 1000,
+			'max_ms': self.max_us / 1000,
+		}
+
+
+class _Span:
+	"""Times one stage; records into the tracer on exit."""
+
+	__slots__ = ('_name', '_start_ns', '_tracer', '_window_id')
+
+	def __init__(self, tracer: 'Tracer', name: str, window_id: int | None):
+		self._tracer = tracer
+		self._name = name
+		self._window_id = window_id
+		self._start_ns = 0
+
+	def __enter__(self) -> None:
+		self._start_ns = time.perf_counter_ns()
+
+	def __exit__(self, *exc: object) -> None:
+		self._tracer.record(
+			self._name, self._start_ns, time.perf_counter_ns(), self._window_id
+		)
+
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Tracer:
+	"""Collects stage spans into histograms and optional Chrome trace events."""
+
+	def __init__(self) -> None:
+		self.enabled = False
+		self._lock = threading.Lock()
+		self._local = threading.local()
+		self._histograms: dict[str, LatencyHistogram] = {}
+		self._events: list[dict] | None = None
+		self._dropped_events = 0
+		self._thread_names: dict[int, str] = {}
+		self._origin_ns = time.perf_counter_ns()
+		self._trace_path: Path | None = None
+
+	def enable(self, trace_path: Path | None = None) -> None:
+		"""Start recording spans.
+
+		Args:
+			trace_path: If set, trace events are kept and written there as
+				Chrome trace-event JSON when the process exits.
+		"""
+		with self._lock:
+			if self.enabled:
+				return
+			self.enabled = True
+			self._origin_ns = time.perf_counter_ns()
+			if trace_path is not None:
+				self._trace_path = trace_path
+				self._events = []
+		atexit.register(self.shutdown)
+
+	def span(
+		self, name: str, window_id: int | None = None
+	) -> contextlib.AbstractContextManager:
+		"""Context manager timing one stage.
+
+		Args:
+			name: Stage name (see STAGES).
+			window_id: Window to tag the span with. Defaults to the window
+				opened on this thread with `window()`.
+		"""
+		if not self.enabled:
+			return _NULL_CONTEXT
+		if window_id is None:
+			window = getattr(self._local, 'window', None)
+			window_id = window.window_id if window is not None else None
+		return _Span(self, name, window_id)
+
+	@contextlib.contextmanager
+	def _window_context(self, window: TraceWindow) -> Iterator[None]:
+		previous = getattr(self._local, 'window', None)
+		self._local.window = window
+		try:
+			yield
+		finally:
+			self._local.window = previous
+
+	def window(
+		self, window: TraceWindow | None
+	) -> contextlib.AbstractContextManager:
+		"""Tag spans recorded on this thread with `window` until exit.
+
+		Active even while tracing is off, for end_to_end().
+		"""
+		if window is None:
+			return _NULL_CONTEXT
+		return self._window_context(window)
+
+	def current_window(self) -> TraceWindow | None:
+		"""The window open on this thread, for handing to another thread."""
+		return getattr(self._local, 'window', None)
+
+	def end_to_end(self) -> float | None:
+		"""Record speech_to_report for the window open on this thread.
+
+		Recorded even while tracing is off.
+
+		Returns:
+			The latency in seconds, or None if no window is open.
+		"""
+		window = self.current_window()
+		if window is None:
+			return None
+		now_ns = time.perf_counter_ns()
+		self._record('speech_to_report', window.started_ns, now_ns, window.window_id)
+		return (now_ns - window.started_ns) / 1e9
+
+	def record(
+		self, name: str, start_ns: int, end_ns: int, window_id: int | None = None
+	) -> None:
+		"""Record a span measured by the caller (perf_counter_ns timestamps)."""
+		if self.enabled:
+			self._record(name, start_ns, end_ns, window_id)
+
+	def _record(
+		self, name: str, start_ns: int, end_ns: int, window_id: int | None
+	) -> None:
+		duration_us = (end_ns - start_ns) // 1000
+		with self._lock:
+			histogram = self._histograms.get(name)
+			if histogram is None:
+				histogram = self._histograms[name] = LatencyHistogram()
+			histogram.record(duration_us)
+			if self._events is None:
+				return
+			if len(self._events) >= MAX_TRACE_EVENTS:
+				self._dropped_events += 1
+				return
+			tid = threading.get_native_id()
+			if tid not in self._thread_names:
+				self._thread_names[tid] = threading.current_thread().name
+			event = {
+				'name': name,
+				'ph': 'X',
+				'ts': (start_ns - self._origin_ns) / 1000,
+				'dur': (end_ns - start_ns) / 1000,
+				'pid': 1,
+				'tid': tid,
+			}
+			if window_id is not None:
+				event['args'] = {'window': window_id}
+			self._events.append(event)
+
+	def summary(self) -> dict[str, dict[str, float]]:
+		"""Histogram summaries by stage, in pipeline order."""
+		with self._lock:
+			names = sorted(
+				self._histograms,
+				key=lambda n: STAGES.index(n) if n in STAGES else len(STAGES),
+			)
+			return {name: self._histograms[name].summary() for name in names}
+
+	def histogram(self, name: str) -> LatencyHistogram | None:
+		"""The histogram for one stage, if any spans were recorded."""
+		return self._histograms.get(name)
+
+	def write_chrome_trace(self, path: Path) -> None:
+		"""Write recorded events as Chrome trace-event JSON."""
+		with self._lock:
+			events = list(self._events or [])
+			metadata = [
+				{
+					'name': 'thread_name',
+					'ph': 'M',
+					'pid': 1,
+					'tid': tid,
+					'args': {'name': name},
+				}
+				for tid, name in self._thread_names.items()
+			]
+			dropped = self._dropped_events
+		trace = {
+			'traceEvents': metadata + events,
+			'displayTimeUnit': 'ms',
+			'otherData': {'dropped_events': dropped},
+		}
+		path.write_text(json.dumps(trace))
+		log.info(f'Wrote {len(events)} trace events to {path}')
+
+	def shutdown(self) -> None:
+		"""Log stage summaries and write the trace file, if one was requested."""
+		if not self.enabled:
+			return
+		for name, stats in self.summary().items():
+			log.info(f'Trace {name}: {stats}')
+		if self._trace_path is not None:
+			try:
+				self.write_chrome_trace(self._trace_path)
+			except OSError as e:
+				log.error(f'Failed to write trace to {self._trace_path}: {e}')
+			self._trace_path = None
+
+
+# Process-wide tracer; enabled from main.py
+tracer = Tracer()
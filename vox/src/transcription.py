@@ -1,15 +1,28 @@
 """Transcription module using faster-whisper for speech-to-text."""
 
+import ctypes
+import ctypes.util
+import gc
 import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 import numpy as np
-from faster_whisper import WhisperModel
+
+from tracing import tracer
+
+if TYPE_CHECKING:
+	from pathlib import Path
+
+	from faster_whisper import WhisperModel
 
 log = logging.getLogger(__name__)
 
 MODEL_SIZE = 'base'
 COMPUTE_TYPE = 'int8'
 DEVICE = 'cpu'
+CPU_THREADS = 4
 
 # Prompt to prevent the model from censoring profanity - keep it simple to avoid priming hallucinations
 INITIAL_PROMPT = 'Transcribe verbatim.'
@@ -18,6 +31,36 @@ INITIAL_PROMPT = 'Transcribe verbatim.'
 NO_SPEECH_THRESHOLD = 0.6
 
 
+class TimedWord(NamedTuple):
+	"""One transcribed word and where it falls in the audio (seconds)."""
+
+	word: str
+	start: float
+	end: float
+
+
+def _transcribe_options(language: str, hotwords: str | None) -> dict[str, Any]:
+	"""Keyword arguments for WhisperModel.transcribe shared by every caller."""
+	return {
+		'language': language,
+		# VAD filters out silence before transcription to prevent hallucinations
+		'vad_filter': True,
+		'vad_parameters': {
+			'min_silence_duration_ms': 500,
+			'speech_pad_ms': 200,
+		},
+		'initial_prompt': INITIAL_PROMPT,
+		'hotwords': hotwords,
+		# Prevent hallucination chains from previous output
+		'condition_on_previous_text': False,
+		# Penalize repetitive output like "fuck fuck fuck" or "like subscribe"
+		'repetition_penalty': 1.1,
+		'no_repeat_ngram_size': 3,
+		# Skip audio chunks that are likely silence/hallucinations
+		'hallucination_silence_threshold': 0.5,
+	}
+
+
 class TranscriptionEngine:
 	"""Wraps faster-whisper for speech-to-text transcription."""
 
@@ -26,23 +69,49 @@ class TranscriptionEngine:
 		model_size: str = MODEL_SIZE,
 		device: str = DEVICE,
 		compute_type: str = COMPUTE_TYPE,
+		num_workers: int = 1,
+		cpu_threads: int = CPU_THREADS,
 	):
 		self.model_size = model_size
 		self.device = device
 		self.compute_type = compute_type
-		self._model: WhisperModel | None = None
+		# Concurrent transcribe() calls the model can run in parallel
+		self.num_workers = num_workers
+		self.cpu_threads = cpu_threads
+		self._model: 'WhisperModel | None' = None
+		# Local directory of the converted model, resolved on first load so a
+		# reload reads straight from disk without asking the Hugging Face hub
+		self._model_path: str | None = None
+		# Serializes load/unload between the idle policy and reload workers
+		self._load_lock = threading.Lock()
 
-	def _ensure_model_loaded(self) -> WhisperModel:
+	def _ensure_model_loaded(self) -> 'WhisperModel':
 		"""Lazy load the model on first use."""
-		if self._model is None:
+		if self._model is not None:
+			return self._model
+		with self._load_lock:
+			if self._model is not None:
+				return self._model
+			# Deferred: faster_whisper pulls in ctranslate2, tokenizers, PyAV and
+			# huggingface_hub, which takes longer than painting the whole UI
+			from faster_whisper import WhisperModel, download_model
+
+			if self._model_path is None or not os.path.isdir(self._model_path):
+				self._model_path = download_model(self.model_size)
 			self._model = WhisperModel(
-				self.model_size,
+				self._model_path,
 				device=self.device,
 				compute_type=self.compute_type,
-				cpu_threads=4,
+				cpu_threads=self.cpu_threads,
+				num_workers=self.num_workers,
+				local_files_only=True,
 			)
 		return self._model
 
+	def load(self) -> None:
+		"""Load the model now (no-op if loaded). Blocks; call from a worker."""
+		self._ensure_model_loaded()
+
 	def transcribe(
 		self,
 		audio: np.ndarray,
@@ -62,59 +131,170 @@ class TranscriptionEngine:
 		"""
 		model = self._ensure_model_loaded()
 
-		audio_flat = audio.flatten().astype(np.float32)
+		audio_flat = np.asarray(audio, dtype=np.float32).reshape(-1)
 
-		log.debug(f'Input audio: shape={audio_flat.shape}, dtype={audio_flat.dtype}, peak={np.max(np.abs(audio_flat)):.4f}')
+		if log.isEnabledFor(logging.DEBUG):
+			log.debug(
+				'Input audio: shape=%s, dtype=%s, peak=%.4f',
+				audio_flat.shape,
+				audio_flat.dtype,
+				float(np.max(np.abs(audio_flat))),
+			)
 
 		try:
-			log.debug(f'Calling model.transcribe(language={language})')
-			segments, info = model.transcribe(
-				audio_flat,
-				language=language,
-				# VAD filters out silence before transcription to prevent hallucinations
-				vad_filter=True,
-				vad_parameters={
-					'min_silence_duration_ms': 500,
-					'speech_pad_ms': 200,
-				},
-				initial_prompt=INITIAL_PROMPT,
-				hotwords=hotwords,
-				# Prevent hallucination chains from previous output
-				condition_on_previous_text=False,
-				# Penalize repetitive output like "fuck fuck fuck" or "like subscribe"
-				repetition_penalty=1.1,
-				no_repeat_ngram_size=3,
-				# Skip audio chunks that are likely silence/hallucinations
-				hallucination_silence_threshold=0.5,
+			log.debug('Calling model.transcribe(language=%s)', language)
+			# faster-whisper runs VAD, feature extraction and language detection
+			# here and returns a lazy generator; decoding happens on iteration
+			with tracer.span('vad'):
+				segments, info = model.transcribe(
+					audio_flat, **_transcribe_options(language, hotwords)
+				)
+			log.debug(
+				'Transcribe returned: duration=%.2fs, language=%s, prob=%.2f',
+				info.duration,
+				info.language,
+				info.language_probability,
 			)
-			log.info(f'Transcribe returned: duration={info.duration:.2f}s, language={info.language}, prob={info.language_probability:.2f}')
 
 			# Force generator evaluation and collect segments, filtering by no_speech_prob
 			text_parts = []
 			segment_count = 0
 			skipped_count = 0
-			for segment in segments:
-				segment_count += 1
-				# Skip segments where model thinks there's no speech
-				if segment.no_speech_prob > NO_SPEECH_THRESHOLD:
-					skipped_count += 1
-					log.debug(f'Skipping segment {segment_count}: no_speech_prob={segment.no_speech_prob:.2f} > {NO_SPEECH_THRESHOLD}')
-					continue
-				log.debug(f'Segment {segment_count}: "{segment.text}" (no_speech={segment.no_speech_prob:.2f})')
-				text_parts.append(segment.text.strip())
+			with tracer.span('decode'):
+				for segment in segments:
+					segment_count += 1
+					# Skip segments where model thinks there's no speech
+					if segment.no_speech_prob > NO_SPEECH_THRESHOLD:
+						skipped_count += 1
+						log.debug(
+							'Skipping segment %d: no_speech_prob=%.2f > %s',
+							segment_count,
+							segment.no_speech_prob,
+							NO_SPEECH_THRESHOLD,
+						)
+						continue
+					log.debug(
+						'Segment %d: "%s" (no_speech=%.2f)',
+						segment_count,
+						segment.text,
+						segment.no_speech_prob,
+					)
+					text_parts.append(segment.text.strip())
 
 			result = ' '.join(text_parts)
-			log.info(f'Total segments: {segment_count}, skipped: {skipped_count}, result: "{result}"')
+			log.debug(
+				'Total segments: %d, skipped: %d, result: "%s"',
+				segment_count,
+				skipped_count,
+				result,
+			)
 			return result
 		except Exception as e:
-			log.exception(f'Transcription exception: {e}')
+			log.exception('Transcription exception: %s', e)
 			return ''
 
+	def transcribe_words(
+		self,
+		audio: np.ndarray,
+		language: str = 'en',
+		hotwords: str | None = None,
+	) -> list[TimedWord]:
+		"""Transcribe audio with word-level timestamps.
+
+		Segments are filtered by no_speech_prob like transcribe(). Errors
+		propagate instead of returning nothing, so offline callers can retry.
+
+		Args:
+			audio: NumPy array of float32 audio samples at 16kHz
+			language: Language code (default: 'en')
+			hotwords: Space-separated words to hint to the model (default: None)
+
+		Returns:
+			Words in order, with start/end seconds relative to the audio
+		"""
+		model = self._ensure_model_loaded()
+		segments, _ = model.transcribe(
+			np.asarray(audio, dtype=np.float32).reshape(-1),
+			word_timestamps=True,
+			**_transcribe_options(language, hotwords),
+		)
+		words = []
+		for segment in segments:
+			if segment.no_speech_prob > NO_SPEECH_THRESHOLD:
+				continue
+			for word in segment.words or ():
+				words.append(TimedWord(word.word.strip(), word.start, word.end))
+		return words
+
 	@property
 	def is_loaded(self) -> bool:
 		"""Check if the model is currently loaded."""
 		return self._model is not None
 
 	def unload(self) -> None:
-		"""Unload the model to free memory."""
-		self._model = None
+		"""Unload the model and hand the freed memory back to the OS."""
+		with self._load_lock:
+			if self._model is None:
+				return
+			self._model = None
+		release_memory()
+
+
+def release_memory() -> None:
+	"""Collect garbage and return free heap pages to the OS.
+
+	CTranslate2 frees model weights with the C allocator, but glibc keeps freed
+	arenas mapped, so RSS does not drop until malloc_trim() is called. No-op
+	beyond gc.collect() on other C libraries.
+	"""
+	gc.collect()
+	libc_name = ctypes.util.find_library('c')
+	if libc_name is None:
+		return
+	try:
+		libc = ctypes.CDLL(libc_name)
+		malloc_trim = libc.malloc_trim
+	except (OSError, AttributeError):
+		return
+	malloc_trim(0)
+
+
+def load_transcription_engine(
+	model_size: str,
+	model_server: 'Path | None' = None,
+	num_workers: int = 1,
+) -> TranscriptionEngine:
+	"""Create a TranscriptionEngine and load its model (safe in worker threads).
+
+	Patches tqdm's default write lock, which otherwise tries to create a
+	multiprocessing lock and fails when faster-whisper downloads or loads a
+	model outside the main thread.
+
+	Args:
+		model_size: The model size to load (e.g., 'base', 'small', 'medium').
+		model_server: Socket of a shared model server; when set, the engine
+			transcribes there instead of loading its own copy of the model.
+		num_workers: Concurrent transcriptions the local model supports.
+
+	Returns:
+		The loaded TranscriptionEngine instance.
+
+	Raises:
+		Exception: If model loading fails for any reason.
+	"""
+	import contextlib
+
+	import tqdm.std
+
+	tqdm.std.TqdmDefaultWriteLock = contextlib.nullcontext  # type: ignore[attr-defined]
+
+	if model_server is not None:
+		from model_server import RemoteTranscriptionEngine
+
+		engine: TranscriptionEngine = RemoteTranscriptionEngine(
+			model_server, model_size
+		)
+	else:
+		engine = TranscriptionEngine(model_size=model_size, num_workers=num_workers)
+	engine.load()
+	return engine
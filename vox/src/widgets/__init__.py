@@ -1,12 +1,15 @@
 """Custom Textual widgets for Vox."""
 
 from widgets.audio_level_bar import AudioLevelBar, DeviceDisplay
+from widgets.pipeline_panel import PipelineHealth, PipelinePanel
 from widgets.status_panel import StatusPanel
 from widgets.transcript_view import TranscriptView
 
 __all__ = [
 	'AudioLevelBar',
 	'DeviceDisplay',
+	'PipelineHealth',
+	'PipelinePanel',
 	'StatusPanel',
 	'TranscriptView',
 ]
@@ -0,0 +1,72 @@
+"""Pipeline health panel widget."""
+
+from dataclasses import dataclass
+
+from textual.reactive import reactive
+from textual.widgets import Static
+
+
+@dataclass(frozen=True)
+class PipelineHealth:
+	"""One snapshot of pipeline health (None where nothing is measured yet)."""
+
+	rtf: float | None = None
+	queue_seconds: float = 0.0
+	decode_seconds: float | None = None
+	latency_p50_seconds: float | None = None
+	latency_p95_seconds: float | None = None
+	backlog: int = 0
+	skipped_ratio: float | None = None
+
+
+def _seconds(value: float | None) -> str:
+	return '[dim]--[/dim]' if value is None else f'{value:.2f}s'
+
+
+class PipelinePanel(Static):
+	"""Real-time factor, queue depth, decode time, latency, backlog and silence.
+
+	The app pushes a new PipelineHealth from its 1 Hz stats timer; equal
+	snapshots do not trigger a re-render.
+	"""
+
+	health: reactive[PipelineHealth] = reactive(PipelineHealth)
+
+	def render(self) -> str:
+		health = self.health
+
+		if health.rtf is None:
+			rtf = '[dim]--[/dim]'
+		else:
+			# RTF at or above 1 means transcription can't keep up with the mic
+			if health.rtf >= 1.0:
+				color = 'red'
+			elif health.rtf > 0.8:
+				color = 'yellow'
+			else:
+				color = 'green'
+			rtf = f'[{color}]{health.rtf:.2f}x[/{color}]'
+
+		queue_color = 'yellow' if health.queue_seconds >= 1.0 else 'dim'
+		queue = f'[{queue_color}]{health.queue_seconds:.1f}s[/{queue_color}]'
+		backlog_color = 'yellow' if health.backlog else 'dim'
+		if health.skipped_ratio is None:
+			silence = '[dim]--[/dim]'
+		else:
+			silence = f'{health.skipped_ratio:.0%} skipped'
+
+		return '\n'.join([
+			f'[dim]RTF[/dim]      {rtf}',
+			f'[dim]Queue[/dim]    {queue}',
+			f'[dim]Decode[/dim]   {_seconds(health.decode_seconds)}',
+			(
+				f'[dim]Latency[/dim]  p50 {_seconds(health.latency_p50_seconds)}'
+				f' p95 {_seconds(health.latency_p95_seconds)}'
+			),
+			f'[dim]Backlog[/dim]  [{backlog_color}]{health.backlog}[/{backlog_color}]',
+			f'[dim]Silence[/dim]  {silence}',
+		])
+
+	def watch_health(self, health: PipelineHealth) -> None:
+		"""Trigger re-render when the snapshot changes."""
+		self.refresh()
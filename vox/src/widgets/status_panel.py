@@ -13,6 +13,10 @@ class StatusPanel(Static):
 	recording = reactive(False)
 	loading = reactive(True)
 	model_ready = reactive(False)
+	model_idle = reactive(False)
+	idle_note = reactive('')
+	# Set while the model governor has stepped down to a smaller model
+	model_note = reactive('')
 	device_name = reactive('System Default')
 	audio_level = reactive(0.0)
 	channel = reactive(0)
@@ -37,6 +41,15 @@ class StatusPanel(Static):
 	def watch_model_ready(self, ready: bool) -> None:
 		self._update_status_text()
 
+	def watch_model_idle(self, idle: bool) -> None:
+		self._update_status_text()
+
+	def watch_idle_note(self, note: str) -> None:
+		self._update_status_text()
+
+	def watch_model_note(self, note: str) -> None:
+		self._update_status_text()
+
 	def watch_device_name(self, name: str) -> None:
 		self.query_one('#device-display', DeviceDisplay).device_name = name
 
@@ -51,11 +64,19 @@ class StatusPanel(Static):
 
 	def _update_status_text(self) -> None:
 		status = self.query_one('#status-text', Static)
+		model = f' [yellow]({self.model_note})[/yellow]' if self.model_note else ''
 		if self.loading:
 			status.update('[yellow]Loading model...[/yellow]')
 		elif self.recording:
-			status.update('[red bold]Recording[/red bold]')
+			status.update(f'[red bold]Recording[/red bold]{model}')
+		elif self.model_idle:
+			note = f' ({self.idle_note})' if self.idle_note else ''
+			status.update(
+				f'[dim]Model unloaded while idle{note} - Press Space to reload[/dim]'
+			)
 		elif self.model_ready:
-			status.update('[green]Ready[/green] [dim]- Press Space to record[/dim]')
+			status.update(
+				f'[green]Ready[/green]{model} [dim]- Press Space to record[/dim]'
+			)
 		else:
 			status.update('[dim]Press Space to start recording[/dim]')
@@ -1,27 +1,344 @@
 """Transcript view widget."""
 
-from collections import deque
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+from typing import BinaryIO
 
-from textual.widgets import Static
+from rich.segment import Segment
+from rich.style import Style
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
 
+# Lines kept in memory for scrollback (~1 MB at typical line lengths)
+DEFAULT_MAX_LINES = 10_000
+PLACEHOLDER = 'Transcription will appear here...'
+# Spilled lines read per block when searching the spill file
+SPILL_SEARCH_LINES = 1024
 
-class TranscriptView(Static):
-	"""Displays transcribed text with automatic line limiting."""
+# A line's text and the (start, end) character spans of its swears
+Line = tuple[str, tuple[tuple[int, int], ...]]
 
-	DEFAULT_MAX_LINES = 10
 
-	def __init__(self, *args, max_lines: int = DEFAULT_MAX_LINES, **kwargs):
-		super().__init__(*args, **kwargs)
-		self._lines: deque[str] = deque(maxlen=max_lines)
+class TranscriptLog:
+	"""Fixed-capacity ring of transcript lines with their swear spans.
 
-	def append_text(self, text: str) -> None:
-		"""Append new transcribed text as a new line."""
+	Lines are numbered from the first ever appended. Appending is O(1) at
+	any size. Without a spill file a line is gone once evicted. With one,
+	evicted lines are written there and stay readable through an index of
+	their byte offsets, so get() and find() cover the whole transcript; only
+	the offsets (8 bytes a line) and the spans of spilled lines with swears
+	stay in memory. close() writes the lines still held, so the file ends up
+	holding the whole transcript.
+	"""
+
+	def __init__(
+		self, capacity: int = DEFAULT_MAX_LINES, spill_path: Path | None = None
+	):
+		self.capacity = capacity
+		self._lines: list[Line | None] = [None] * capacity
+		self.total = 0
+		self._spill: BinaryIO | None = None
+		self._reader: BinaryIO | None = None
+		# Byte offset of each spilled line in the spill file, by line number
+		self._offsets = array('q')
+		self._spilled_spans: dict[int, tuple[tuple[int, int], ...]] = {}
+		self._spill_end = 0
+		self._unflushed = False
+		if spill_path is not None:
+			spill_path.parent.mkdir(parents=True, exist_ok=True)
+			self._spill = open(spill_path, 'ab')
+			self._spill_end = self._spill.tell()
+			self._reader = open(spill_path, 'rb')
+
+	def __len__(self) -> int:
+		return self.total - self.first
+
+	@property
+	def first(self) -> int:
+		"""Number of the oldest line that can still be read."""
+		if self._spill is not None:
+			return 0
+		return max(0, self.total - self.capacity)
+
+	def append(self, text: str, spans: Iterable[tuple[int, int]] = ()) -> bool:
+		"""Add a line. Returns True if the oldest line can no longer be read."""
+		slot = self.total % self.capacity
+		evicted = self._lines[slot]
+		if evicted is not None and self._spill is not None:
+			number = self.total - self.capacity
+			self._offsets.append(self._spill_end)
+			if evicted[1]:
+				self._spilled_spans[number] = evicted[1]
+			self._write_spill(evicted[0])
+			self._unflushed = True
+		self._lines[slot] = (text, tuple(spans))
+		self.total += 1
+		return evicted is not None and self._spill is None
+
+	def get(self, number: int) -> Line | None:
+		"""Line `number` and its spans, or None if evicted or not yet written."""
+		if not self.first <= number < self.total:
+			return None
+		if number < len(self._offsets):
+			return self._read_spilled(number)
+		return self._lines[number % self.capacity]
+
+	def find(self, query: str, before: int) -> int | None:
+		"""Number of the newest line before `before` containing `query`.
+
+		Case-insensitive; `query` must already be lower case.
+		"""
+		held = max(self.first, len(self._offsets))
+		for number in range(min(before, self.total) - 1, held - 1, -1):
+			line = self._lines[number % self.capacity]
+			if line is not None and query in line[0].lower():
+				return number
+		return self._find_spilled(query, min(before, len(self._offsets)))
+
+	def clear(self) -> None:
+		self.flush_to_spill()
+		self._lines = [None] * self.capacity
+		self.total = 0
+		# Cleared lines stay in the file but are no longer shown
+		self._offsets = array('q')
+		self._spilled_spans = {}
+
+	def flush_to_spill(self) -> None:
+		"""Write the lines still in memory to the spill file (if any)."""
+		if self._spill is None:
+			return
+		for number in range(max(self.first, len(self._offsets)), self.total):
+			line = self._lines[number % self.capacity]
+			if line is not None:
+				self._write_spill(line[0])
+		self._spill.flush()
+		self._unflushed = False
+
+	def close(self) -> None:
+		self.flush_to_spill()
+		if self._spill is not None:
+			self._spill.close()
+			self._spill = None
+		if self._reader is not None:
+			self._reader.close()
+			self._reader = None
+
+	def _write_spill(self, text: str) -> None:
+		assert self._spill is not None
+		# One line per entry, or the offsets and block searches go out of step
+		data = (text.replace('\n', ' ') + '\n').encode('utf-8')
+		self._spill_end += self._spill.write(data)
+
+	def _read_spill(self, start: int, end: int) -> bytes:
+		"""Bytes [start, end) of the spill file."""
+		assert self._spill is not None and self._reader is not None
+		if self._unflushed:
+			self._spill.flush()
+			self._unflushed = False
+		self._reader.seek(start)
+		return self._reader.read(end - start)
+
+	def _spilled_end(self, number: int) -> int:
+		"""Byte offset just past spilled line `number`."""
+		if number + 1 < len(self._offsets):
+			return self._offsets[number + 1]
+		return self._spill_end
+
+	def _read_spilled(self, number: int) -> Line:
+		data = self._read_spill(self._offsets[number], self._spilled_end(number))
+		text = data.decode('utf-8', errors='replace').rstrip('\n')
+		return text, self._spilled_spans.get(number, ())
+
+	def _find_spilled(self, query: str, before: int) -> int | None:
+		"""find() over spilled lines: one read per block, newest block first."""
+		block_end = before
+		while block_end > 0:
+			block_start = max(0, block_end - SPILL_SEARCH_LINES)
+			data = self._read_spill(
+				self._offsets[block_start], self._spilled_end(block_end - 1)
+			)
+			lines = data.decode('utf-8', errors='replace').split('\n')
+			for i in range(block_end - block_start - 1, -1, -1):
+				if query in lines[i].lower():
+					return block_start + i
+			block_end = block_start
+		return None
+
+
+class TranscriptView(ScrollView):
+	"""Scrollable transcript with swear highlighting and search.
+
+	Only the lines in the viewport are rendered, so appending costs the same
+	however much history is held. Follows new lines while scrolled to the
+	bottom and holds still otherwise.
+	"""
+
+	COMPONENT_CLASSES = {
+		'transcript-view--swear',
+		'transcript-view--match',
+		'transcript-view--current-match',
+		'transcript-view--placeholder',
+	}
+
+	DEFAULT_CSS = """
+	TranscriptView > .transcript-view--swear {
+		color: $error;
+		text-style: bold;
+	}
+	TranscriptView > .transcript-view--match {
+		background: $warning 40%;
+	}
+	TranscriptView > .transcript-view--current-match {
+		background: $warning;
+		color: $background;
+	}
+	TranscriptView > .transcript-view--placeholder {
+		color: $text-muted;
+	}
+	"""
+
+	def __init__(
+		self,
+		*,
+		max_lines: int = DEFAULT_MAX_LINES,
+		spill_path: Path | None = None,
+		name: str | None = None,
+		id: str | None = None,
+		classes: str | None = None,
+	):
+		super().__init__(name=name, id=id, classes=classes)
+		self.log_store = TranscriptLog(max_lines, spill_path)
+		self._widest = 0
+		self._query = ''
+		self._match: int | None = None
+
+	def append_text(self, text: str, spans: Iterable[tuple[int, int]] = ()) -> None:
+		"""Append new transcribed text as a new line.
+
+		Args:
+			text: Transcribed text.
+			spans: (start, end) character spans of swears in the stripped text.
+		"""
 		stripped = text.strip()
-		if stripped:
-			self._lines.append(stripped)
-			self.update('\n'.join(self._lines))
+		if not stripped:
+			return
+		offset = len(text) - len(text.lstrip())
+		following = self.scroll_offset.y >= self.max_scroll_y
+		evicted = self.log_store.append(
+			stripped, [(start - offset, end - offset) for start, end in spans]
+		)
+		self._widest = max(self._widest, len(stripped))
+		self.virtual_size = Size(self._widest, len(self.log_store))
+		if following:
+			self.scroll_end(animate=False, x_axis=False)
+		elif evicted:
+			# Keep the same lines in view as the oldest one drops off
+			self.scroll_to(y=self.scroll_offset.y - 1, animate=False, immediate=True)
+		self.refresh()
 
 	def clear_text(self) -> None:
 		"""Clear all transcribed text."""
-		self._lines.clear()
-		self.update('[dim]Transcription will appear here...[/dim]')
+		self.log_store.clear()
+		self._widest = 0
+		self._match = None
+		self.virtual_size = Size(0, 0)
+		self.refresh()
+
+	def search(self, query: str) -> bool:
+		"""Jump to the newest line containing `query`; '' clears the search.
+
+		Returns:
+			Whether a line matched.
+		"""
+		self._query = query.lower()
+		self._match = None
+		if not self._query:
+			self.refresh()
+			return False
+		return self._show_match(self.log_store.find(self._query, self.log_store.total))
+
+	def search_older(self) -> bool:
+		"""Jump to the next older line matching the current search (wraps)."""
+		if not self._query:
+			return False
+		before = self._match if self._match is not None else self.log_store.total
+		found = self.log_store.find(self._query, before)
+		if found is None:
+			found = self.log_store.find(self._query, self.log_store.total)
+		return self._show_match(found)
+
+	def _show_match(self, number: int | None) -> bool:
+		self._match = number
+		if number is not None:
+			row = number - self.log_store.first
+			top = self.scroll_offset.y
+			if not top <= row < top + self.size.height:
+				top = max(0, row - self.size.height // 2)
+				self.scroll_to(y=top, animate=False, immediate=True)
+		self.refresh()
+		return number is not None
+
+	def render_line(self, y: int) -> Strip:
+		scroll_x, scroll_y = self.scroll_offset
+		base = self.rich_style
+		store = self.log_store
+		if not len(store):
+			if y == 0 and scroll_y == 0:
+				style = base + self.get_component_rich_style(
+					'transcript-view--placeholder'
+				)
+				return Strip([Segment(PLACEHOLDER, style)]).crop(
+					scroll_x, scroll_x + self.size.width
+				)
+			return Strip.blank(self.size.width, base)
+
+		number = store.first + scroll_y + y
+		line = store.get(number)
+		if line is None:
+			return Strip.blank(self.size.width, base)
+		text, spans = line
+		styles: list[tuple[int, int, Style]] = [
+			(start, end, self.get_component_rich_style('transcript-view--swear'))
+			for start, end in spans
+		]
+		if self._query:
+			name = (
+				'transcript-view--current-match'
+				if number == self._match
+				else 'transcript-view--match'
+			)
+			match_style = self.get_component_rich_style(name)
+			lowered = text.lower()
+			start = lowered.find(self._query)
+			while start != -1:
+				end = start + len(self._query)
+				styles.append((start, end, match_style))
+				start = lowered.find(self._query, end)
+		strip = Strip(_segments(text, base, styles))
+		return strip.crop(scroll_x, scroll_x + self.size.width).extend_cell_length(
+			self.size.width, base
+		)
+
+	def on_unmount(self) -> None:
+		self.log_store.close()
+
+
+def _segments(
+	text: str, base: Style, styles: list[tuple[int, int, Style]]
+) -> list[Segment]:
+	"""Split `text` into segments, layering each (start, end, style) on base."""
+	if not styles:
+		return [Segment(text, base)]
+	cuts = sorted({0, len(text), *(i for s, e, _ in styles for i in (s, e))})
+	segments = []
+	for start, end in zip(cuts, cuts[1:]):
+		if start >= end or end > len(text):
+			continue
+		style = base
+		for span_start, span_end, span_style in styles:
+			if span_start <= start and end <= span_end:
+				style += span_style
+		segments.append(Segment(text[start:end], style))
+	return segments
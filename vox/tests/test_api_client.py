@@ -0,0 +1,95 @@
+import http.client
+
+import pytest
+
+from api_client import SwearAPIClient
+
+
+class FakeResponse:
+	def __init__(self, status: int = 200, body: str = '{"swears": 0}'):
+		self.status = status
+		self._body = body.encode()
+		self.will_close = False
+
+	def read(self) -> bytes:
+		return self._body
+
+	def getheader(self, name: str) -> str | None:
+		return None
+
+
+class FakeConnection:
+	"""Records requests; fails the send or the response when told to."""
+
+	def __init__(self, log: list, fail_send: bool = False, fail_reply: bool = False):
+		self.log = log
+		self.fail_send = fail_send
+		self.fail_reply = fail_reply
+
+	def request(self, method: str, path: str, headers: dict) -> None:
+		if self.fail_send:
+			raise BrokenPipeError('peer closed')
+		self.log.append((method, path))
+
+	def getresponse(self) -> FakeResponse:
+		if self.fail_reply:
+			raise http.client.RemoteDisconnected('no reply')
+		return FakeResponse()
+
+	def close(self) -> None:
+		pass
+
+
+@pytest.fixture
+def client():
+	client = SwearAPIClient('http://localhost:3000', 'key')
+	yield client
+	client.close()
+
+
+def connect(client: SwearAPIClient, *connections: FakeConnection) -> None:
+	pending = list(connections)
+	client._open_connection = lambda: pending.pop(0)
+
+
+def test_send_failure_on_reused_connection_is_resent(client):
+	sent: list = []
+	connect(client, FakeConnection(sent), FakeConnection(sent))
+	assert client.report_swears(1)
+	client._conn.fail_send = True
+
+	assert client.report_swears(2)
+
+	assert sent == [
+		('POST', '/api/swears?pricePerSwear=0&by=1'),
+		('POST', '/api/swears?pricePerSwear=0&by=2'),
+	]
+	assert client.stats.reconnects == 1
+	assert client.pending == 0
+	# The resend claimed its own rate limit slot
+	assert len(client._limiter._timestamps) == 3
+
+
+def test_lost_response_after_post_is_not_resent(client):
+	sent: list = []
+	connect(client, FakeConnection(sent), FakeConnection(sent))
+	assert client.report_swears(1)
+	client._conn.fail_reply = True
+
+	assert not client.report_swears(2)
+
+	# The server may have applied it; it waits for the retry backoff instead
+	assert sent[-1] == ('POST', '/api/swears?pricePerSwear=0&by=2')
+	assert len(sent) == 2
+	assert client.pending == 2
+
+
+def test_get_is_resent_after_lost_response(client):
+	sent: list = []
+	connect(client, FakeConnection(sent), FakeConnection(sent))
+	assert client.fetch_swears() == 0
+	client._conn.fail_reply = True
+
+	assert client.fetch_swears() == 0
+	assert [method for method, _ in sent] == ['GET', 'GET', 'GET']
+	assert client.stats.reconnects == 1
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from audio import BLOCKSIZE, INT16_FULL_SCALE, mean_square
+from processing import normalize_audio
+
+
+@pytest.fixture
+def pcm() -> np.ndarray:
+	rng = np.random.default_rng(0)
+	return rng.integers(-INT16_FULL_SCALE, INT16_FULL_SCALE, (BLOCKSIZE, 1)).astype(
+		np.int16
+	)
+
+
+def test_mean_square_agrees_across_formats(pcm):
+	as_float = pcm.astype(np.float32) / INT16_FULL_SCALE
+	assert mean_square(pcm) == pytest.approx(mean_square(as_float), rel=1e-6)
+
+
+def test_mean_square_of_full_scale_int16_does_not_overflow():
+	chunk = np.full(BLOCKSIZE, -32768, dtype=np.int16)
+	assert mean_square(chunk) == 1.0
+
+
+def test_normalize_gives_the_same_float32_for_both_formats(pcm):
+	as_float = pcm.reshape(-1).astype(np.float32) / INT16_FULL_SCALE
+	from_int16 = normalize_audio(pcm.reshape(-1))
+
+	assert from_int16.dtype == np.float32
+	np.testing.assert_allclose(from_int16, normalize_audio(as_float), atol=1e-6)
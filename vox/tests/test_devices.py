@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+import devices
+from audio import AudioCapture
+from devices import DeviceRegistry
+
+
+@pytest.fixture
+def rescanned(monkeypatch) -> threading.Event:
+	done = threading.Event()
+	monkeypatch.setattr(devices, '_rescan_portaudio', done.set)
+	monkeypatch.setattr(AudioCapture, 'list_devices', staticmethod(lambda: []))
+	return done
+
+
+def test_first_scan_does_not_reinitialize(rescanned):
+	scanned = threading.Event()
+	registry = DeviceRegistry(on_change=lambda _: scanned.set())
+	registry.start()
+	assert scanned.wait(5)
+	registry.close()
+
+	assert not rescanned.is_set()
+
+
+def test_rescans_only_on_request_and_without_open_streams(rescanned):
+	checked = threading.Event()
+	stream_open = True
+
+	def can_rescan() -> bool:
+		checked.set()
+		return not stream_open
+
+	registry = DeviceRegistry(can_rescan=can_rescan)
+	registry.start()
+	assert not checked.wait(0.2)
+
+	registry.refresh()
+	assert checked.wait(5)
+	assert not rescanned.is_set()
+
+	stream_open = False
+	registry.refresh()
+	assert rescanned.wait(5)
+	registry.close()
@@ -0,0 +1,34 @@
+import threading
+
+from metrics import Counter, Histogram
+
+THREADS = 8
+UPDATES = 20_000
+
+
+def hammer(update) -> None:
+	threads = [
+		threading.Thread(target=lambda: [update() for _ in range(UPDATES)])
+		for _ in range(THREADS)
+	]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+
+def test_counter_keeps_concurrent_increments():
+	counter = Counter('vox_test_total', 'Test.', label='reason')
+	hammer(lambda: counter.inc('swear'))
+
+	assert f'vox_test_total{{reason="swear"}} {THREADS * UPDATES}' in counter.expose()
+
+
+def test_histogram_keeps_concurrent_observations():
+	histogram = Histogram('vox_test_seconds', 'Test.', (0.5, 1.0))
+	hammer(lambda: histogram.observe(0.75))
+
+	lines = histogram.expose()
+	assert 'vox_test_seconds_bucket{le="0.5"} 0' in lines
+	assert f'vox_test_seconds_bucket{{le="1.0"}} {THREADS * UPDATES}' in lines
+	assert f'vox_test_seconds_count {THREADS * UPDATES}' in lines
@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+
+import outbox as outbox_module
+from outbox import ReportOutbox
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+	return tmp_path / 'outbox.log'
+
+
+def test_memory_outbox_reserve_commit_release():
+	outbox = ReportOutbox()
+	outbox.append(2)
+	outbox.append(3)
+
+	assert outbox.reserve() == (2, 5)
+	# Only one batch in flight
+	assert outbox.reserve() is None
+	outbox.append(1)
+	assert (outbox.pending, outbox.unsent) == (6, 1)
+
+	outbox.release()
+	assert outbox.reserve() == (3, 6)
+	outbox.commit()
+	assert outbox.pending == 0
+	assert outbox.reserve() is None
+
+
+def test_replays_uncommitted_counts(path):
+	outbox = ReportOutbox(path)
+	outbox.append(2)
+	assert outbox.reserve() == (1, 2)
+	outbox.commit()
+	outbox.append(3)
+	outbox.append(4)
+	outbox.close()
+
+	reopened = ReportOutbox(path)
+	assert reopened.pending == 7
+	assert reopened.reserve() == (3, 7)
+	reopened.close()
+
+
+def test_ignores_torn_tail(path):
+	path.write_text('a 1 2\na 2 5\nc 1\na 3 4')
+
+	outbox = ReportOutbox(path)
+	assert outbox.pending == 5
+	outbox.close()
+	# The torn record is dropped when the log is rewritten
+	assert path.read_text() == 'a 2 5\n'
+
+
+def test_released_batch_survives_restart(path):
+	outbox = ReportOutbox(path)
+	outbox.append(3)
+	outbox.reserve()
+	outbox.release()
+	outbox.close()
+
+	reopened = ReportOutbox(path)
+	assert reopened.pending == 3
+	reopened.close()
+
+
+def test_compacts_once_delivered(path, monkeypatch):
+	monkeypatch.setattr(outbox_module, 'COMPACT_THRESHOLD_BYTES', 16)
+	outbox = ReportOutbox(path)
+	for _ in range(5):
+		outbox.append(1)
+	outbox.reserve()
+	outbox.commit()
+
+	assert path.read_text() == ''
+	outbox.append(2)
+	outbox.close()
+	reopened = ReportOutbox(path)
+	assert reopened.pending == 2
+	reopened.close()
+
+
+def test_second_instance_uses_its_own_log(path):
+	first = ReportOutbox(path)
+	first.append(2)
+	first.close()
+	first = ReportOutbox(path)
+
+	second = ReportOutbox(path)
+	assert second.path == path.with_name('outbox-1.log')
+	# The first instance's counts are not replayed twice
+	assert second.pending == 0
+	second.append(1)
+	second.close()
+	first.close()
+
+	# Once free, each log is picked up again by the next run to claim it
+	for log_path, pending in ((path, 2), (path.with_name('outbox-1.log'), 1)):
+		reopened = ReportOutbox(log_path)
+		assert reopened.pending == pending
+		reopened.close()
@@ -0,0 +1,82 @@
+import pytest
+
+from api_client import SlidingWindowLimiter, SwearAPIClient
+
+
+class FakeClock:
+	def __init__(self) -> None:
+		self.now = 1000.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+	return FakeClock()
+
+
+def test_limiter_grants_up_to_max_requests_per_window(clock):
+	limiter = SlidingWindowLimiter(3, 60.0, clock=clock)
+	for _ in range(3):
+		assert limiter.try_acquire() == 0.0
+		clock.now += 1
+
+	assert limiter.try_acquire() == pytest.approx(57.0)
+
+
+def test_limiter_frees_slots_as_the_window_slides(clock):
+	limiter = SlidingWindowLimiter(2, 60.0, clock=clock)
+	limiter.try_acquire()
+	clock.now += 30
+	limiter.try_acquire()
+
+	clock.now += 29
+	assert limiter.try_acquire() == pytest.approx(1.0)
+	clock.now += 1
+	assert limiter.try_acquire() == 0.0
+	assert limiter.try_acquire() == pytest.approx(30.0)
+
+
+def test_back_off_doubles_until_reset(clock):
+	limiter = SlidingWindowLimiter(30, 60.0, clock=clock)
+	assert limiter.back_off() == pytest.approx(2.0)
+	assert limiter.back_off() == pytest.approx(4.0)
+	assert limiter.try_acquire() == pytest.approx(4.0)
+
+	limiter.reset_backoff()
+	assert limiter.back_off() == pytest.approx(2.0)
+
+
+def test_back_off_is_capped_at_the_window(clock):
+	limiter = SlidingWindowLimiter(30, 60.0, clock=clock)
+	for _ in range(10):
+		delay = limiter.back_off()
+	assert delay == pytest.approx(60.0)
+
+
+def test_back_off_honours_retry_after(clock):
+	limiter = SlidingWindowLimiter(30, 60.0, clock=clock)
+	assert limiter.back_off(7.5) == 7.5
+	clock.now += 7
+	assert limiter.try_acquire() == pytest.approx(0.5)
+	clock.now += 0.5
+	assert limiter.try_acquire() == 0.0
+
+
+def test_fetch_claims_a_slot(clock, monkeypatch):
+	client = SwearAPIClient('http://localhost:3000', 'key', max_requests=1)
+	client._limiter = SlidingWindowLimiter(1, 60.0, clock=clock)
+	monkeypatch.setattr(client, '_request', lambda method, path: (None, ''))
+	waits: list[float] = []
+
+	def sleep(seconds: float) -> None:
+		waits.append(seconds)
+		clock.now += seconds
+
+	monkeypatch.setattr('api_client.time.sleep', sleep)
+	client._get('/api/swears')
+	client._get('/api/swears')
+	client.close()
+
+	assert waits == [pytest.approx(60.0)]
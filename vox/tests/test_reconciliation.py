@@ -0,0 +1,88 @@
+import threading
+
+from speculative import ReconciliationLedger
+
+
+class Recorder:
+	def __init__(self) -> None:
+		self.sent: list[tuple[int, list[str], bool]] = []
+
+	def __call__(self, delta: int, words: list[str], speculative: bool) -> None:
+		self.sent.append((delta, sorted(words), speculative))
+
+
+def test_agreeing_full_window_sends_no_correction():
+	report = Recorder()
+	ledger = ReconciliationLedger(report)
+	ledger.record_speculative(0, 100, ['damn'])
+	ledger.record_speculative(100, 200, [])
+
+	assert ledger.settle(200, ['damn']) == 0
+	assert report.sent == [(1, ['damn'], True)]
+	assert ledger.unsettled == 0
+
+
+def test_over_count_is_corrected_down():
+	report = Recorder()
+	ledger = ReconciliationLedger(report)
+	ledger.record_speculative(0, 100, ['damn', 'hell'])
+	ledger.record_speculative(100, 200, ['crap'])
+
+	assert ledger.settle(200, ['damn']) == -2
+	assert report.sent[-1] == (-2, ['crap', 'hell'], False)
+	assert ledger.corrected == -2
+
+
+def test_under_count_is_corrected_up():
+	report = Recorder()
+	ledger = ReconciliationLedger(report)
+	ledger.record_speculative(0, 100, [])
+
+	assert ledger.settle(100, ['damn', 'damn']) == 2
+	assert report.sent == [(2, ['damn', 'damn'], False)]
+
+
+def test_only_reports_up_to_the_window_end_are_settled():
+	report = Recorder()
+	ledger = ReconciliationLedger(report)
+	ledger.record_speculative(0, 100, ['damn'])
+	ledger.record_speculative(100, 200, ['hell'])
+
+	assert ledger.settle(100, ['damn']) == 0
+	assert ledger.unsettled == 1
+
+
+def test_late_speculative_window_is_dropped():
+	report = Recorder()
+	ledger = ReconciliationLedger(report)
+	ledger.settle(300, ['damn'])
+
+	assert ledger.record_speculative(200, 300, ['damn']) == 0
+	assert report.sent == [(1, ['damn'], False)]
+
+
+def test_slow_report_does_not_block_the_other_path():
+	entered = threading.Event()
+	release = threading.Event()
+	sent: list[int] = []
+
+	def report(delta: int, words: list[str], speculative: bool) -> None:
+		if speculative:
+			entered.set()
+			release.wait(5)
+		sent.append(delta)
+
+	ledger = ReconciliationLedger(report)
+	fast = threading.Thread(
+		target=ledger.record_speculative, args=(0, 100, ['damn', 'hell'])
+	)
+	fast.start()
+	assert entered.wait(5)
+	# While the fast report is stuck, the full path still settles...
+	assert ledger.settle(100, []) == -2
+	assert ledger.unsettled == 0
+	# ...but its correction is only sent after the count it corrects
+	assert sent == []
+	release.set()
+	fast.join()
+	assert sent == [2, -2]
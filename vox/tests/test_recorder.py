@@ -0,0 +1,68 @@
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from audio import INT16_FULL_SCALE, SAMPLE_RATE
+from recorder import READ_MARGIN_SAMPLES, FlightRecorder, read_recording
+
+CHUNK = SAMPLE_RATE // 10
+# 3 s ring, fed 5 s of audio so the write position wraps
+MINUTES = 3 / 60
+FED_SECONDS = 5
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+	return tmp_path / 'flight-recorder.pcm'
+
+
+def feed(recorder: FlightRecorder, audio: np.ndarray) -> None:
+	started_ns = time.perf_counter_ns() - FED_SECONDS * 1_000_000_000
+	for offset in range(0, len(audio), CHUNK):
+		captured_ns = started_ns + offset * 1_000_000_000 // SAMPLE_RATE
+		recorder.feed(captured_ns, audio[offset : offset + CHUNK])
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.int16])
+def test_round_trip_after_wraparound(path, dtype):
+	rng = np.random.default_rng(0)
+	pcm = rng.integers(-INT16_FULL_SCALE, INT16_FULL_SCALE, FED_SECONDS * SAMPLE_RATE)
+	if dtype == np.int16:
+		audio = pcm.astype(np.int16)
+	else:
+		audio = (pcm / INT16_FULL_SCALE).astype(np.float32)
+
+	recorder = FlightRecorder(path, MINUTES)
+	feed(recorder, audio)
+	recorder.close()
+
+	spans = read_recording(path, 0.0, float('inf'))
+	assert len(spans) == 1
+	kept = int(MINUTES * 60 * SAMPLE_RATE) - READ_MARGIN_SAMPLES
+	expected = (pcm[-kept:] / INT16_FULL_SCALE).astype(np.float32)
+	np.testing.assert_array_equal(spans[0].audio, expected)
+
+
+def test_float_samples_are_clipped_to_full_scale(path):
+	recorder = FlightRecorder(path, MINUTES)
+	audio = np.full(FED_SECONDS * SAMPLE_RATE, 1.5, dtype=np.float32)
+	audio[::2] = -1.5
+	feed(recorder, audio)
+	recorder.close()
+
+	played = read_recording(path, 0.0, float('inf'))[0].audio
+	assert played.min() == -1.0
+	assert played.max() == (INT16_FULL_SCALE - 1) / INT16_FULL_SCALE
+
+
+def test_second_instance_records_to_its_own_file(path):
+	first = FlightRecorder(path, MINUTES)
+	second = FlightRecorder(path, MINUTES)
+	try:
+		assert first.path == path
+		assert second.path == path.with_name('flight-recorder-1.pcm')
+	finally:
+		second.close()
+		first.close()
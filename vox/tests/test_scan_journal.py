@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from scan import ScanJournal
+
+IDENTITY = {'file': 'talk.wav', 'size': 1234, 'model': 'tiny'}
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+	return tmp_path / 'talk.wav.scan'
+
+
+def test_resumes_finished_chunks(path):
+	journal = ScanJournal(path, IDENTITY)
+	assert journal.open(restart=False) == {}
+	journal.append({'chunk': 0, 'words': []})
+	journal.append({'chunk': 1, 'words': []})
+	journal.close()
+	with open(path, 'a', encoding='utf-8') as f:
+		f.write('{"chunk": 2, "wo')
+
+	resumed = ScanJournal(path, IDENTITY).open(restart=False)
+	assert sorted(resumed) == [0, 1]
+
+
+def test_torn_identity_line_starts_fresh(path):
+	path.write_text('{"file": "talk.w')
+
+	journal = ScanJournal(path, IDENTITY)
+	assert journal.open(restart=False) == {}
+	journal.close()
+	assert json.loads(path.read_text().splitlines()[0]) == IDENTITY
+
+
+def test_journal_for_another_scan_is_discarded(path):
+	path.write_text(json.dumps({**IDENTITY, 'model': 'base'}) + '\n{"chunk": 0}\n')
+
+	journal = ScanJournal(path, IDENTITY)
+	assert journal.open(restart=False) == {}
+	journal.close()
@@ -0,0 +1,83 @@
+import threading
+from pathlib import Path
+from queue import Queue
+
+import numpy as np
+import pytest
+
+from audio import SAMPLE_RATE
+from pipeline import Pipeline
+from speculative import ReconciliationLedger, speculative_pipeline
+from swear_detection import SwearDetector
+
+CHUNK = SAMPLE_RATE // 10
+SECONDS = 10
+# 3 s full windows, plus the final 1 s flushed on stop
+FULL_WINDOWS = 4
+
+
+class Engine:
+	def __init__(self, text: str, release: threading.Event | None = None) -> None:
+		self.text = text
+		self.release = release
+
+	def transcribe(self, audio: np.ndarray, hotwords: str | None = None) -> str:
+		if self.release is not None:
+			self.release.wait(5)
+		return self.text
+
+
+@pytest.fixture
+def detector(tmp_path: Path) -> SwearDetector:
+	path = tmp_path / 'swears.txt'
+	path.write_text('damn\n')
+	return SwearDetector(path)
+
+
+def fill(source: Queue) -> None:
+	# A quiet chunk in every second keeps each window above the noise floor
+	for i in range(SECONDS * 10):
+		level = 0.0 if i % 10 == 0 else 0.5
+		source.put((i, np.full(CHUNK, level, dtype=np.float32)))
+
+
+def run(
+	fast: Engine, detector: SwearDetector
+) -> tuple[ReconciliationLedger, list[int], Pipeline]:
+	sent: list[int] = []
+	ledger = ReconciliationLedger(lambda delta, words, speculative: sent.append(delta))
+	source: Queue = Queue()
+	fill(source)
+	pipeline = speculative_pipeline(
+		source, fast, Engine('damn'), detector, ledger, on_text=lambda text: None
+	)
+	pipeline.start()
+	pipeline.stop()
+	return ledger, sent, pipeline
+
+
+def test_stop_settles_every_queued_window(detector):
+	ledger, sent, pipeline = run(Engine('damn damn'), detector)
+	pipeline.join(5)
+
+	assert not pipeline.running
+	assert sum(sent) == FULL_WINDOWS
+	assert ledger.unsettled == 0
+
+
+def test_slow_fast_path_does_not_hold_up_the_full_path(detector):
+	release = threading.Event()
+	ledger, sent, pipeline = run(Engine('damn', release), detector)
+	try:
+		# The segmenter may be waiting to queue END behind the stuck fast path
+		for stage in pipeline.stages:
+			if stage.name in ('transcribe', 'detect', 'report'):
+				stage.join(5)
+		assert sum(sent) == FULL_WINDOWS
+		assert pipeline.depth('speculate') > 0
+	finally:
+		release.set()
+		pipeline.join(5)
+	# Fast windows for audio already settled are dropped, not counted again
+	assert sum(sent) == FULL_WINDOWS
+	assert ledger.unsettled == 0
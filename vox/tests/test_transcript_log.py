@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pytest
+
+from widgets.transcript_view import SPILL_SEARCH_LINES, TranscriptLog
+
+CAPACITY = 10
+# Enough lines that searching the spill takes more than one block
+LINES = SPILL_SEARCH_LINES + 2 * CAPACITY
+
+
+@pytest.fixture
+def spilled(tmp_path: Path):
+	log = TranscriptLog(CAPACITY, tmp_path / 'transcript.txt')
+	for i in range(LINES):
+		log.append(f'line {i} damn' if i % 100 == 0 else f'line {i}', [(7, 11)])
+	yield log
+	log.close()
+
+
+def test_without_spill_evicted_lines_are_gone():
+	log = TranscriptLog(CAPACITY)
+	evicted = [log.append(f'line {i}') for i in range(CAPACITY + 1)]
+
+	assert evicted == [False] * CAPACITY + [True]
+	assert log.first == 1
+	assert log.get(0) is None
+	assert log.find('line 0', log.total) is None
+
+
+def test_spilled_lines_are_read_back_with_their_spans(spilled):
+	assert len(spilled) == LINES
+	assert spilled.get(0) == ('line 0 damn', ((7, 11),))
+	assert spilled.get(1) == ('line 1', ((7, 11),))
+	assert spilled.get(LINES - 1) == (f'line {LINES - 1}', ((7, 11),))
+
+
+def test_find_steps_back_through_the_spill(spilled):
+	found = []
+	before = spilled.total
+	while (number := spilled.find('damn', before)) is not None:
+		found.append(number)
+		before = number
+
+	assert found == list(range(0, LINES, 100))[::-1]
+
+
+def test_spill_file_holds_the_whole_transcript(tmp_path, spilled):
+	spilled.close()
+	lines = (tmp_path / 'transcript.txt').read_text().splitlines()
+
+	assert len(lines) == LINES
+	assert lines[-1] == f'line {LINES - 1}'